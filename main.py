@@ -323,6 +323,20 @@ def preload_chat_listener():
         logger.error(f"Failed to preload chat listener: {e}")
         return None
 
+def start_stt_worker(cfg):
+    """Start whisper.cpp server di background supaya model STT sudah warm saat hold-to-talk pertama"""
+    if not cfg.get("whisper_server_enabled", True):
+        return False
+    try:
+        from modules_client.whisper_server import get_whisper_server
+        started = get_whisper_server(cfg).start()
+        logger.info("Whisper server starting (model loads in background)" if started
+                    else "Whisper server not available, STT uses main.exe")
+        return started
+    except Exception as e:
+        logger.error(f"Failed to start whisper server: {e}")
+        return False
+
 def check_payment_server():
     """Check dan start payment server jika perlu"""
     logger.info("Checking payment server status...")
@@ -460,6 +474,7 @@ def main():
     
     # ========== 7. PRELOAD MODULES ==========
     chat_listener_module = preload_chat_listener()
+    start_stt_worker(cfg)
     
     # ========== 8. CHECK PAYMENT SERVER ==========
     payment_server_ok = check_payment_server()
@@ -572,6 +587,10 @@ def run_development_mode():
         return 1
 
 if __name__ == "__main__":
+    # Wajib untuk worker process (LLM lokal) di build PyInstaller/Windows
+    import multiprocessing
+    multiprocessing.freeze_support()
+
     # Check development mode
     if "--dev" in sys.argv or os.getenv("STREAMMATE_DEV"):
         exit_code = run_development_mode()
@@ -1,20 +1,67 @@
 import requests
 import logging
 import os
+import threading
 from modules_client.config_manager import ConfigManager
+from modules_client.failover import FailoverPool
+from modules_client.local_llm import LocalLLM
 
 logger = logging.getLogger(__name__)
 
+PRODUCTION_URL = "https://api.streammateai.com"
+LOCAL_URL = "http://localhost:8000"
+
+# Halaman Ogg pertama (BOS) tiap segmen di stream /tts/synthesize
+OGG_BOS = b"OggS\x00\x02"
+
+
+def iter_ogg_links(chunks):
+    """Pecah chained Ogg dari stream HTTP jadi bytes per segmen (begitu lengkap)."""
+    buf = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buf += chunk
+        while True:
+            nxt = buf.find(OGG_BOS, 1)
+            if nxt < 0:
+                break
+            yield buf[:nxt]
+            buf = buf[nxt:]
+    if buf:
+        yield buf
+
 class APIClient:
     def __init__(self):
         self.cfg = ConfigManager()
-        self.base_url = self._get_server_url()
+        self.pool = FailoverPool(
+            self._get_server_urls(),
+            hedging=self.cfg.get("api_hedging", True),
+        )
+        self.pool.start_probes()
+
+        # Backend LLM lokal (opsional) untuk balasan pendek & fallback
+        self.local_llm = LocalLLM.from_config(self.cfg)
+        self.local_intents = set(self.cfg.get("local_llm_intents", ["greeting", "thanks"]))
+        if self.cfg.get("local_llm_enabled", False):
+            self.local_llm.start()
+
+        # Akuntansi token prompt (usage dari server + estimasi lokal)
+        self.last_usage = {}
+        self._usage_lock = threading.Lock()
+        self._usage_totals = {"replies": 0, "prompt_tokens": 0, "cached_tokens": 0,
+                              "completion_tokens": 0}
+
+    @property
+    def base_url(self):
+        """URL server yang sedang aktif (bisa berpindah saat failover)."""
+        return self.pool.active_url
         
     def _get_server_url(self):
         """Tentukan server URL berdasarkan mode"""
         # 1. Cek environment variable dulu (developer override)
         if os.getenv("STREAMMATE_DEV", "").lower() == "true":
-            return "http://localhost:8000"
+            return LOCAL_URL
         
         # 2. Cek apakah ada dev_users.json (developer mode)
         try:
@@ -22,61 +69,154 @@ class APIClient:
             from pathlib import Path
             dev_file = Path("config/dev_users.json")
             if dev_file.exists():
-                return "http://localhost:8000"
+                return LOCAL_URL
         except:
             pass
         
         # 3. Cek debug_mode di settings
         if self.cfg.get("debug_mode", False):
-            return "http://localhost:8000"
+            return LOCAL_URL
         
         # 4. Default: Production server
-        return "https://api.streammateai.com"
+        return PRODUCTION_URL
+
+    def _get_server_urls(self):
+        """Daftar server berurutan prioritas untuk failover."""
+        custom = self.cfg.get("api_endpoints")
+        if custom:
+            return list(custom)
+
+        primary = self._get_server_url()
+        if primary == PRODUCTION_URL:
+            # Production down → fallback ke localhost, balik lagi saat pulih
+            return [PRODUCTION_URL, LOCAL_URL]
+        return [primary]
     
     def _make_request(self, endpoint, data, timeout=10):
-        """Make request dengan error handling"""
-        try:
-            url = f"{self.base_url}/{endpoint}"
-            response = requests.post(url, json=data, timeout=timeout)
-            response.raise_for_status()
-            return response
-        except requests.exceptions.ConnectionError:
-            if self.base_url == "https://api.streammateai.com":
-                # Production server down, fallback ke localhost
-                logger.warning("Production server unavailable, trying localhost...")
-                self.base_url = "http://localhost:8000"
-                return self._make_request(endpoint, data, timeout)
-            else:
-                raise
+        """Make request dengan failover, circuit breaker dan hedging"""
+        return self.pool.post(endpoint, data, timeout=timeout)
     
-    def generate_reply(self, prompt: str) -> str:
-        """Generate AI reply melalui server"""
+    def _prefer_local(self, intent: str = None) -> bool:
+        """Routing berbasis latency: pakai LLM lokal kalau lebih cepat dari server."""
+        if not self.local_llm.is_ready():
+            return False
+        if self.pool.all_open():
+            return True
+        if intent not in self.local_intents:
+            return False
+        local_p95 = self.local_llm.p95()
+        remote_p95 = self.pool.active_p95("ai_reply")
+        # Belum ada data lokal → coba lokal dulu untuk mengukur
+        if local_p95 is None or remote_p95 is None:
+            return True
+        return local_p95 < remote_p95
+
+    def _generate_local(self, prompt: str, system: str = None):
+        reply = self.local_llm.generate(prompt, system=system)
+        if reply:
+            logger.info("AI reply dijawab oleh LLM lokal")
+        return reply
+
+    def _record_usage(self, usage: dict):
+        """Catat token prompt per balasan supaya efek prefix cache terlihat."""
+        if not usage:
+            return
+        self.last_usage = usage
+        with self._usage_lock:
+            self._usage_totals["replies"] += 1
+            for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                self._usage_totals[key] += usage.get(key, 0) or 0
+        logger.debug(
+            f"AI usage: prompt={usage.get('prompt_tokens', 0)} "
+            f"cached={usage.get('cached_tokens', 0)} "
+            f"completion={usage.get('completion_tokens', 0)}"
+        )
+
+    def usage_stats(self) -> dict:
+        with self._usage_lock:
+            stats = dict(self._usage_totals)
+        replies = stats["replies"] or 1
+        stats["avg_prompt_tokens"] = round(stats["prompt_tokens"] / replies, 1)
+        stats["cache_hit_ratio"] = round(stats["cached_tokens"] / (stats["prompt_tokens"] or 1), 3)
+        stats["last"] = self.last_usage
+        return stats
+
+    def generate_reply(self, prompt: str, intent: str = None, system: str = None) -> str:
+        """
+        Generate AI reply melalui server (atau LLM lokal bila lebih cepat).
+
+        system: prefix stabil (persona/konteks) yang dikirim terpisah dari
+        prompt supaya prefix cache provider bisa dipakai ulang.
+        """
+        if self._prefer_local(intent):
+            reply = self._generate_local(prompt, system)
+            if reply:
+                return reply
+
+        payload = {"text": prompt}
+        if system:
+            payload["system"] = system
+        # Session billing aktif → identitas & tier untuk antrian fair-share di server
+        from modules_client.subscription_checker import current_session_id
+        session_id = current_session_id()
+        if session_id:
+            payload["session_id"] = session_id
+
         try:
-            response = self._make_request("ai_reply", {"text": prompt})
-            return response.json().get("reply", "")
+            response = self._make_request("ai_reply", payload)
+            result = response.json()
+            self._record_usage(result.get("usage"))
+            return result.get("reply", "")
         except Exception as e:
             logger.error(f"AI API failed: {e}")
+
+            # Server lambat/down → LLM lokal yang sudah warm
+            reply = self._generate_local(prompt, system)
+            if reply:
+                return reply
+
             # Fallback untuk developer mode saja
             if "localhost" in self.base_url:
                 try:
                     from modules_server.deepseek_ai import generate_reply as local_gen
                     logger.info("Using local DeepSeek fallback")
-                    return local_gen(prompt)
+                    return local_gen(prompt, system=system)
                 except Exception as local_error:
                     logger.error(f"Local fallback failed: {local_error}")
             
             return "Maaf, sistem AI sedang dalam maintenance"
 
+    def synthesize_speech(self, text: str, voice: str = None, language: str = None,
+                          pitch: float = 0, timeout: float = 15):
+        """
+        TTS di server (thin client): generator (pcm float32, samplerate) per
+        segmen, di-decode dari stream Ogg Opus begitu tiap segmen diterima.
+        """
+        from modules_server.tts_backends import decode_audio_bytes
+
+        payload = {"text": text, "voice": voice, "language": language, "format": "ogg", "pitch": pitch}
+        with requests.post(f"{self.base_url}/tts/synthesize", json=payload,
+                           stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            for link in iter_ogg_links(response.iter_content(chunk_size=4096)):
+                yield decode_audio_bytes(link, "ogg")
+
 # Global instance
 _api_client = APIClient()
 
 # Export functions
-def generate_reply(prompt: str) -> str:
-    return _api_client.generate_reply(prompt)
+def generate_reply(prompt: str, intent: str = None, system: str = None) -> str:
+    return _api_client.generate_reply(prompt, intent=intent, system=system)
+
+def synthesize_speech(text: str, voice: str = None, language: str = None, pitch: float = 0):
+    return _api_client.synthesize_speech(text, voice, language, pitch)
 
 def get_server_info():
     """Info server yang sedang digunakan (untuk debugging)"""
     return {
         "server_url": _api_client.base_url,
-        "mode": "development" if "localhost" in _api_client.base_url else "production"
+        "mode": "development" if "localhost" in _api_client.base_url else "production",
+        "failover": _api_client.pool.status(),
+        "local_llm": _api_client.local_llm.status(),
+        "usage": _api_client.usage_stats()
     }
\ No newline at end of file
@@ -0,0 +1,97 @@
+# modules_client/audio_capture.py
+"""
+Rekaman mikrofon hold-to-talk ke buffer NumPy yang dialokasikan sekali.
+
+Callback sounddevice hanya menyalin frame ke ring buffer float32 (tanpa
+list Python, tanpa alokasi per frame). Setelah hotkey dilepas, PCM 16 kHz
+diserahkan langsung ke engine STT di memori — tidak ada sf.write ke
+temp/*.wav, decode ulang, atau sleep menunggu file.
+
+Posisi sample bersifat absolut (terus naik); kalau rekaman melebihi
+kapasitas, sample tertua ditimpa dan hanya max_seconds terakhir yang
+tersimpan.
+"""
+
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import sounddevice as sd
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+SAMPLE_RATE = 16000
+
+
+class RecordingBuffer:
+    """Ring buffer PCM mono float32 untuk satu sesi rekaman."""
+
+    def __init__(self, max_seconds: float = 120.0, samplerate: int = SAMPLE_RATE):
+        self.samplerate = samplerate
+        self.capacity = int(max_seconds * samplerate)
+        self._data = np.empty(self.capacity, dtype=np.float32)
+        self.written = 0      # total sample yang pernah ditulis (posisi absolut)
+        self.overflows = 0    # sample tertua yang tertimpa
+
+    def callback(self, indata, frames, time_info, status):
+        """Callback sd.InputStream: salin channel pertama ke ring buffer."""
+        self.write(indata[:, 0])
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        if n > self.capacity:
+            samples = samples[-self.capacity:]
+            n = self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        if first < n:
+            self._data[:n - first] = samples[first:]
+        if self.written + n > self.capacity:
+            self.overflows += min(n, self.written + n - self.capacity)
+        # Update posisi setelah data tersalin: pembaca tidak melihat sample setengah jadi
+        self.written += n
+
+    @property
+    def oldest(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def read(self, start: int = None, end: int = None) -> np.ndarray:
+        """
+        Sample [start, end) posisi absolut. View langsung ke buffer kalau
+        tidak melewati batas ring (salinan hanya saat wrap).
+        """
+        end = self.written if end is None else min(end, self.written)
+        start = self.oldest if start is None else max(start, self.oldest)
+        if start >= end:
+            return self._data[:0]
+        s, e = start % self.capacity, end % self.capacity or self.capacity
+        if s < e:
+            return self._data[s:e]
+        return np.concatenate((self._data[s:], self._data[:e]))
+
+    def pcm(self) -> np.ndarray:
+        """Seluruh rekaman yang tersimpan, urut waktu."""
+        return self.read()
+
+    @property
+    def seconds(self) -> float:
+        return (self.written - self.oldest) / self.samplerate
+
+
+def record_while(is_active: Callable[[], bool], device: Optional[int] = None,
+                 max_seconds: float = 120.0, buffer: RecordingBuffer = None,
+                 poll_interval: float = 0.02) -> RecordingBuffer:
+    """
+    Rekam dari mic selama is_active() True. Return RecordingBuffer
+    (buffer.pcm() → PCM 16 kHz siap untuk STT). Error stream diteruskan.
+    """
+    buffer = buffer or RecordingBuffer(max_seconds)
+    with sd.InputStream(samplerate=buffer.samplerate, channels=1, dtype="float32",
+                        device=device, callback=buffer.callback):
+        while is_active():
+            time.sleep(poll_interval)
+    if buffer.overflows:
+        logger.warning(f"Rekaman > {max_seconds:.0f}s, {buffer.overflows} sample awal terpotong")
+    return buffer
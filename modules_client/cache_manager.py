@@ -1,20 +1,57 @@
 import json
+import os
 import time
+import heapq
+import atexit
 import hashlib
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import random
 
+from modules_client.intent_classifier import get_intent_classifier
+
 class CacheManager:
-    """Smart cache untuk response AI dengan variasi natural."""
-    
-    def __init__(self, cache_dir: str = "temp/cache"):
+    """Smart cache untuk response AI dengan variasi natural.
+
+    Cache disimpan di memori sebagai LRU (OrderedDict) dengan heap untuk
+    expiry TTL, sehingga lookup dan insert tidak pernah menyentuh disk.
+    Snapshot ke ``response_cache.json`` ditulis oleh thread background
+    secara batch dan atomic (tulis file sementara lalu ``os.replace``).
+    """
+
+    def __init__(self, cache_dir: str = "temp/cache", max_entries: int = 100,
+                 cache_ttl: int = 1800, flush_interval: float = 5.0,
+                 intent_classifier=None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cache_file = self.cache_dir / "response_cache.json"
-        self.cache = self._load_cache()
-        self.cache_ttl = 1800  # 30 menit
-        
+        self.cache_ttl = cache_ttl  # 30 menit
+        self.max_entries = max(1, int(max_entries))
+        self.flush_interval = flush_interval
+        self.intent_classifier = intent_classifier or get_intent_classifier()
+
+        # State in-memory
+        self._lock = threading.RLock()
+        self.cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._hits = 0
+        self._misses = 0
+        self._pattern_hits = 0
+        self._evictions = 0
+
+        # State persistence (write-behind)
+        self._dirty = False
+        # Satu penulis snapshot sekaligus (flusher vs flush()/close() dari UI/atexit)
+        self._save_lock = threading.Lock()
+        self._flush_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._flush_thread = None
+
+        self._load_cache()
+        self._start_flusher()
+
         # Template variations untuk natural response
         self.greeting_variations = [
             "Halo {name}! Welcome",
@@ -23,14 +60,14 @@ class CacheManager:
             "Hai {name}, selamat datang!",
             "Wah ada {name}, welcome!"
         ]
-        
+
         self.game_question_variations = [
             "Lagi seru main {game} nih!",
             "Main {game} dulu gan",
             "Sekarang lagi fokus {game}",
             "Lagi asik {game} bro"
         ]
-        
+
         self.thanks_variations = [
             "Thanks banget {name}!",
             "Makasih ya {name}",
@@ -38,160 +75,324 @@ class CacheManager:
             "Thank you {name}!",
             "Makasih banyak {name}"
         ]
-    
-    def _load_cache(self) -> Dict:
-        """Load cache dari file."""
-        if self.cache_file.exists():
-            try:
-                return json.loads(self.cache_file.read_text(encoding="utf-8"))
-            except:
-                return {}
-        return {}
-    
+
+        self.rank_template = "Sekarang di rank {rank} nih {name}"
+
+        # Akhiran acak yang kadang ditambahkan _personalize_response
+        self.personalize_suffixes = ["hehe", "nih", "gan", "bro", "kak"]
+
+        # Set template per bahasa output ("id" / "en"); bahasa tanpa set → fast path dilewati
+        self.template_sets = {
+            "id": {
+                "greeting": self.greeting_variations,
+                "game_question": self.game_question_variations,
+                "thanks": self.thanks_variations,
+                "rank": [self.rank_template],
+                "suffixes": self.personalize_suffixes,
+            },
+            "en": {
+                "greeting": [
+                    "Hi {name}, welcome!",
+                    "Hello {name}, glad you're here",
+                    "Hey {name}, how are you?",
+                    "Welcome to the stream {name}!",
+                ],
+                "game_question": [
+                    "Playing {game} right now!",
+                    "Just grinding some {game}",
+                    "Focused on {game} at the moment",
+                ],
+                "thanks": [
+                    "Thanks a lot {name}!",
+                    "Thank you {name}!",
+                    "Appreciate it {name}",
+                ],
+                "rank": ["Currently at {rank} rank {name}"],
+                "suffixes": ["haha", "bro"],
+            },
+        }
+
+    # ─── Persistence ────────────────────────────────────────────────
+    def _load_cache(self):
+        """Load snapshot cache dari file (sekali saat startup)."""
+        if not self.cache_file.exists():
+            return
+        try:
+            data = json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if not isinstance(data, dict):
+            return
+
+        now = time.time()
+        # Urutkan berdasarkan timestamp supaya urutan LRU tetap masuk akal
+        entries = sorted(
+            (item for item in data.items() if isinstance(item[1], dict)),
+            key=lambda x: x[1].get("last_access", x[1].get("timestamp", 0))
+        )
+        for key, entry in entries:
+            timestamp = entry.get("timestamp", 0)
+            if self._is_expired(timestamp, now):
+                continue
+            entry.setdefault("hits", 0)
+            self.cache[key] = entry
+            heapq.heappush(self._expiry_heap, (timestamp + self.cache_ttl, key))
+
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
     def _save_cache(self):
-        """Save cache ke file."""
-        self.cache_file.write_text(json.dumps(self.cache, indent=2), encoding="utf-8")
-    
+        """Tulis snapshot cache ke file secara atomic."""
+        # _save_lock dipegang dari snapshot sampai os.replace: snapshot lama tidak
+        # bisa menimpa yang lebih baru, dan .json.tmp tidak ditulis dua thread
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                snapshot = json.dumps(self.cache, ensure_ascii=False, separators=(",", ":"))
+                self._dirty = False
+
+            tmp_path = self.cache_file.with_suffix(".json.tmp")
+            try:
+                tmp_path.write_text(snapshot, encoding="utf-8")
+                os.replace(tmp_path, self.cache_file)
+            except Exception as e:
+                print(f"[ERROR] Save cache gagal: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def _start_flusher(self):
+        """Start thread background untuk write-behind snapshot."""
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        """Batch semua perubahan dalam satu interval lalu tulis sekali."""
+        while not self._stop_event.is_set():
+            self._flush_event.wait()
+            if self._stop_event.wait(self.flush_interval):
+                break
+            self._flush_event.clear()
+            self._save_cache()
+
+    def _mark_dirty(self):
+        self._dirty = True
+        self._flush_event.set()
+
+    def flush(self):
+        """Paksa tulis snapshot sekarang (mis. saat stop stream)."""
+        self._save_cache()
+
+    def close(self):
+        """Hentikan thread flusher dan tulis perubahan terakhir."""
+        self._stop_event.set()
+        self._flush_event.set()
+        self._save_cache()
+
+    # ─── Core LRU/TTL ───────────────────────────────────────────────
     def _generate_key(self, message: str, context: str = "") -> str:
         """Generate cache key dari message."""
         # Normalize message
         normalized = message.lower().strip()
         normalized = ''.join(c for c in normalized if c.isalnum() or c.isspace())
-        
+
         # Create hash
         content = f"{normalized}:{context}"
         return hashlib.md5(content.encode()).hexdigest()[:16]
-    
-    def _is_expired(self, timestamp: float) -> bool:
+
+    def _is_expired(self, timestamp: float, now: float = None) -> bool:
         """Check apakah cache expired."""
-        return time.time() - timestamp > self.cache_ttl
-    
+        if now is None:
+            now = time.time()
+        return now - timestamp > self.cache_ttl
+
+    def _purge_expired(self, now: float):
+        """Buang entry expired dari puncak heap (amortized O(log n))."""
+        heap = self._expiry_heap
+        removed = False
+        while heap and heap[0][0] < now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self.cache.get(key)
+            # Heap entry bisa basi kalau key sudah ditimpa / di-evict
+            if entry is not None and entry["timestamp"] + self.cache_ttl == expires_at:
+                del self.cache[key]
+                removed = True
+
+        # Heap menumpuk entry basi saat key sering ditimpa; rebuild jika terlalu besar
+        if len(heap) > 4 * self.max_entries:
+            self._expiry_heap = [
+                (entry["timestamp"] + self.cache_ttl, key)
+                for key, entry in self.cache.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+
+        if removed:
+            self._mark_dirty()
+
+    @staticmethod
+    def _context_key(context: Dict) -> str:
+        # Key lama (tanpa bahasa) tetap dipakai untuk "id" supaya snapshot lama masih kena
+        lang = context.get("lang", "id")
+        game = context.get("game", "")
+        return game if lang == "id" else f"{game}|{lang}"
+
     def get_cached_response(self, message: str, context: Dict) -> Optional[str]:
         """Get response dari cache dengan smart matching."""
-        # Clean expired entries
-        self._clean_expired()
-        
-        # Try exact match first
-        key = self._generate_key(message, context.get("game", ""))
-        if key in self.cache:
-            entry = self.cache[key]
-            if not self._is_expired(entry["timestamp"]):
-                return self._personalize_response(
-                    entry["response"], 
-                    context.get("author", "teman")
-                )
-        
+        if context.get("lang", "id") not in self.template_sets:
+            return None
+        key = self._generate_key(message, self._context_key(context))
+        now = time.time()
+
+        with self._lock:
+            self._purge_expired(now)
+
+            # Try exact match first
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                entry["hits"] = entry.get("hits", 0) + 1
+                entry["last_access"] = now
+                self._hits += 1
+                self._mark_dirty()
+                response = entry["response"]
+            else:
+                self._misses += 1
+                response = None
+
+        if response is not None:
+            return self._personalize_response(
+                response,
+                context.get("author", "teman"),
+                context.get("lang", "id")
+            )
+
         # Try pattern matching
         pattern_response = self._match_pattern(message, context)
         if pattern_response:
+            with self._lock:
+                self._pattern_hits += 1
             return pattern_response
-        
+
         return None
-    
+
     def cache_response(self, message: str, response: str, context: Dict):
         """Cache response dengan metadata."""
-        key = self._generate_key(message, context.get("game", ""))
-        
-        self.cache[key] = {
-            "message": message,
-            "response": response,
-            "context": context,
-            "timestamp": time.time(),
-            "hits": 0
-        }
-        
-        # Limit cache size (LRU)
-        if len(self.cache) > 100:
-            self._evict_lru()
-        
-        self._save_cache()
-    
+        key = self._generate_key(message, self._context_key(context))
+        now = time.time()
+
+        with self._lock:
+            self._purge_expired(now)
+
+            self.cache[key] = {
+                "message": message,
+                "response": response,
+                "context": context,
+                "timestamp": now,
+                "last_access": now,
+                "hits": 0
+            }
+            self.cache.move_to_end(key)
+            heapq.heappush(self._expiry_heap, (now + self.cache_ttl, key))
+
+            # Limit cache size (LRU)
+            while len(self.cache) > self.max_entries:
+                self._evict_lru()
+
+            self._mark_dirty()
+
     def _match_pattern(self, message: str, context: Dict) -> Optional[str]:
-        """Match message dengan pattern dan return response."""
-        msg_lower = message.lower().strip()
+        """Match message dengan intent yang yakin dan return template response."""
         author = context.get("author", "teman")
-        
-        # Greeting patterns
-        greetings = ["halo", "hello", "hi", "hai", "pagi", "siang", "sore", "malam"]
-        for greet in greetings:
-            if greet in msg_lower:
-                return random.choice(self.greeting_variations).format(name=author)
-        
-        # Game question patterns
-        game_questions = ["main apa", "game apa", "lagi main", "apa yang dimain", "maen apa"]
-        for question in game_questions:
-            if question in msg_lower:
-                game = context.get("game", "game")
-                response = random.choice(self.game_question_variations).format(game=game)
-                return response
-        
-        # Thanks patterns
-        thanks_words = ["makasih", "terima kasih", "thank", "thanks", "tq"]
-        for thank in thanks_words:
-            if thank in msg_lower:
-                return random.choice(self.thanks_variations).format(name=author)
-        
-        # Rank/tier questions
-        rank_questions = ["rank", "tier", "division", "medal"]
-        for rank_q in rank_questions:
-            if rank_q in msg_lower:
-                rank = context.get("rank", "Epic")
-                return f"Sekarang di rank {rank} nih {author}"
-        
+        templates = self.template_sets.get(context.get("lang", "id"))
+        if templates is None:
+            return None
+
+        intent, confident = self.intent_classifier.is_confident(message)
+        if not confident:
+            return None
+
+        if intent == "greeting":
+            return random.choice(templates["greeting"]).format(name=author)
+
+        if intent == "game_question":
+            game = context.get("game", "game")
+            return random.choice(templates["game_question"]).format(game=game)
+
+        if intent == "thanks":
+            return random.choice(templates["thanks"]).format(name=author)
+
+        if intent == "rank":
+            rank = context.get("rank", "Epic")
+            return random.choice(templates["rank"]).format(rank=rank, name=author)
+
         return None
-    
-    def _personalize_response(self, response: str, author: str) -> str:
+
+    def tts_templates(self, context: Dict) -> List[str]:
+        """Template balasan (masih dengan {name}) untuk pre-synthesis TTS."""
+        templates = self.template_sets.get(context.get("lang", "id"))
+        if templates is None:
+            return []
+        game = context.get("game", "game")
+        rank = context.get("rank", "Epic")
+        return (
+            list(templates["greeting"])
+            + list(templates["thanks"])
+            + [t.format(game=game) for t in templates["game_question"]]
+            + [t.format(rank=rank, name="{name}") for t in templates["rank"]]
+        )
+
+    def suffixes(self, lang: str = "id") -> List[str]:
+        """Akhiran personalisasi untuk bahasa output (ikut di-prewarm TTS)."""
+        return list(self.template_sets.get(lang, {}).get("suffixes", []))
+
+    def _personalize_response(self, response: str, author: str, lang: str = "id") -> str:
         """Personalize cached response dengan nama user."""
         # Replace placeholder dengan actual name
         placeholders = ["{name}", "[nama]", "{author}", "[user]"]
         for placeholder in placeholders:
             response = response.replace(placeholder, author)
-        
+
         # Add variation suffix sometimes (20% chance)
-        if random.random() < 0.2:
-            suffixes = [" hehe", " nih", " gan", " bro", " kak"]
-            response += random.choice(suffixes)
-        
+        suffixes = self.suffixes(lang)
+        if suffixes and random.random() < 0.2:
+            response += " " + random.choice(suffixes)
+
         return response
-    
+
     def _clean_expired(self):
         """Clean expired cache entries."""
-        current_time = time.time()
-        expired_keys = []
-        
-        for key, entry in self.cache.items():
-            if self._is_expired(entry["timestamp"]):
-                expired_keys.append(key)
-        
-        for key in expired_keys:
-            del self.cache[key]
-        
-        if expired_keys:
-            self._save_cache()
-    
+        with self._lock:
+            self._purge_expired(time.time())
+
     def _evict_lru(self):
-        """Evict least recently used entries."""
-        # Sort by timestamp (oldest first)
-        sorted_entries = sorted(
-            self.cache.items(), 
-            key=lambda x: x[1]["timestamp"]
-        )
-        
-        # Remove oldest 20%
-        remove_count = len(self.cache) // 5
-        for key, _ in sorted_entries[:remove_count]:
-            del self.cache[key]
-        
-        self._save_cache()
-    
+        """Evict least recently used entry (O(1))."""
+        if self.cache:
+            self.cache.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """Kosongkan cache beserta statistiknya."""
+        with self._lock:
+            self.cache.clear()
+            self._expiry_heap.clear()
+            self._hits = self._misses = self._pattern_hits = self._evictions = 0
+            self._mark_dirty()
+
     def get_stats(self) -> Dict:
         """Get cache statistics."""
-        total_entries = len(self.cache)
-        total_hits = sum(entry.get("hits", 0) for entry in self.cache.values())
-        
-        return {
-            "total_entries": total_entries,
-            "total_hits": total_hits,
-            "cache_size_kb": self.cache_file.stat().st_size / 1024 if self.cache_file.exists() else 0,
-            "hit_rate": total_hits / (total_entries + 1) * 100 if total_entries > 0 else 0
-        }
\ No newline at end of file
+        with self._lock:
+            total_entries = len(self.cache)
+            total_hits = self._hits
+            lookups = self._hits + self._misses
+            stats = {
+                "total_entries": total_entries,
+                "capacity": self.max_entries,
+                "total_hits": total_hits,
+                "misses": self._misses,
+                "pattern_hits": self._pattern_hits,
+                "evictions": self._evictions,
+                "hit_rate": total_hits / lookups * 100 if lookups > 0 else 0
+            }
+        stats["cache_size_kb"] = self.cache_file.stat().st_size / 1024 if self.cache_file.exists() else 0
+        return stats
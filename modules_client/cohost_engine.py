@@ -2,7 +2,7 @@
 
 import json
 import os
-from modules.tts_google import speak_with_google_cloud
+from modules_server.tts_engine import speak
 
 def respond_with_voice(prompt):
     print(f"🧠 Co-Host menjawab dengan suara: {prompt}")
@@ -19,7 +19,6 @@ def respond_with_voice(prompt):
     use_virtual_mic = config.get("virtual_mic_active", False)
     device_index = config.get("virtual_mic_device_index", None)
 
-    if use_virtual_mic and device_index is not None:
-        speak_with_google_cloud(prompt, voice, device_index=device_index, also_play_on_speaker=True)
-    else:
-        speak_with_google_cloud(prompt, voice, also_play_on_speaker=True)
+    # Lewat antrian TTS bersama (prioritas, skip, barge-in)
+    output_device = device_index if use_virtual_mic else None
+    speak(prompt, "-".join(voice.split("-")[:2]), voice, output_device=output_device)
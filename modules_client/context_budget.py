@@ -0,0 +1,158 @@
+# modules_client/context_budget.py
+"""
+Anggaran token untuk prompt CoHost.
+
+• count_tokens()      : hitung token (tiktoken kalau terinstall, kalau tidak estimasi)
+• compress_context()  : padatkan custom_context ke batas token, hasilnya
+                        deterministik supaya system prefix tetap stabil
+• ViewerSummarizer    : ringkasan rolling per penonton yang di-update
+                        incremental (dipanggil dari background thread ViewerMemory)
+• PromptBudget        : bagi budget total antara custom_context, komentar
+                        dan riwayat penonton
+
+Dependency opsional: pip install tiktoken
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENCODING = None
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Kata umum yang tidak berguna sebagai topik ringkasan
+STOPWORDS = {
+    "yang", "dan", "ini", "itu", "aku", "kamu", "gua", "gue", "lu", "lo", "kak", "bang",
+    "bro", "sih", "dong", "deh", "nih", "kok", "apa", "ada", "udah", "sudah", "lagi",
+    "mau", "bisa", "gak", "ga", "nggak", "tidak", "juga", "aja", "saja", "buat", "untuk",
+    "dari", "ke", "di", "pake", "pakai", "the", "and", "you", "what", "how", "are", "is",
+}
+
+
+def count_tokens(text: str) -> int:
+    """Jumlah token teks; pakai tokenizer asli kalau tersedia."""
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Estimasi: kata + tanda baca, kata panjang dihitung lebih dari satu token
+    return sum(1 + len(w) // 6 for w in _WORD_RE.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Potong teks per kata sampai muat di max_tokens."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    words = text.split()
+    lo, hi = 0, len(words)
+    # Binary search jumlah kata terbanyak yang masih muat
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(" ".join(words[:mid]) + "…") <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) + "…" if lo else ""
+
+
+@lru_cache(maxsize=32)
+def compress_context(text: str, max_tokens: int) -> str:
+    """
+    Padatkan custom_context: buang kalimat duplikat dan whitespace, lalu
+    ambil kalimat sesuai urutan sampai budget habis. Di-memoize supaya
+    hasil identik untuk input yang sama.
+    """
+    text = (text or "").strip()
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    seen = set()
+    kept: List[str] = []
+    used = 0
+    for sentence in _SENTENCE_RE.split(text):
+        sentence = " ".join(sentence.split())
+        key = sentence.lower().rstrip(".!?")
+        if not sentence or key in seen:
+            continue
+        seen.add(key)
+        cost = count_tokens(sentence)
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(truncate_tokens(sentence, max_tokens))
+            break
+        kept.append(sentence)
+        used += cost
+    return " ".join(kept)
+
+
+class ViewerSummarizer:
+    """
+    Ringkasan ekstraktif per penonton. State disimpan di data viewer
+    (summary_topics, summary_last) dan di-update hanya dengan interaksi
+    baru, jadi biayanya tidak tumbuh dengan panjang riwayat.
+    """
+
+    def __init__(self, max_topics: int = 20, summary_tokens: int = 60):
+        self.max_topics = max_topics
+        self.summary_tokens = summary_tokens
+
+    def update(self, viewer_data: Dict, interactions: List[Dict]) -> str:
+        topics = Counter(viewer_data.get("summary_topics", {}))
+        for interaction in interactions:
+            for word in re.findall(r"\w{3,}", interaction.get("message", "").lower()):
+                if word not in STOPWORDS and not word.isdigit():
+                    topics[word] += 1
+        viewer_data["summary_topics"] = dict(topics.most_common(self.max_topics))
+        if interactions:
+            viewer_data["summary_last"] = interactions[-1].get("message", "")
+        viewer_data["summary"] = self.render(viewer_data)
+        return viewer_data["summary"]
+
+    def render(self, viewer_data: Dict) -> str:
+        parts = [f"{viewer_data.get('status', 'new')}, {viewer_data.get('comment_count', 0)} komentar"]
+        top = [w for w, _ in Counter(viewer_data.get("summary_topics", {})).most_common(5)]
+        if top:
+            parts.append("sering bahas " + ", ".join(top))
+        last = viewer_data.get("summary_last")
+        if last:
+            parts.append(f"terakhir tanya '{truncate_tokens(last, 15)}'")
+        return truncate_tokens("; ".join(parts), self.summary_tokens)
+
+
+class PromptBudget:
+    """Pembagian budget token prompt CoHost."""
+
+    def __init__(self, total_tokens: int = 500, custom_context_tokens: int = 200,
+                 viewer_tokens: int = 120, reserved_tokens: int = 120):
+        self.total_tokens = total_tokens
+        self.custom_context_tokens = custom_context_tokens
+        self.viewer_tokens = viewer_tokens
+        # Template tetap (aturan gaya, instruksi intent)
+        self.reserved_tokens = reserved_tokens
+
+    @classmethod
+    def from_config(cls, cfg) -> "PromptBudget":
+        return cls(
+            total_tokens=cfg.get("prompt_token_budget", 500),
+            custom_context_tokens=cfg.get("custom_context_max_tokens", 200),
+            viewer_tokens=cfg.get("viewer_context_max_tokens", 120),
+        )
+
+    def fit_custom_context(self, custom_context: str) -> str:
+        return compress_context(custom_context or "", self.custom_context_tokens)
+
+    def allocate(self, custom_context: str, message: str) -> Tuple[str, int]:
+        """Return (custom_context terpadatkan, sisa budget untuk riwayat penonton)."""
+        context = self.fit_custom_context(custom_context)
+        remaining = (self.total_tokens - self.reserved_tokens
+                     - count_tokens(context) - count_tokens(message))
+        return context, max(0, min(self.viewer_tokens, remaining))
@@ -0,0 +1,298 @@
+# modules_client/failover.py
+"""
+Failover layer untuk request ke server StreamMate.
+
+• CircuitBreaker per endpoint (closed → open → half_open → closed)
+• Health probe background ke /health untuk endpoint yang sedang open,
+  sehingga server utama otomatis dipakai lagi setelah pulih
+• Hedged request: kalau endpoint utama belum menjawab setelah p95
+  latency-nya, kirim request cadangan ke endpoint berikutnya dan pakai
+  jawaban yang datang duluan
+• 429/503 dengan Retry-After (load shedding server) bukan kegagalan
+  health: endpoint hanya di-back-off sampai Retry-After lewat
+"""
+
+import time
+import threading
+import logging
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_STATUS = (429, 503)
+
+
+class EndpointBackoff(requests.exceptions.RequestException):
+    """Semua endpoint sedang back-off karena Retry-After dari server."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Header Retry-After dalam detik (format tanggal HTTP tidak dipakai server kita)."""
+    value = response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana berbasis jumlah kegagalan berturut-turut.
+
+    Setelah reset_timeout, state dilaporkan half_open sehingga endpoint
+    boleh dicoba lagi; satu kegagalan di state itu langsung membuka lagi.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            # Gagal saat half-open (percobaan setelah reset_timeout) → langsung open lagi
+            half_open = self._state == self.OPEN
+            if half_open or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.time()
+
+
+class Endpoint:
+    """Satu base URL server beserta breaker dan statistik latency-nya."""
+
+    def __init__(self, url: str, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.url = url.rstrip("/")
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.backoffs = 0
+        self._backoff_until = 0.0
+
+    def back_off(self, seconds: float):
+        self.backoffs += 1
+        self._backoff_until = max(self._backoff_until, time.time() + seconds)
+
+    def backoff_remaining(self) -> float:
+        return max(0.0, self._backoff_until - time.time())
+
+    def record_latency(self, path: str, latency: float):
+        with self._lock:
+            self._latencies[path].append(latency)
+
+    def p95(self, path: str, min_samples: int = 10) -> Optional[float]:
+        """p95 latency (detik) untuk path ini, None kalau sampel belum cukup."""
+        with self._lock:
+            samples = sorted(self._latencies.get(path, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def status(self) -> Dict:
+        with self._lock:
+            p95 = {path: None for path in self._latencies}
+        for path in p95:
+            p95[path] = self.p95(path, min_samples=1)
+        return {
+            "url": self.url,
+            "state": self.breaker.state,
+            "requests": self.requests,
+            "failures": self.failures,
+            "backoffs": self.backoffs,
+            "backoff_remaining": round(self.backoff_remaining(), 1),
+            "p95_latency": p95,
+        }
+
+
+class FailoverPool:
+    """Kumpulan endpoint berurutan prioritas dengan failover dan hedging."""
+
+    def __init__(self, urls: List[str], hedging: bool = True,
+                 default_hedge_delay: float = 1.5, min_hedge_delay: float = 0.25,
+                 probe_interval: float = 15.0, failure_threshold: int = 3,
+                 reset_timeout: float = 30.0):
+        self.endpoints = [Endpoint(u, failure_threshold, reset_timeout) for u in urls]
+        self.hedging = hedging
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.probe_interval = probe_interval
+        self.hedged_requests = 0
+        self._active = self.endpoints[0] if self.endpoints else None
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-failover")
+        self._stop = threading.Event()
+        self._probe_thread = None
+
+    # ─── Endpoint selection ─────────────────────────────────────────
+    @property
+    def active_url(self) -> str:
+        return self._active.url if self._active else ""
+
+    def active_p95(self, path: str) -> Optional[float]:
+        return self._active.p95(path) if self._active else None
+
+    def all_open(self) -> bool:
+        """True kalau semua endpoint sedang dianggap down."""
+        return all(ep.breaker.state == CircuitBreaker.OPEN for ep in self.endpoints)
+
+    def _candidates(self) -> List[Endpoint]:
+        # Endpoint yang minta back-off (Retry-After) tidak dikirimi request dulu
+        endpoints = [ep for ep in self.endpoints if not ep.backoff_remaining()]
+        if not endpoints:
+            wait_for = min(ep.backoff_remaining() for ep in self.endpoints)
+            raise EndpointBackoff(f"Server sibuk, coba lagi dalam {wait_for:.0f}s", wait_for)
+        # Urutan prioritas tetap; yang breaker-nya open dilewati
+        available = [ep for ep in endpoints if ep.breaker.state != CircuitBreaker.OPEN]
+        # Semua open → tetap coba semuanya daripada gagal tanpa mencoba
+        return available or endpoints
+
+    def _hedge_delay(self, endpoint: Endpoint, path: str, timeout: float) -> float:
+        p95 = endpoint.p95(path)
+        delay = p95 if p95 is not None else self.default_hedge_delay
+        return min(max(delay, self.min_hedge_delay), timeout)
+
+    # ─── Request ────────────────────────────────────────────────────
+    def _send(self, endpoint: Endpoint, path: str, data: dict, timeout: float) -> requests.Response:
+        endpoint.requests += 1
+        start = time.time()
+        try:
+            response = requests.post(f"{endpoint.url}/{path}", json=data, timeout=timeout)
+            retry_after = _retry_after(response) if response.status_code in BACKOFF_STATUS else None
+            if response.status_code >= 500 and retry_after is None:
+                response.raise_for_status()
+        except (requests.exceptions.HTTPError,
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout):
+            endpoint.failures += 1
+            endpoint.breaker.record_failure()
+            raise
+
+        # 4xx berarti server hidup; error-nya urusan caller
+        endpoint.breaker.record_success()
+        if retry_after is not None:
+            # Load shedding: server hidup tapi minta menunggu → back-off, bukan failure
+            endpoint.back_off(retry_after)
+            logger.info(f"{endpoint.url} {response.status_code}, back-off {retry_after:.0f}s")
+        else:
+            endpoint.record_latency(path, time.time() - start)
+        response.raise_for_status()
+        return response
+
+    def post(self, path: str, data: dict, timeout: float = 10) -> requests.Response:
+        """POST ke endpoint terbaik dengan failover dan hedging."""
+        queue = self._candidates()
+        primary = queue.pop(0)
+        pending = {self._executor.submit(self._send, primary, path, data, timeout): primary}
+        last_error: Optional[Exception] = None
+
+        while pending:
+            delay = None
+            if self.hedging and queue:
+                delay = self._hedge_delay(primary, path, timeout)
+
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                # Primary lambat → kirim request cadangan
+                backup = queue.pop(0)
+                self.hedged_requests += 1
+                logger.info(f"Hedging {path}: {primary.url} > {delay:.2f}s, kirim ke {backup.url}")
+                pending[self._executor.submit(self._send, backup, path, data, timeout)] = backup
+                continue
+
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    response = future.result()
+                except requests.exceptions.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else 500
+                    # 4xx dan load shedding (Retry-After) diteruskan ke caller, tanpa failover
+                    if status < 500 or _retry_after(e.response) is not None:
+                        raise
+                    last_error = e
+                    continue
+                except Exception as e:
+                    last_error = e
+                    continue
+
+                if endpoint is not self._active:
+                    logger.warning(f"Server aktif berpindah ke {endpoint.url}")
+                    self._active = endpoint
+                return response
+
+            # Semua request yang jalan gagal → failover ke endpoint berikutnya
+            if not pending and queue:
+                primary = queue.pop(0)
+                pending[self._executor.submit(self._send, primary, path, data, timeout)] = primary
+
+        raise last_error or requests.exceptions.ConnectionError("Tidak ada server yang tersedia")
+
+    # ─── Health probes ──────────────────────────────────────────────
+    def probe(self, endpoint: Endpoint, timeout: float = 3.0) -> bool:
+        try:
+            resp = requests.get(f"{endpoint.url}/health", timeout=timeout)
+            healthy = resp.status_code == 200
+        except Exception:
+            healthy = False
+
+        if healthy:
+            endpoint.breaker.record_success()
+        else:
+            endpoint.breaker.record_failure()
+        return healthy
+
+    def _probe_loop(self):
+        while not self._stop.wait(self.probe_interval):
+            for endpoint in self.endpoints:
+                if endpoint.breaker.state == CircuitBreaker.CLOSED:
+                    continue
+                if self.probe(endpoint):
+                    logger.info(f"Server {endpoint.url} pulih, circuit ditutup")
+
+            # Kembali ke endpoint prioritas tertinggi yang sehat
+            for endpoint in self.endpoints:
+                if endpoint.breaker.state == CircuitBreaker.CLOSED:
+                    self._active = endpoint
+                    break
+
+    def start_probes(self):
+        if self._probe_thread is None and len(self.endpoints) > 0:
+            self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self._probe_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict:
+        return {
+            "active": self.active_url,
+            "hedged_requests": self.hedged_requests,
+            "endpoints": [ep.status() for ep in self.endpoints],
+        }
@@ -0,0 +1,341 @@
+# modules_client/intent_classifier.py
+"""
+Klasifikasi intent komentar penonton yang cepat (mikrodetik).
+
+Dipakai bersama oleh prompt builder di ReplyThread dan template fast path
+di CacheManager, supaya keduanya sepakat soal "komentar ini tentang apa".
+
+Dua lapis:
+  1. Pattern matcher: regex per intent yang di-compile sekali, skor
+     noisy-or dari bobot keyword yang cocok.
+  2. (Opsional) model TF-IDF char n-gram + centroid (linear) yang dilatih
+     dari reply log. Dipakai kalau pattern matcher tidak yakin, sehingga
+     typo/variasi ejaan ("mkasih", "hallo") tetap terklasifikasi.
+
+Contoh:
+    from modules_client.intent_classifier import get_intent_classifier
+
+    intent, confidence = get_intent_classifier().classify("halo bang apa kabar")
+"""
+
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+GENERAL = "general"
+
+# Bobot: frasa spesifik ~1.0, kata umum lebih rendah.
+# Keyword berakhiran "*" dicocokkan sebagai prefix (mis. "makan*" → "makanan").
+DEFAULT_RULES: Dict[str, Dict[str, float]] = {
+    "greeting": {
+        "apa kabar": 1.0, "assalamualaikum": 1.0, "halo": 0.8, "hallo": 0.8,
+        "hello": 0.8, "hai": 0.8, "hi": 0.7, "kabar": 0.7, "pagi": 0.5,
+        "siang": 0.5, "sore": 0.5, "malam": 0.5, "gimana": 0.3,
+    },
+    "eating": {
+        "udah makan": 1.0, "belum makan": 1.0, "makan*": 0.8,
+    },
+    "gaming_build": {
+        "build": 0.9, "item": 0.8, "gear": 0.8, "equipment": 0.8, "emblem": 0.7,
+    },
+    "game_question": {
+        "main apa": 1.0, "game apa": 1.0, "apa yang dimain": 1.0, "maen apa": 1.0,
+        "lagi main": 1.0,
+    },
+    "gaming_play": {
+        "mabar": 0.9, "push": 0.6, "main": 0.5, "game": 0.5,
+    },
+    "rank": {
+        "rank*": 0.9, "tier": 0.8, "division": 0.8, "medal": 0.8,
+    },
+    "thanks": {
+        "terima kasih": 1.0, "makasih": 1.0, "thank*": 0.9, "tq": 0.7,
+    },
+    "khodam": {
+        "cek khodam": 1.0, "khodam*": 1.0, "cek": 0.4,
+    },
+}
+
+# Urutan prioritas saat skor seri (mengikuti urutan if/elif lama di ReplyThread)
+_PRIORITY = list(DEFAULT_RULES.keys())
+
+
+def _normalize(text: str) -> str:
+    """Lowercase + buang karakter non-alfanumerik."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _compile_keywords(keywords: Iterable[str]) -> "re.Pattern":
+    parts = []
+    # Frasa terpanjang dulu supaya "apa kabar" menang atas "kabar"
+    for kw in sorted(keywords, key=len, reverse=True):
+        if kw.endswith("*"):
+            parts.append(r"\b" + re.escape(kw[:-1]) + r"\w*")
+        else:
+            parts.append(r"\b" + re.escape(kw) + r"\b")
+    return re.compile("|".join(parts))
+
+
+class PatternMatcher:
+    """Satu regex gabungan untuk semua intent dengan skor noisy-or."""
+
+    def __init__(self, rules: Dict[str, Dict[str, float]]):
+        self.rules = rules
+        # keyword → [(intent, bobot)]; keyword yang sama boleh milik beberapa intent
+        self._exact: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        self._prefixes: List[Tuple[str, str, float]] = []
+        keywords = set()
+        for intent, intent_keywords in rules.items():
+            for kw, w in intent_keywords.items():
+                keywords.add(kw)
+                if kw.endswith("*"):
+                    self._prefixes.append((kw[:-1], intent, float(w)))
+                else:
+                    self._exact[kw].append((intent, float(w)))
+        # Prefix terpanjang dulu supaya lookup prefix paling spesifik
+        self._prefixes.sort(key=lambda x: len(x[0]), reverse=True)
+        self._pattern = _compile_keywords(keywords) if keywords else None
+
+    def _lookup(self, token: str) -> List[Tuple[str, float]]:
+        if token in self._exact:
+            return self._exact[token]
+        return [(intent, w) for prefix, intent, w in self._prefixes if token.startswith(prefix)]
+
+    def scores(self, normalized: str) -> Dict[str, float]:
+        """Skor per intent di rentang 0..1."""
+        if self._pattern is None:
+            return {}
+        miss: Dict[str, float] = {}
+        for token in set(self._pattern.findall(normalized)):
+            for intent, w in self._lookup(token):
+                miss[intent] = miss.get(intent, 1.0) * (1.0 - min(w, 0.99))
+        return {intent: 1.0 - m for intent, m in miss.items()}
+
+    def classify(self, normalized: str) -> Tuple[str, float]:
+        scores = self.scores(normalized)
+        if not scores:
+            return GENERAL, 1.0
+        ranked = sorted(
+            scores.items(),
+            key=lambda x: (-x[1], _PRIORITY.index(x[0]) if x[0] in _PRIORITY else len(_PRIORITY))
+        )
+        best_intent, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # Turunkan confidence kalau ada intent lain yang juga kuat
+        return best_intent, best * (1.0 - 0.5 * runner_up)
+
+
+class TfidfIntentModel:
+    """Model TF-IDF char n-gram + centroid per intent (cosine similarity)."""
+
+    def __init__(self, ngram: int = 3):
+        self.ngram = ngram
+        self.idf: Dict[str, float] = {}
+        self.centroids: Dict[str, Dict[str, float]] = {}
+
+    def _features(self, normalized: str) -> Counter:
+        grams = Counter()
+        n = self.ngram
+        for word in normalized.split():
+            padded = f" {word} "
+            if len(padded) <= n:
+                grams[padded] += 1
+                continue
+            for i in range(len(padded) - n + 1):
+                grams[padded[i:i + n]] += 1
+        return grams
+
+    def _vectorize(self, normalized: str) -> Dict[str, float]:
+        grams = self._features(normalized)
+        vec = {g: (1.0 + math.log(c)) * self.idf[g] for g, c in grams.items() if g in self.idf}
+        norm = math.sqrt(sum(v * v for v in vec.values()))
+        if norm == 0:
+            return {}
+        return {g: v / norm for g, v in vec.items()}
+
+    def is_trained(self) -> bool:
+        return bool(self.centroids)
+
+    def train(self, samples: List[Tuple[str, str]]) -> int:
+        """Latih dari list (text, intent). Return jumlah sample terpakai."""
+        docs = [(self._features(_normalize(text)), intent) for text, intent in samples]
+        docs = [(grams, intent) for grams, intent in docs if grams]
+        if not docs:
+            return 0
+
+        df = Counter()
+        for grams, _ in docs:
+            df.update(grams.keys())
+        total = len(docs)
+        self.idf = {g: math.log((1 + total) / (1 + c)) + 1.0 for g, c in df.items()}
+
+        sums: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for grams, intent in docs:
+            vec = {g: (1.0 + math.log(c)) * self.idf[g] for g, c in grams.items()}
+            norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+            for g, v in vec.items():
+                sums[intent][g] += v / norm
+
+        self.centroids = {}
+        for intent, vec in sums.items():
+            norm = math.sqrt(sum(v * v for v in vec.values())) or 1.0
+            self.centroids[intent] = {g: v / norm for g, v in vec.items()}
+        return total
+
+    def predict(self, normalized: str) -> Tuple[str, float]:
+        vec = self._vectorize(normalized)
+        if not vec or not self.centroids:
+            return GENERAL, 0.0
+        best_intent, best = GENERAL, 0.0
+        for intent, centroid in self.centroids.items():
+            score = sum(v * centroid.get(g, 0.0) for g, v in vec.items())
+            if score > best:
+                best_intent, best = intent, score
+        return best_intent, best
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "ngram": self.ngram,
+            "idf": self.idf,
+            "centroids": self.centroids,
+        }, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["TfidfIntentModel"]:
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            model = cls(ngram=data.get("ngram", 3))
+            model.idf = data.get("idf", {})
+            model.centroids = data.get("centroids", {})
+            return model
+        except Exception as e:
+            print(f"[ERROR] Load intent model gagal: {e}")
+            return None
+
+
+class IntentClassifier:
+    """Gabungan pattern matcher + model TF-IDF opsional."""
+
+    def __init__(self, extra_rules: Optional[Dict[str, Dict[str, float]]] = None,
+                 min_confidence: float = 0.6, use_model: bool = True,
+                 model_path: str = "temp/intent_model.json",
+                 model_min_similarity: float = 0.35):
+        rules = {intent: dict(keywords) for intent, keywords in DEFAULT_RULES.items()}
+        for intent, keywords in (extra_rules or {}).items():
+            # Keyword per-stream boleh berupa list (bobot default) atau dict
+            if isinstance(keywords, list):
+                keywords = {kw: 0.8 for kw in keywords}
+            rules.setdefault(intent, {}).update(
+                {str(kw).lower(): float(w) for kw, w in keywords.items()}
+            )
+
+        self.matcher = PatternMatcher(rules)
+        self.min_confidence = min_confidence
+        self.use_model = use_model
+        self.model_path = Path(model_path)
+        self.model_min_similarity = model_min_similarity
+        self.model = TfidfIntentModel.load(self.model_path) if use_model else None
+
+    def classify(self, message: str) -> Tuple[str, float]:
+        """Return (intent, confidence 0..1)."""
+        normalized = _normalize(message)
+        intent, confidence = self.matcher.classify(normalized)
+        if intent != GENERAL and confidence >= self.min_confidence:
+            return intent, confidence
+
+        if self.model is not None and self.model.is_trained():
+            model_intent, similarity = self.model.predict(normalized)
+            if model_intent != GENERAL and similarity >= self.model_min_similarity:
+                if model_intent == intent:
+                    # Dua lapis setuju → naikkan confidence
+                    return intent, 1.0 - (1.0 - confidence) * (1.0 - similarity)
+                if intent == GENERAL or similarity > confidence:
+                    return model_intent, similarity
+
+        return intent, confidence
+
+    def is_confident(self, message: str) -> Tuple[str, bool]:
+        """Helper untuk fast path: (intent, confidence >= min_confidence)."""
+        intent, confidence = self.classify(message)
+        return intent, intent != GENERAL and confidence >= self.min_confidence
+
+    def train_from_logs(self, log_paths: Iterable[str] = ("temp/cohost_log.txt",),
+                        samples_path: str = "config/intent_samples.jsonl") -> int:
+        """
+        Latih model TF-IDF dari reply log.
+
+        Reply log tidak punya label, jadi komentar yang diklasifikasi dengan
+        yakin oleh pattern matcher dipakai sebagai pseudo-label. Label manual
+        bisa ditambahkan di intent_samples.jsonl ({"text": ..., "intent": ...}).
+        """
+        samples: List[Tuple[str, str]] = []
+
+        for log_path in log_paths:
+            path = Path(log_path)
+            if not path.exists():
+                continue
+            for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+                parts = line.split("\t")
+                if len(parts) < 2 or not parts[1].strip():
+                    continue
+                message = parts[1]
+                intent, confidence = self.matcher.classify(_normalize(message))
+                # Komentar tanpa keyword sama sekali jadi contoh kelas "general"
+                if confidence >= self.min_confidence:
+                    samples.append((message, intent))
+
+        labeled = Path(samples_path)
+        if labeled.exists():
+            for line in labeled.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                    samples.append((entry["text"], entry["intent"]))
+                except Exception:
+                    continue
+
+        model = TfidfIntentModel()
+        trained = model.train(samples)
+        if trained:
+            model.save(self.model_path)
+            self.model = model
+        return trained
+
+
+# ─── Shared instance ─────────────────────────────────────────────────
+_classifier: Optional[IntentClassifier] = None
+_classifier_key = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier(cfg=None) -> IntentClassifier:
+    """
+    Instance bersama untuk stream aktif.
+
+    Konfigurasi per-stream dibaca dari settings:
+      intent_rules          : {"intent": ["keyword", ...] | {"keyword": bobot}}
+      intent_min_confidence : ambang confidence (default 0.6)
+      intent_use_model      : pakai model TF-IDF (default True)
+    Instance dibuat ulang hanya kalau konfigurasi berubah.
+    """
+    global _classifier, _classifier_key
+
+    rules, min_conf, use_model = {}, 0.6, True
+    if cfg is not None:
+        rules = cfg.get("intent_rules", {}) or {}
+        min_conf = float(cfg.get("intent_min_confidence", 0.6))
+        use_model = bool(cfg.get("intent_use_model", True))
+
+    key = (json.dumps(rules, sort_keys=True), min_conf, use_model)
+    with _classifier_lock:
+        if _classifier is None or (cfg is not None and key != _classifier_key):
+            _classifier = IntentClassifier(rules, min_confidence=min_conf, use_model=use_model)
+            _classifier_key = key
+        return _classifier
@@ -0,0 +1,207 @@
+# modules_client/local_llm.py
+"""
+Backend LLM lokal (CPU) sebagai fallback generate_reply.
+
+Model instruct kecil terkuantisasi (GGUF, mis. Qwen2.5-0.5B-Instruct Q4_K_M)
+dijalankan lewat llama-cpp-python di worker process terpisah. Model di-load
+sekali saat start, di-warm-up dengan satu inference pendek, lalu tetap
+resident sehingga balasan pendek (sapaan, terima kasih) bisa dijawab lokal
+dalam < 1 detik tanpa menunggu server.
+
+Dependency opsional: pip install llama-cpp-python
+"""
+
+import time
+import threading
+import importlib.util
+import multiprocessing as mp
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+DEFAULT_MODEL = "models/qwen2.5-0.5b-instruct-q4_k_m.gguf"
+
+
+def _worker_main(conn, model_path: str, n_threads: int, n_ctx: int):
+    """Entry point worker process: load model sekali, layani request via pipe."""
+    try:
+        from llama_cpp import Llama
+
+        start = time.time()
+        llm = Llama(model_path=model_path, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        # Warm-up supaya request pertama tidak menanggung alokasi/cache awal
+        llm.create_chat_completion(messages=[{"role": "user", "content": "halo"}], max_tokens=1)
+        conn.send(("ready", time.time() - start))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+
+        request_id, messages, max_tokens, temperature = msg
+        try:
+            out = llm.create_chat_completion(
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+            text = out["choices"][0]["message"]["content"].strip()
+            conn.send((request_id, text, None))
+        except Exception as e:
+            conn.send((request_id, None, str(e)))
+
+
+class LocalLLM:
+    """Facade untuk worker process LLM lokal."""
+
+    def __init__(self, model_path: str = DEFAULT_MODEL, n_threads: int = 4,
+                 n_ctx: int = 2048, max_tokens: int = 60, timeout: float = 5.0):
+        self.model_path = Path(model_path)
+        self.n_threads = n_threads
+        self.n_ctx = n_ctx
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+        self._proc = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._request_id = 0
+        self._latencies = deque(maxlen=50)
+        self.load_time = None
+        self.last_error = None
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, cfg) -> "LocalLLM":
+        return cls(
+            model_path=cfg.get("local_llm_model", DEFAULT_MODEL),
+            n_threads=cfg.get("local_llm_threads", 4),
+            max_tokens=cfg.get("local_llm_max_tokens", 60),
+            timeout=cfg.get("local_llm_timeout", 5.0),
+        )
+
+    def is_available(self) -> bool:
+        """Model ada di disk dan llama-cpp-python terinstall."""
+        return self.model_path.exists() and importlib.util.find_spec("llama_cpp") is not None
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set() and self._proc is not None and self._proc.is_alive()
+
+    def start(self) -> bool:
+        """Spawn worker dan load model di background. Return False kalau tidak tersedia."""
+        if self._proc is not None:
+            return True
+        if not self.is_available():
+            logger.info(f"Local LLM tidak tersedia (model: {self.model_path})")
+            return False
+
+        parent_conn, child_conn = mp.Pipe()
+        self._conn = parent_conn
+        self._proc = mp.Process(
+            target=_worker_main,
+            args=(child_conn, str(self.model_path), self.n_threads, self.n_ctx),
+            daemon=True,
+        )
+        self._proc.start()
+        threading.Thread(target=self._wait_ready, daemon=True).start()
+        return True
+
+    def _wait_ready(self):
+        with self._lock:
+            try:
+                status, value = self._conn.recv()
+            except (EOFError, OSError) as e:
+                status, value = "error", str(e)
+        if status == "ready":
+            self.load_time = value
+            self._ready.set()
+            logger.info(f"Local LLM siap ({value:.1f}s load + warm-up)")
+        else:
+            self.last_error = value
+            logger.error(f"Local LLM gagal load: {value}")
+
+    def generate(self, prompt: str, max_tokens: int = None, temperature: float = 0.8,
+                 system: str = None) -> Optional[str]:
+        """Generate balasan lokal; None kalau belum siap, timeout atau error."""
+        if not self.is_ready():
+            return None
+
+        messages = [{"role": "user", "content": prompt}]
+        if system:
+            messages.insert(0, {"role": "system", "content": system})
+
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+            start = time.time()
+            try:
+                self._conn.send((request_id, messages, max_tokens or self.max_tokens, temperature))
+                if not self._conn.poll(self.timeout):
+                    # Worker masih men-generate request ini: kalau dibiarkan, request
+                    # berikutnya antre di belakangnya dan ikut timeout → ganti worker
+                    self._restart("timeout")
+                    return None
+                _, text, error = self._conn.recv()
+            except (EOFError, OSError) as e:
+                self._restart(f"worker mati: {e!r}")
+                return None
+
+        if error:
+            self.last_error = error
+            return None
+        self._latencies.append(time.time() - start)
+        return text
+
+    def p95(self) -> Optional[float]:
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def _restart(self, error: str):
+        """Matikan worker (dipanggil dengan _lock dipegang) lalu spawn ulang, model di-load di background."""
+        self.last_error = error
+        self.restarts += 1
+        logger.warning(f"Local LLM: {error}, worker di-restart")
+        self._ready.clear()
+        proc, self._proc = self._proc, None
+        if proc is not None:
+            proc.terminate()
+            proc.join(timeout=2)
+        self._conn = None
+        self.start()
+
+    def stop(self):
+        self._ready.clear()
+        if self._proc is None:
+            return
+        try:
+            self._conn.send(None)
+        except Exception:
+            pass
+        self._proc.join(timeout=2)
+        if self._proc.is_alive():
+            self._proc.terminate()
+        self._proc = None
+        self._conn = None
+
+    def status(self) -> dict:
+        return {
+            "available": self.is_available(),
+            "ready": self.is_ready(),
+            "model": str(self.model_path),
+            "load_time": self.load_time,
+            "p95_latency": self.p95(),
+            "restarts": self.restarts,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,89 @@
+# modules_client/prompt_templates.py
+"""
+Template prompt CoHost yang dipisah jadi dua bagian:
+
+  • system prefix  : persona + custom_context + aturan gaya. Stabil selama
+                     stream, jadi provider bisa memakai prefix/context cache
+                     (DeepSeek, OpenAI) dan time-to-first-token turun.
+  • user suffix    : komentar penonton + instruksi singkat per intent.
+
+Prefix di-memoize supaya string-nya identik byte-per-byte antar komentar
+(syarat agar cache provider kena).
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from modules_client.context_budget import count_tokens
+
+# Instruksi tambahan per kategori pertanyaan (ReplyThread basic)
+INTENT_INSTRUCTIONS = {
+    "greeting": "Sapa {author} dengan ramah dan ceritakan sedikit aktivitas streaming saat ini.",
+    "eating": "Jawab soal makan dengan santai.",
+    "gaming_build": "Beri saran build/item yang bagus, singkat dan berguna.",
+    "gaming_play": "Ceritakan game yang sedang dimainkan (hero, strategi, atau kondisi match).",
+    "khodam": "Jawab soal khodam sesuai informasi yang kamu punya dan karaktermu.",
+    "general": "Jawab dengan informatif dan relevan, pakai informasi tentang dirimu.",
+}
+
+INTENT_EXAMPLES = {
+    "greeting": "Contoh: '{author} hai juga! Lagi asik main Mobile Legends nih pake Gatot'",
+    "eating": "Contoh: '{author} udah makan tadi, sekarang lagi fokus push rank'",
+}
+
+
+def messages_tokens(messages: List[Dict]) -> int:
+    """Token prompt chat; estimator yang sama dengan PromptBudget (+4 overhead per pesan)."""
+    return sum(count_tokens(m.get("content", "")) + 4 for m in messages)
+
+
+@lru_cache(maxsize=16)
+def basic_system_prefix(custom_context: str, lang_label: str) -> str:
+    """Prefix stabil untuk CoHost Basic."""
+    return (
+        "Kamu adalah streamer yang sedang live streaming. "
+        f"Nama kamu dan informasi penting: {custom_context}. "
+        "Aturan jawaban: awali dengan menyebut nama penonton; "
+        f"jawab dalam {lang_label} maksimal 2 kalimat pendek; "
+        "gaya santai seperti streamer Indonesia; tanpa emoji atau tanda baca berlebihan; "
+        "harus relevan dengan pertanyaan."
+    )
+
+
+def basic_reply_messages(author: str, message: str, question_type: str,
+                         custom_context: str, lang_label: str,
+                         viewer_context: str = "") -> Tuple[str, str]:
+    """Return (system, user) untuk ReplyThread basic."""
+    system = basic_system_prefix(custom_context, lang_label)
+    instruction = INTENT_INSTRUCTIONS.get(question_type, INTENT_INSTRUCTIONS["general"])
+    user = f"Penonton {author} bertanya: '{message}'. {instruction.format(author=author)}"
+    if viewer_context:
+        # Riwayat di user message (bukan system) supaya prefix tetap stabil
+        user = f"Riwayat {author}: {viewer_context}. " + user
+    example = INTENT_EXAMPLES.get(question_type)
+    if example:
+        user += " " + example.format(author=author)
+    return system, user
+
+
+@lru_cache(maxsize=16)
+def pro_system_prefix(cohost_name: str, personality: str, streamer_name: str,
+                      lang_out: str, custom_context: str) -> str:
+    """Prefix stabil untuk CoHost Pro."""
+    prefix = (
+        f"Kamu adalah AI Co-Host {cohost_name} dengan kepribadian {personality}, "
+        f"siaran bersama streamer {streamer_name}. "
+        f"Balas penonton dalam bahasa {lang_out.lower()} "
+        "tanpa tanda baca, tanpa emoji, tanpa huruf tebal, sebut nama penanya."
+    )
+    if custom_context:
+        prefix += f" {custom_context}"
+    return prefix
+
+
+def pro_reply_messages(author: str, message: str, cohost_name: str, personality: str,
+                       streamer_name: str, lang_out: str, custom_context: str) -> Tuple[str, str]:
+    """Return (system, user) untuk ReplyThread pro."""
+    system = pro_system_prefix(cohost_name, personality, streamer_name, lang_out, custom_context)
+    user = f"Komentar penonton ({author}): \"{message}\""
+    return system, user
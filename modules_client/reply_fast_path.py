@@ -0,0 +1,126 @@
+# modules_client/reply_fast_path.py
+"""
+Fast path balasan CoHost tanpa memanggil LLM.
+
+Kalau intent komentar yakin (greeting, thanks, game_question, rank) dan
+CacheManager punya template atau balasan cache, balasan dibuat lokal dan
+langsung ke TTS. Supaya CoHost tidak terdengar seperti robot:
+
+  • fast_path_ratio          : peluang fast path dipakai (sisanya tetap LLM)
+  • fast_path_max_streak     : maksimal fast path berturut-turut
+  • fast_path_viewer_limit   : maksimal fast path per penonton per window
+  • fast_path_viewer_window  : panjang window (detik)
+
+Balasan LLM untuk intent yang sama disimpan ke cache (nama penonton
+diganti placeholder) sehingga variasinya ikut bertambah seiring stream.
+"""
+
+import re
+import time
+import random
+import threading
+from collections import defaultdict, deque
+from typing import Dict, Optional
+
+from modules_client.intent_classifier import get_intent_classifier
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+FAST_INTENTS = ("greeting", "thanks", "game_question", "rank")
+
+
+class ReplyFastPath:
+    """Stage sebelum ReplyThread: jawab dari template/cache bila memungkinkan."""
+
+    def __init__(self, cache_manager, intent_classifier=None, ratio: float = 0.7,
+                 max_streak: int = 3, viewer_limit: int = 2, viewer_window: float = 300.0,
+                 intents=FAST_INTENTS):
+        self.cache_manager = cache_manager
+        self.intent_classifier = intent_classifier or get_intent_classifier()
+        self.ratio = ratio
+        self.max_streak = max_streak
+        self.viewer_limit = viewer_limit
+        self.viewer_window = viewer_window
+        self.intents = set(intents)
+
+        self._lock = threading.Lock()
+        self._streak = 0
+        self._viewer_hits: Dict[str, deque] = defaultdict(deque)
+        self._recent_replies = deque(maxlen=5)
+        self.fast_replies = 0
+        self.llm_replies = 0
+
+    @classmethod
+    def from_config(cls, cfg, cache_manager) -> "ReplyFastPath":
+        return cls(
+            cache_manager,
+            intent_classifier=get_intent_classifier(cfg),
+            ratio=cfg.get("fast_path_ratio", 0.7),
+            max_streak=cfg.get("fast_path_max_streak", 3),
+            viewer_limit=cfg.get("fast_path_viewer_limit", 2),
+            viewer_window=cfg.get("fast_path_viewer_window", 300),
+        )
+
+    def _viewer_allowed(self, author: str, now: float) -> bool:
+        hits = self._viewer_hits[author]
+        while hits and now - hits[0] > self.viewer_window:
+            hits.popleft()
+        return len(hits) < self.viewer_limit
+
+    def try_reply(self, author: str, message: str, context: Dict = None) -> Optional[str]:
+        """Balasan lokal, atau None kalau harus lewat LLM."""
+        if self.ratio <= 0:
+            return None
+
+        intent, confident = self.intent_classifier.is_confident(message)
+        if not confident or intent not in self.intents:
+            return None
+
+        now = time.time()
+        with self._lock:
+            if self._streak >= self.max_streak or not self._viewer_allowed(author, now):
+                return None
+            if random.random() >= self.ratio:
+                return None
+
+        context = dict(context or {}, author=author)
+        reply = self.cache_manager.get_cached_response(message, context)
+        # Hindari kalimat yang persis sama dengan balasan barusan
+        if reply and reply in self._recent_replies:
+            reply = self.cache_manager.get_cached_response(message, context)
+        if not reply or reply in self._recent_replies:
+            return None
+
+        with self._lock:
+            self._streak += 1
+            self._viewer_hits[author].append(now)
+            self._recent_replies.append(reply)
+            self.fast_replies += 1
+        logger.debug(f"Fast path ({intent}) untuk {author}: {reply}")
+        return reply
+
+    def note_llm_turn(self):
+        """Komentar ini dijawab LLM → streak fast path putus."""
+        with self._lock:
+            self._streak = 0
+            self.llm_replies += 1
+
+    def record_llm_reply(self, author: str, message: str, reply: str, context: Dict = None):
+        """Simpan balasan LLM yang sukses ke cache kalau intent-nya termasuk fast path."""
+        if not reply or not author:
+            return
+        with self._lock:
+            self._recent_replies.append(reply)
+        intent, confident = self.intent_classifier.is_confident(message)
+        if confident and intent in self.intents:
+            template = re.sub(re.escape(author), "{name}", reply, flags=re.IGNORECASE)
+            self.cache_manager.cache_response(message, template, dict(context or {}, author=author))
+
+    def get_stats(self) -> Dict:
+        total = self.fast_replies + self.llm_replies
+        return {
+            "fast_replies": self.fast_replies,
+            "llm_replies": self.llm_replies,
+            "fast_ratio": self.fast_replies / total * 100 if total else 0,
+        }
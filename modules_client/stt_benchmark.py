@@ -0,0 +1,442 @@
+# modules_client/stt_benchmark.py
+"""
+Benchmark engine STT untuk memilih model per kelas mesin.
+
+Corpus berupa folder per bahasa berisi klip rekaman + transkrip referensi:
+
+    benchmarks/stt/id/sapaan_01.wav   benchmarks/stt/id/sapaan_01.txt
+    benchmarks/stt/en/greeting_01.wav benchmarks/stt/en/greeting_01.txt
+
+Setiap klip dijalankan lewat setiap backend yang tersedia:
+  • whisper : whisper.cpp server (model resident), satu run per model
+              ggml-*.bin di thirdparty/whisper_bin (tiny/base/small/medium,
+              termasuk varian kuantisasi mis. ggml-small-q5_1.bin)
+  • cli     : main.exe per klip (jalur lama, model di-load tiap ucapan)
+  • google  : Google Speech-to-Text batch, kalau kredensial tersedia
+
+Dilaporkan per backend/model/bahasa: WER, latency p50/p95, real-time
+factor (waktu transkrip / durasi audio), waktu load model dan peak RSS
+proses yang memegang model (butuh psutil). Hasil lengkap + info mesin
+ditulis ke logs/stt_benchmark.json.
+
+Pemakaian:
+    python -m modules_client.stt_benchmark --corpus benchmarks/stt --max-wer 0.2
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+import importlib.util
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from modules_client.whisper_server import WHISPER_BIN, SAMPLE_RATE, WhisperServer, load_pcm_16k
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+DEFAULT_OUTPUT = Path("logs/stt_benchmark.json")
+MODEL_SIZES = ("tiny", "base", "small", "medium", "large")
+CLI_NAMES = ("main.exe", "whisper-cli.exe", "main", "whisper-cli")
+
+# Folder bahasa corpus → kode whisper / kode NLLB untuk translate_stt
+WHISPER_LANG = {"id": "id", "en": "en"}
+NLLB_LANG = {"id": "ind_Latn", "en": "eng_Latn"}
+
+
+# ─── WER ────────────────────────────────────────────────────────────
+def normalize_text(text: str) -> List[str]:
+    """Lowercase, buang tag [..] whisper dan tanda baca → daftar kata."""
+    text = re.sub(r"\[.*?\]", " ", text or "").lower()
+    return re.sub(r"[^\w\s']", " ", text).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> Tuple[int, int]:
+    """Jumlah edit (substitusi + hapus + sisip) tingkat kata dan panjang referensi."""
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+
+def wer(reference: str, hypothesis: str) -> float:
+    edits, n = word_errors(reference, hypothesis)
+    return edits / n if n else float(bool(normalize_text(hypothesis)))
+
+
+# ─── Corpus ─────────────────────────────────────────────────────────
+class Clip:
+    def __init__(self, path: Path, lang: str, reference: str):
+        self.path = path
+        self.lang = lang
+        self.reference = reference
+        self.pcm = load_pcm_16k(path)
+        self.seconds = len(self.pcm) / SAMPLE_RATE
+
+
+def load_corpus(root: Path, langs: Iterable[str] = None) -> List[Clip]:
+    """Klip <root>/<lang>/*.wav yang punya transkrip .txt di sebelahnya."""
+    clips = []
+    for lang_dir in sorted(Path(root).iterdir()):
+        if not lang_dir.is_dir() or (langs and lang_dir.name not in langs):
+            continue
+        for wav in sorted(lang_dir.glob("*.wav")):
+            ref = wav.with_suffix(".txt")
+            if not ref.exists():
+                logger.warning(f"Benchmark: {wav.name} tanpa transkrip referensi, dilewati")
+                continue
+            clips.append(Clip(wav, lang_dir.name, ref.read_text(encoding="utf-8").strip()))
+    return clips
+
+
+def discover_models(bin_dir: Path = None) -> List[Path]:
+    """ggml-*.bin urut ukuran model (tiny → large), varian kuantisasi setelah versi penuh."""
+    def key(path: Path):
+        name = path.stem[len("ggml-"):]
+        size = next((i for i, s in enumerate(MODEL_SIZES) if name.startswith(s)), len(MODEL_SIZES))
+        return size, name
+    return sorted(Path(bin_dir or WHISPER_BIN).glob("ggml-*.bin"), key=key)
+
+
+def model_label(model_path: Path) -> str:
+    return Path(model_path).stem.replace("ggml-", "")
+
+
+# ─── Peak RSS ───────────────────────────────────────────────────────
+class PeakRSS:
+    """Sampling RSS proses (dan child-nya) di background; peak_mb None tanpa psutil."""
+
+    def __init__(self, pids: Callable[[], Iterable[Optional[int]]], interval: float = 0.02):
+        self.pids = pids
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.enabled = importlib.util.find_spec("psutil") is not None
+
+    def _sample(self):
+        import psutil
+
+        while not self._stop.is_set():
+            total = 0
+            for pid in self.pids():
+                if pid is None:
+                    continue
+                try:
+                    proc = psutil.Process(pid)
+                    total += proc.memory_info().rss
+                    total += sum(c.memory_info().rss for c in proc.children(recursive=True))
+                except psutil.Error:
+                    pass
+            self.peak = max(self.peak, total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.enabled:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    @property
+    def peak_mb(self) -> Optional[float]:
+        return round(self.peak / 2 ** 20, 1) if self.enabled and self.peak else None
+
+
+# ─── Backend ────────────────────────────────────────────────────────
+class WhisperServerBackend:
+    """whisper.cpp server: model di-load sekali, klip dikirim sebagai PCM di memori."""
+
+    name = "whisper"
+
+    def __init__(self, model_path: Path, n_threads: int = 4):
+        self.model = model_label(model_path)
+        self.server = WhisperServer(model_path, n_threads=n_threads, timeout=120.0, startup_timeout=600.0)
+
+    def pids(self):
+        return [self.server.pid]
+
+    def setup(self):
+        if not self.server.start():
+            raise RuntimeError(f"whisper server / model tidak tersedia ({self.server.model_path})")
+        # last_error diisi _wait_ready kalau proses mati atau timeout saat load
+        while not self.server.wait_ready(0.2):
+            if self.server.last_error:
+                raise RuntimeError(self.server.last_error)
+
+    def transcribe(self, clip: Clip) -> Optional[str]:
+        return self.server.transcribe_pcm(clip.pcm, WHISPER_LANG.get(clip.lang, clip.lang))
+
+    def close(self):
+        self.server.stop()
+
+
+class WhisperCLIBackend:
+    """main.exe per klip: model di-load ulang setiap ucapan (jalur fallback lama)."""
+
+    name = "cli"
+
+    def __init__(self, model_path: Path, n_threads: int = 4):
+        self.model = model_label(model_path)
+        self.model_path = Path(model_path)
+        self.n_threads = n_threads
+        self.binary = next((WHISPER_BIN / n for n in CLI_NAMES if (WHISPER_BIN / n).exists()), None)
+        self._proc: Optional[subprocess.Popen] = None
+
+    def pids(self):
+        proc = self._proc
+        return [proc.pid] if proc is not None else []
+
+    def setup(self):
+        if self.binary is None:
+            raise RuntimeError(f"binary whisper CLI tidak ada di {WHISPER_BIN}")
+
+    def transcribe(self, clip: Clip) -> Optional[str]:
+        fd, wav_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        out_txt = wav_path + ".txt"
+        try:
+            sf.write(wav_path, clip.pcm, SAMPLE_RATE)
+            self._proc = subprocess.Popen(
+                [str(self.binary), "-m", str(self.model_path), "-f", wav_path, "-otxt",
+                 "-l", WHISPER_LANG.get(clip.lang, clip.lang), "-t", str(self.n_threads)],
+                cwd=str(WHISPER_BIN), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            if self._proc.wait() != 0 or not os.path.exists(out_txt):
+                return None
+            return " ".join(Path(out_txt).read_text(encoding="utf-8").split())
+        finally:
+            self._proc = None
+            for path in (wav_path, out_txt):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def close(self):
+        pass
+
+
+class GoogleBackend:
+    """Google Speech-to-Text batch (client dipakai ulang) sebagai pembanding cloud."""
+
+    name = "google"
+    model = "cloud"
+
+    def pids(self):
+        # Client gRPC berjalan di proses ini
+        return [os.getpid()]
+
+    def setup(self):
+        if not os.getenv("GOOGLE_APPLICATION_CREDENTIALS"):
+            raise RuntimeError("GOOGLE_APPLICATION_CREDENTIALS belum diset")
+        from modules_client.translate_stt import _get_speech_client
+        _get_speech_client()
+
+    def transcribe(self, clip: Clip) -> Optional[str]:
+        from modules_client.translate_stt import _google_transcribe_pcm
+        return _google_transcribe_pcm(clip.pcm, NLLB_LANG.get(clip.lang, clip.lang))
+
+    def close(self):
+        pass
+
+
+# ─── Runner ─────────────────────────────────────────────────────────
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return round(value, digits) if value is not None else None
+
+
+def run_backend(backend, clips: List[Clip], repeat: int = 1) -> List[Dict]:
+    """Jalankan semua klip lewat satu backend. Return satu hasil per bahasa."""
+    rows: Dict[str, Dict] = {}
+    with PeakRSS(backend.pids) as rss:
+        start = time.time()
+        try:
+            backend.setup()
+        except Exception as e:
+            logger.warning(f"Benchmark {backend.name}/{backend.model} dilewati: {e}")
+            return [{"backend": backend.name, "model": backend.model, "skipped": str(e)}]
+        load_seconds = time.time() - start
+
+        try:
+            for clip in clips:
+                row = rows.setdefault(clip.lang, {"latencies": [], "rtf": [], "edits": 0, "words": 0,
+                                                  "clips": 0, "errors": 0, "per_clip": []})
+                for _ in range(repeat):
+                    t0 = time.time()
+                    try:
+                        text = backend.transcribe(clip)
+                    except Exception as e:
+                        logger.error(f"Benchmark {backend.name}/{backend.model} {clip.path.name}: {e}")
+                        text = None
+                    elapsed = time.time() - t0
+                    if text is None:
+                        row["errors"] += 1
+                        text = ""
+                    row["latencies"].append(elapsed)
+                    row["rtf"].append(elapsed / clip.seconds if clip.seconds else 0.0)
+                edits, words = word_errors(clip.reference, text)
+                row["edits"] += edits
+                row["words"] += words
+                row["clips"] += 1
+                row["per_clip"].append({"clip": clip.path.name, "wer": _round(wer(clip.reference, text)),
+                                   "hypothesis": text})
+                print(f"[BENCH] {backend.name}/{backend.model} {clip.lang}/{clip.path.name}: "
+                      f"{elapsed * 1000:.0f} ms, WER {wer(clip.reference, text):.2f}")
+        finally:
+            backend.close()
+
+    results = []
+    for lang, row in rows.items():
+        results.append({
+            "backend": backend.name,
+            "model": backend.model,
+            "lang": lang,
+            "clips": row["clips"],
+            "errors": row["errors"],
+            "wer": _round(row["edits"] / row["words"] if row["words"] else None),
+            "latency_p50_ms": _round(_percentile(row["latencies"], 0.5) * 1000, 1),
+            "latency_p95_ms": _round(_percentile(row["latencies"], 0.95) * 1000, 1),
+            "rtf_mean": _round(float(np.mean(row["rtf"]))),
+            "rtf_p95": _round(_percentile(row["rtf"], 0.95)),
+            "load_seconds": _round(load_seconds, 2),
+            "peak_rss_mb": rss.peak_mb,
+            "per_clip": row["per_clip"],
+        })
+    return results
+
+
+def recommend(results: List[Dict], max_wer: float) -> Dict[str, Optional[Dict]]:
+    """Per bahasa: backend/model dengan latency p95 terendah yang WER-nya <= max_wer."""
+    picks = {}
+    for lang in sorted({r["lang"] for r in results if "lang" in r}):
+        passing = [r for r in results if r.get("lang") == lang and r["wer"] is not None
+                   and r["wer"] <= max_wer and not r["errors"]]
+        picks[lang] = min(passing, key=lambda r: r["latency_p95_ms"]) if passing else None
+    return picks
+
+
+def machine_info() -> Dict:
+    info = {
+        "os": f"{platform.system()} {platform.release()}",
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+    if importlib.util.find_spec("psutil") is not None:
+        import psutil
+        info["ram_gb"] = round(psutil.virtual_memory().total / 2 ** 30, 1)
+    return info
+
+
+def build_backends(names: Iterable[str], models: List[Path], n_threads: int) -> List:
+    backends = []
+    for name in names:
+        if name == "whisper":
+            backends += [WhisperServerBackend(m, n_threads) for m in models]
+        elif name == "cli":
+            backends += [WhisperCLIBackend(m, n_threads) for m in models]
+        elif name == "google":
+            backends.append(GoogleBackend())
+        else:
+            raise ValueError(f"Backend STT tidak dikenal: {name}")
+    return backends
+
+
+def print_report(results: List[Dict], picks: Dict[str, Optional[Dict]], max_wer: float):
+    header = f"{'backend':<8} {'model':<16} {'lang':<4} {'WER':>6} {'p50 ms':>8} {'p95 ms':>8} " \
+             f"{'RTF':>6} {'load s':>7} {'RSS MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        if "skipped" in r:
+            print(f"{r['backend']:<8} {r['model']:<16} dilewati: {r['skipped']}")
+            continue
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        wer_text = f"{r['wer']:.3f}" if r["wer"] is not None else "-"
+        print(f"{r['backend']:<8} {r['model']:<16} {r['lang']:<4} {wer_text:>6} "
+              f"{r['latency_p50_ms']:>8.0f} {r['latency_p95_ms']:>8.0f} {r['rtf_mean']:>6.2f} "
+              f"{r['load_seconds']:>7.1f} {rss:>8}")
+    print()
+    for lang, pick in picks.items():
+        if pick:
+            print(f"[{lang}] tercepat dengan WER <= {max_wer:.2f}: {pick['backend']}/{pick['model']} "
+                  f"(p95 {pick['latency_p95_ms']:.0f} ms, WER {pick['wer']:.3f})")
+        else:
+            print(f"[{lang}] tidak ada backend dengan WER <= {max_wer:.2f}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark engine STT StreamMate")
+    parser.add_argument("--corpus", required=True, help="Folder corpus: <lang>/<klip>.wav + .txt")
+    parser.add_argument("--backends", default="whisper,google",
+                        help="Daftar backend dipisah koma: whisper, cli, google")
+    parser.add_argument("--models", default="",
+                        help="Filter model whisper dipisah koma (mis. tiny,small-q5_1); default semua")
+    parser.add_argument("--langs", default="", help="Filter bahasa corpus dipisah koma (mis. id,en)")
+    parser.add_argument("--threads", type=int, default=4, help="Thread whisper.cpp")
+    parser.add_argument("--repeat", type=int, default=1, help="Ulangi tiap klip N kali untuk latency")
+    parser.add_argument("--max-wer", type=float, default=0.25, help="Batas akurasi untuk rekomendasi")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="File hasil JSON")
+    args = parser.parse_args(argv)
+
+    langs = [l for l in args.langs.split(",") if l]
+    clips = load_corpus(Path(args.corpus), langs)
+    if not clips:
+        print(f"Tidak ada klip di {args.corpus}")
+        return 1
+
+    wanted = [m for m in args.models.split(",") if m]
+    models = [m for m in discover_models() if not wanted or model_label(m) in wanted]
+    print(f"[BENCH] {len(clips)} klip ({sum(c.seconds for c in clips):.0f}s audio), "
+          f"model: {', '.join(model_label(m) for m in models) or '-'}")
+
+    results = []
+    for backend in build_backends([b for b in args.backends.split(",") if b], models, args.threads):
+        results += run_backend(backend, clips, args.repeat)
+
+    picks = recommend(results, args.max_wer)
+    print()
+    print_report(results, picks, args.max_wer)
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "created_at": time.time(),
+        "machine": machine_info(),
+        "corpus": str(args.corpus),
+        "max_wer": args.max_wer,
+        "results": results,
+        "recommendation": {lang: pick and {"backend": pick["backend"], "model": pick["model"]}
+                           for lang, pick in picks.items()},
+    }
+    output.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nHasil disimpan di {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+# modules_client/stt_stream.py
+"""
+STT streaming lokal untuk hold-to-talk (mirip RevAIStream, tapi offline).
+
+Selama hotkey ditahan, audio masuk ke RecordingBuffer dan VAD memotongnya
+jadi segmen ucapan (dipisah jeda). Tiap segmen yang sudah selesai langsung
+ditranskrip oleh model whisper yang resident, teks sementara dikirim ke UI
+lewat on_partial. Saat hotkey dilepas hanya segmen terakhir yang tersisa,
+jadi transkrip final siap hampir seketika walau ucapannya panjang.
+
+VAD: energi dengan noise floor adaptif; kalau paket webrtcvad terinstall,
+keputusan speech/non-speech per frame memakai WebRTC VAD.
+"""
+
+import time
+import importlib.util
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import sounddevice as sd
+
+from modules_client.audio_capture import RecordingBuffer, SAMPLE_RATE
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+
+class EnergyVAD:
+    """Keputusan speech per frame (10/20/30 ms)."""
+
+    def __init__(self, samplerate: int = SAMPLE_RATE, threshold_db: float = 10.0,
+                 min_level_db: float = -50.0, aggressiveness: int = 2):
+        self.samplerate = samplerate
+        self.threshold_db = threshold_db
+        self.min_level_db = min_level_db
+        self.noise_floor_db = -60.0
+        self._webrtc = None
+        if importlib.util.find_spec("webrtcvad") is not None:
+            import webrtcvad
+            self._webrtc = webrtcvad.Vad(aggressiveness)
+
+    def is_speech(self, frame: np.ndarray) -> bool:
+        level_db = 10 * np.log10(float(np.dot(frame, frame)) / len(frame) + 1e-10)
+        if self._webrtc is not None:
+            pcm16 = (np.clip(frame, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+            speech = self._webrtc.is_speech(pcm16, self.samplerate)
+        else:
+            speech = level_db > max(self.noise_floor_db + self.threshold_db, self.min_level_db)
+        if not speech:
+            # Noise floor mengikuti level ruangan saat tidak bicara
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * level_db
+        return speech
+
+
+class VADSegmenter:
+    """Ubah keputusan VAD per frame jadi segmen ucapan [start, end) (posisi sample)."""
+
+    def __init__(self, samplerate: int = SAMPLE_RATE, frame_ms: int = 30, hangover_ms: int = 500,
+                 min_speech_ms: int = 250, max_segment_s: float = 12.0, pad_ms: int = 200):
+        self.frame = samplerate * frame_ms // 1000
+        self.hangover = samplerate * hangover_ms // 1000
+        self.min_speech = samplerate * min_speech_ms // 1000
+        self.max_segment = int(samplerate * max_segment_s)
+        self.pad = samplerate * pad_ms // 1000
+
+        self._start: Optional[int] = None   # awal speech segmen berjalan
+        self._last_speech = 0               # akhir frame speech terakhir
+        self._speech = 0                    # jumlah sample speech di segmen
+
+    def feed(self, pos: int, is_speech: bool) -> Optional[Tuple[int, int]]:
+        """pos = posisi awal frame. Return segmen yang baru tertutup (kalau ada)."""
+        end = pos + self.frame
+        if is_speech:
+            if self._start is None:
+                self._start = pos
+                self._speech = 0
+            self._last_speech = end
+            self._speech += self.frame
+            if end - self._start >= self.max_segment:
+                # Ucapan tanpa jeda terlalu panjang: potong supaya tetap incremental
+                return self._close(end, pad_end=False)
+        elif self._start is not None and end - self._last_speech >= self.hangover:
+            return self._close(self._last_speech)
+        return None
+
+    def flush(self, end: int) -> Optional[Tuple[int, int]]:
+        """Tutup segmen yang masih terbuka (hotkey dilepas)."""
+        if self._start is None:
+            return None
+        return self._close(min(end, self._last_speech + self.pad) if self._last_speech else end,
+                           pad_end=False)
+
+    def _close(self, end: int, pad_end: bool = True) -> Optional[Tuple[int, int]]:
+        start, speech = self._start, self._speech
+        self._start = None
+        if speech < self.min_speech:
+            return None  # klik / noise pendek
+        return max(0, start - self.pad), end + (self.pad if pad_end else 0)
+
+
+def stream_transcribe(is_active: Callable[[], bool],
+                      transcribe_segment: Callable[[np.ndarray], Optional[str]],
+                      on_partial: Callable[[str], None] = None,
+                      device: Optional[int] = None, max_seconds: float = 120.0,
+                      normalize: bool = False, poll_interval: float = 0.05,
+                      segmenter: VADSegmenter = None, vad: EnergyVAD = None) -> str:
+    """
+    Rekam selama is_active() True sambil mentranskrip segmen yang selesai.
+    Return transkrip final (gabungan semua segmen).
+    """
+    buffer = RecordingBuffer(max_seconds)
+    segmenter = segmenter or VADSegmenter(buffer.samplerate)
+    vad = vad or EnergyVAD(buffer.samplerate)
+    frame = segmenter.frame
+    texts: List[str] = []
+    pos = 0  # frame berikutnya yang belum dilihat VAD
+
+    def transcribe(start: int, end: int):
+        pcm = buffer.read(start, end)
+        if normalize:
+            peak = float(np.max(np.abs(pcm))) if len(pcm) else 0.0
+            pcm = pcm / peak if peak > 0 else pcm
+        t0 = time.time()
+        text = (transcribe_segment(pcm) or "").strip()
+        logger.debug(f"STT stream segmen {(end - start) / buffer.samplerate:.1f}s → {time.time() - t0:.2f}s")
+        if text:
+            texts.append(text)
+            if on_partial:
+                on_partial(" ".join(texts))
+
+    def scan(limit: int) -> List[Tuple[int, int]]:
+        nonlocal pos
+        closed = []
+        # Frame yang sudah tertimpa ring buffer dilewati
+        pos = max(pos, buffer.oldest)
+        while pos + frame <= limit:
+            segment = segmenter.feed(pos, vad.is_speech(buffer.read(pos, pos + frame)))
+            if segment:
+                closed.append(segment)
+            pos += frame
+        return closed
+
+    with sd.InputStream(samplerate=buffer.samplerate, channels=1, dtype="float32",
+                        device=device, callback=buffer.callback):
+        while is_active():
+            for start, end in scan(buffer.written):
+                transcribe(start, end)
+            time.sleep(poll_interval)
+
+    released = time.time()
+    for start, end in scan(buffer.written):
+        transcribe(start, end)
+    last = segmenter.flush(buffer.written)
+    if last:
+        transcribe(*last)
+    logger.info(f"STT stream: {len(texts)} segmen, final {(time.time() - released) * 1000:.0f} ms setelah release")
+    return " ".join(texts)
@@ -4,6 +4,7 @@ import time
 import threading
 import logging
 import os
+import secrets
 import requests  # TAMBAHKAN INI
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -132,7 +133,8 @@ class HourlySubscriptionChecker:
         
         # Generate session ID
         email = self._get_user_email()
-        self.current_session_id = f"{email}_{feature_name}_{int(time.time())}"
+        # Suffix acak: session id jadi identitas di server, tidak boleh bisa ditebak
+        self.current_session_id = f"{email}_{feature_name}_{int(time.time())}_{secrets.token_hex(8)}"
         
         # Start session di server
         try:
@@ -542,6 +544,12 @@ def get_checker():
         _checker = HourlySubscriptionChecker()
     return _checker
 
+def current_session_id():
+    """Session server yang sedang aktif (None kalau tracking belum jalan)."""
+    if _checker is None or not _checker.is_tracking:
+        return None
+    return getattr(_checker, "current_session_id", None)
+
 def start_usage_tracking(feature="general"):
     """Mulai tracking penggunaan."""
     checker = get_checker()
@@ -3,13 +3,19 @@ import subprocess
 import time
 import tempfile
 import re
+import threading
 from pathlib import Path
 
+import numpy as np
 import sounddevice as sd
 import soundfile as sf
 import logging
 logger = logging.getLogger('StreamMate')
 
+from modules_client.audio_capture import RecordingBuffer, record_while
+from modules_client.stt_stream import stream_transcribe
+from modules_client.whisper_server import SAMPLE_RATE, get_whisper_server, load_pcm_16k
+
 # ─── Paths Whisper ────────────────────────────────────────────────
 TRIGGER_FILE = Path("temp/trigger.txt")
 WHISPER_EXE  = Path(__file__).resolve().parent.parent / "thirdparty" / "whisper_bin" / "main.exe"
@@ -20,11 +26,40 @@ def record_and_transcribe(mode="historical"):
     # (fungsi lama jika diperlukan; tidak diubah)
     pass
 
-# ─── Whisper: Transkrip File WAV (Hold-to-Talk) ──────────────────────
+def _clean_whisper_text(lines) -> str:
+    texts = [re.sub(r"\[.*?\]", "", l) for l in lines if l.strip()]
+    return " ".join(" ".join(texts).split())
+
+# ─── Whisper: Transkrip PCM / File WAV (Hold-to-Talk) ────────────────
+def _whisper_transcribe_pcm(pcm) -> str | None:
+    """
+    Transkrip PCM 16 kHz (hasil RecordingBuffer) langsung di memori lewat
+    whisper server yang model-nya sudah resident.
+    """
+    server = get_whisper_server()
+    if server.is_available():
+        text = server.transcribe_pcm(pcm)
+        if text is not None:
+            return _clean_whisper_text(text.splitlines())
+        logger.warning("Whisper server gagal, fallback ke main.exe")
+
+    # main.exe hanya menerima file: tulis WAV sementara untuk fallback ini saja
+    fd, wav_path = tempfile.mkstemp(suffix=".wav", dir="temp" if os.path.isdir("temp") else None)
+    os.close(fd)
+    try:
+        sf.write(wav_path, pcm, SAMPLE_RATE)
+        return _whisper_exe_transcribe(wav_path)
+    finally:
+        os.remove(wav_path)
+
 def _whisper_transcribe(wav_path: str) -> str | None:
     """
     Transkrip file WAV menggunakan whisper.cpp (offline).
     """
+    return _whisper_transcribe_pcm(load_pcm_16k(wav_path))
+
+def _whisper_exe_transcribe(wav_path: str) -> str | None:
+    """main.exe per ucapan (load model setiap kali) — fallback tanpa server."""
     out_txt = str(wav_path) + ".txt"
     try:
         cmd = [
@@ -39,8 +74,7 @@ def _whisper_transcribe(wav_path: str) -> str | None:
             return None
 
         lines = open(out_txt, encoding="utf-8").readlines()
-        texts = [re.sub(r"\[.*?\]", "", l).strip() for l in lines if l.strip()]
-        return " ".join(texts).strip()
+        return _clean_whisper_text(lines)
     except Exception as e:
         print(f"Whisper Error: {e}")
         return None
@@ -60,41 +94,124 @@ _GOOGLE_LANG_MAP = {
     "arb_Arab": "ar-XA",
 }
 
-def _google_transcribe(wav_path: str, src_lang: str = "ind_Latn") -> str | None:
+_speech_client = None
+_speech_client_lock = threading.Lock()
+
+def _get_speech_client():
     """
-    Transkrip file WAV menggunakan Google Cloud Speech-to-Text.
+    SpeechClient dibuat sekali dan dipakai ulang: channel gRPC + auth
+    tidak dibangun ulang tiap ucapan.
     Pastikan env var GOOGLE_APPLICATION_CREDENTIALS sudah diset.
     """
+    global _speech_client
+    with _speech_client_lock:
+        if _speech_client is None:
+            _speech_client = speech.SpeechClient()
+        return _speech_client
+
+def _google_recognition_config(src_lang: str) -> "speech.RecognitionConfig":
+    return speech.RecognitionConfig(
+        encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+        sample_rate_hertz=SAMPLE_RATE,
+        language_code=_GOOGLE_LANG_MAP.get(src_lang, "en-US"),
+        enable_automatic_punctuation=True,
+    )
+
+def _pcm16_bytes(pcm) -> bytes:
+    return (np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+def _google_transcribe_pcm(pcm, src_lang: str = "ind_Latn") -> str | None:
+    """
+    Transkrip PCM 16 kHz menggunakan Google Cloud Speech-to-Text (batch).
+    """
     try:
-        client = speech.SpeechClient()
-        with open(wav_path, "rb") as f:
-            content = f.read()
-        audio = speech.RecognitionAudio(content=content)
-        language_code = _GOOGLE_LANG_MAP.get(src_lang, "en-US")
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
-            language_code=language_code,
-        )
-        response = client.recognize(config=config, audio=audio)
+        client = _get_speech_client()
+        audio = speech.RecognitionAudio(content=_pcm16_bytes(pcm))
+        response = client.recognize(config=_google_recognition_config(src_lang), audio=audio)
         texts = [res.alternatives[0].transcript for res in response.results]
         return " ".join(texts) if texts else None
     except Exception as e:
         print(f"Google STT Error: {e}")
         return None
 
+def _google_stream_transcribe(is_active, device=None, src_lang: str = "ind_Latn", on_partial=None,
+                              chunk_ms: int = 100, poll_interval: float = 0.02):
+    """
+    Hold-to-talk lewat streaming_recognize: audio dari mic dikirim per
+    chunk ~100 ms selama hotkey ditahan, hasil interim diteruskan ke
+    on_partial. Saat dilepas, sisa buffer dikirim dan stream request
+    ditutup → Google langsung mengirim hasil final.
+    Return (teks | None, RecordingBuffer); teks None kalau streaming gagal
+    (rekaman tetap lengkap untuk fallback).
+    """
+    buffer = RecordingBuffer()
+    chunk = SAMPLE_RATE * chunk_ms // 1000
+    finals = []
+    released = None
+
+    def requests():
+        nonlocal released
+        pos = 0
+        while True:
+            active = is_active()
+            if not active and released is None:
+                released = time.time()
+            end = buffer.written
+            pos = max(pos, buffer.oldest)
+            while end - pos >= chunk or (not active and end > pos):
+                stop = min(end, pos + chunk)
+                yield speech.StreamingRecognizeRequest(audio_content=_pcm16_bytes(buffer.read(pos, stop)))
+                pos = stop
+            if not active:
+                return
+            time.sleep(poll_interval)
+
+    with sd.InputStream(samplerate=buffer.samplerate, channels=1, dtype="float32",
+                        device=device, callback=buffer.callback):
+        try:
+            streaming_config = speech.StreamingRecognitionConfig(
+                config=_google_recognition_config(src_lang),
+                interim_results=True,
+            )
+            responses = _get_speech_client().streaming_recognize(config=streaming_config, requests=requests())
+            for response in responses:
+                for result in response.results:
+                    if not result.alternatives:
+                        continue
+                    transcript = result.alternatives[0].transcript.strip()
+                    if result.is_final:
+                        finals.append(transcript)
+                        if on_partial:
+                            on_partial(" ".join(finals))
+                    elif on_partial:
+                        on_partial(" ".join(finals + [transcript]))
+        except Exception as e:
+            logger.error(f"Google streaming STT error: {e}")
+            # Tetap rekam sampai hotkey dilepas supaya fallback dapat audio lengkap
+            while is_active():
+                time.sleep(poll_interval)
+            return None, buffer
+
+    text = " ".join(t for t in finals if t)
+    if released is not None:
+        logger.info(f"Google STT stream: final {(time.time() - released) * 1000:.0f} ms setelah release")
+    return text, buffer
+
+def _google_transcribe(wav_path: str, src_lang: str = "ind_Latn") -> str | None:
+    return _google_transcribe_pcm(load_pcm_16k(wav_path), src_lang)
+
 # ─── Wrapper Pemilihan STT ─────────────────────────────────────────
-def transcribe(wav_path: str, src_lang: str = "ind_Latn", use_google: bool = False) -> str | None:
+def transcribe_pcm(pcm, src_lang: str = "ind_Latn", use_google: bool = False) -> str | None:
     """
-    Pilih engine STT:
+    Pilih engine STT untuk PCM mono float32 16 kHz di memori:
       - use_google=True → Google Speech-to-Text
       - use_google=False → whisper.cpp offline
     """
-    logger.info(f"STT started: {wav_path} (lang={src_lang}, google={use_google})")
+    logger.info(f"STT started: {len(pcm) / SAMPLE_RATE:.1f}s audio (lang={src_lang}, google={use_google})")
     
     try:
         if use_google:
-            txt = _google_transcribe(wav_path, src_lang)
+            txt = _google_transcribe_pcm(pcm, src_lang)
             if txt:
                 logger.info(f"STT completed (Google): {txt[:50]}...")
                 return txt
@@ -102,7 +219,7 @@ def transcribe(wav_path: str, src_lang: str = "ind_Latn", use_google: bool = Fal
             logger.warning("Google STT failed, falling back to Whisper")
         
         # Use Whisper
-        result = _whisper_transcribe(wav_path)
+        result = _whisper_transcribe_pcm(pcm)
         if result:
             logger.info(f"STT completed (Whisper): {result[:50]}...")
         else:
@@ -112,3 +229,41 @@ def transcribe(wav_path: str, src_lang: str = "ind_Latn", use_google: bool = Fal
     except Exception as e:
         logger.error(f"STT failed: {str(e)}")
         return None
+
+def transcribe(wav_path: str, src_lang: str = "ind_Latn", use_google: bool = False) -> str | None:
+    """Seperti transcribe_pcm, untuk file WAV."""
+    try:
+        pcm = load_pcm_16k(wav_path)
+    except Exception as e:
+        logger.error(f"STT failed: {str(e)}")
+        return None
+    return transcribe_pcm(pcm, src_lang, use_google)
+
+def transcribe_streaming(is_active, device=None, src_lang: str = "ind_Latn", use_google: bool = False,
+                         on_partial=None, normalize: bool = False, streaming: bool = True) -> str | None:
+    """
+    Hold-to-talk: rekam selama is_active() True lalu return transkrip final.
+    use_google=True → streaming_recognize dengan hasil interim ke on_partial.
+    Dengan whisper server, segmen VAD ditranskrip selama hotkey masih ditahan
+    (teks sementara ke on_partial); selain itu rekam dulu lalu transcribe_pcm.
+    Error mic diteruskan ke pemanggil.
+    """
+    if streaming and use_google:
+        text, recording = _google_stream_transcribe(is_active, device, src_lang, on_partial)
+        if text is not None:
+            return text or None
+        # Streaming gagal (network / kredensial): transkrip ulang rekaman dengan whisper
+        use_google = False
+    elif streaming and get_whisper_server().is_available():
+        return stream_transcribe(is_active, _whisper_transcribe_pcm, on_partial,
+                                 device=device, normalize=normalize)
+    else:
+        recording = record_while(is_active, device=device)
+    if not recording.written:
+        return None
+    pcm = recording.pcm()
+    if normalize:
+        peak = float(np.max(np.abs(pcm)))
+        if peak > 0:
+            pcm /= peak
+    return transcribe_pcm(pcm, src_lang, use_google)
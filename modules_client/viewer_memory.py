@@ -1,17 +1,29 @@
 # modules_client/viewer_memory.py
 import json
 import os
+import queue
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from modules_client.context_budget import ViewerSummarizer, count_tokens, truncate_tokens
+
 class ViewerMemory:
-    def __init__(self, memory_file="config/viewer_memory.json"):
+    def __init__(self, memory_file="config/viewer_memory.json", summary_batch=3, summarizer=None):
         self.memory_file = Path(memory_file)
         self.memory_file.parent.mkdir(exist_ok=True)
+        self._lock = threading.RLock()
         self.memory_data = self._load_memory()
         
         # Cleanup otomatis saat load
         self._cleanup_old_data()
+
+        # Ringkasan per viewer di-update di background, bukan saat membalas
+        self.summary_batch = summary_batch
+        self.summarizer = summarizer or ViewerSummarizer()
+        self._summary_queue = queue.Queue()
+        self._pending_summaries = set()
+        threading.Thread(target=self._summary_worker, daemon=True).start()
     
     def _load_memory(self):
         """Load memory dari file JSON"""
@@ -27,7 +39,7 @@ class ViewerMemory:
     def _save_memory(self):
         """Simpan memory ke file JSON"""
         try:
-            with open(self.memory_file, "w", encoding="utf-8") as f:
+            with self._lock, open(self.memory_file, "w", encoding="utf-8") as f:
                 json.dump(self.memory_data, f, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"[ERROR] Save memory gagal: {e}")
@@ -57,6 +69,17 @@ class ViewerMemory:
     
     def add_interaction(self, viewer_name, message, reply):
         """Tambah interaksi viewer ke memory"""
+        with self._lock:
+            self._add_interaction(viewer_name, message, reply)
+            unsummarized = self._unsummarized(self.memory_data[viewer_name])
+
+        # Save ke file
+        self._save_memory()
+
+        if len(unsummarized) >= self.summary_batch:
+            self._schedule_summary(viewer_name)
+
+    def _add_interaction(self, viewer_name, message, reply):
         now = datetime.now().isoformat()
         
         # Initialize viewer data jika belum ada
@@ -93,9 +116,77 @@ class ViewerMemory:
         # Keep hanya 10 interaksi terakhir
         if len(viewer_data["recent_interactions"]) > 10:
             viewer_data["recent_interactions"] = viewer_data["recent_interactions"][-10:]
-        
-        # Save ke file
+
+    # ─── Ringkasan incremental ──────────────────────────────────────
+    @staticmethod
+    def _unsummarized(viewer_data):
+        """Interaksi yang belum masuk ringkasan rolling."""
+        until = viewer_data.get("summary_until", "")
+        return [i for i in viewer_data.get("recent_interactions", []) if i["time"] > until]
+
+    def _schedule_summary(self, viewer_name):
+        with self._lock:
+            if viewer_name in self._pending_summaries:
+                return
+            self._pending_summaries.add(viewer_name)
+        self._summary_queue.put(viewer_name)
+
+    def _summary_worker(self):
+        while True:
+            viewer_name = self._summary_queue.get()
+            try:
+                self.update_summary(viewer_name)
+            except Exception as e:
+                print(f"[ERROR] Update ringkasan viewer {viewer_name} gagal: {e}")
+            finally:
+                with self._lock:
+                    self._pending_summaries.discard(viewer_name)
+
+    def update_summary(self, viewer_name):
+        """Lipat interaksi baru ke ringkasan viewer (tanpa memproses ulang riwayat lama)."""
+        with self._lock:
+            viewer_data = self.memory_data.get(viewer_name)
+            if not viewer_data:
+                return
+            new_interactions = self._unsummarized(viewer_data)
+            if not new_interactions:
+                return
+            self.summarizer.update(viewer_data, new_interactions)
+            viewer_data["summary_until"] = new_interactions[-1]["time"]
         self._save_memory()
+
+    def get_prompt_context(self, viewer_name, max_tokens=120):
+        """
+        Context viewer untuk prompt dalam batas token: ringkasan rolling dulu,
+        lalu interaksi terbaru (dari yang paling baru) selama masih muat.
+        """
+        if max_tokens <= 0:
+            return ""
+        with self._lock:
+            viewer_data = self.memory_data.get(viewer_name)
+            if not viewer_data:
+                return ""
+            summary = viewer_data.get("summary", "")
+            recent = self._unsummarized(viewer_data) if summary else \
+                list(viewer_data.get("recent_interactions", []))
+
+        parts = []
+        used = 0
+        if summary:
+            summary = truncate_tokens(summary, max_tokens)
+            parts.append(summary)
+            used = count_tokens(summary)
+
+        recent_parts = []
+        for interaction in reversed(recent):
+            line = truncate_tokens(f"{interaction['message']} -> {interaction['reply']}", 40)
+            cost = count_tokens(line) + 1
+            if used + cost > max_tokens:
+                break
+            recent_parts.append(line)
+            used += cost
+        parts.extend(reversed(recent_parts))
+        return " | ".join(parts)
     
     def get_viewer_info(self, viewer_name):
         """Ambil info viewer dari memory"""
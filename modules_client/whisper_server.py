@@ -0,0 +1,272 @@
+# modules_client/whisper_server.py
+"""
+Worker STT whisper.cpp yang tetap hidup (server mode).
+
+Sebelumnya tiap hold-to-talk menjalankan main.exe baru → model ggml ~1.5 GB
+di-load ulang setiap ucapan dan hasil ditukar lewat file .wav/.txt. Di sini
+binary server whisper.cpp (whisper-server.exe / server.exe, satu folder
+dengan main.exe) dijalankan sekali di 127.0.0.1, model di-load sekali dan
+di-warm-up dengan satu inference hening. Tiap ucapan dikirim sebagai PCM
+16 kHz (dibungkus WAV di memori) lewat koneksi HTTP keep-alive, sehingga
+latency per ucapan tinggal waktu inference.
+
+Kalau binary server tidak ada, pemanggil tetap fallback ke main.exe lama.
+"""
+
+import io
+import time
+import atexit
+import socket
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import soundfile as sf
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+WHISPER_BIN = Path(__file__).resolve().parent.parent / "thirdparty" / "whisper_bin"
+SERVER_NAMES = ("whisper-server.exe", "server.exe", "whisper-server", "server")
+DEFAULT_MODEL = WHISPER_BIN / "ggml-medium.bin"
+SAMPLE_RATE = 16000
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def pcm_to_wav_bytes(pcm: np.ndarray, samplerate: int = SAMPLE_RATE) -> bytes:
+    buf = io.BytesIO()
+    sf.write(buf, np.asarray(pcm, dtype=np.float32).reshape(-1), samplerate, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def load_pcm_16k(wav_path: str) -> np.ndarray:
+    """Baca file audio → PCM mono float32 16 kHz (format input whisper.cpp)."""
+    data, samplerate = sf.read(str(wav_path), dtype="float32")
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if samplerate != SAMPLE_RATE:
+        n = int(len(data) * SAMPLE_RATE / samplerate)
+        data = np.interp(np.linspace(0, len(data) - 1, n), np.arange(len(data)), data).astype(np.float32)
+    return data
+
+
+class WhisperServer:
+    """Facade untuk proses whisper.cpp server yang model-nya tetap resident."""
+
+    def __init__(self, model_path: Path = DEFAULT_MODEL, language: str = "id",
+                 n_threads: int = 4, port: int = None, timeout: float = 30.0,
+                 startup_timeout: float = 120.0, ready_timeout: float = 10.0,
+                 retry_after: float = 60.0):
+        self.model_path = Path(model_path)
+        self.language = language
+        self.n_threads = n_threads
+        self.port = port
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.ready_timeout = ready_timeout    # batas tunggu load per ucapan sebelum fallback
+        self.retry_after = retry_after        # jeda sebelum start ulang setelah gagal start
+
+        self._proc: Optional[subprocess.Popen] = None
+        self._session = None
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._latencies = deque(maxlen=50)
+        self._failed_at = None
+        self.load_time = None
+        self.last_error = None
+        self.requests = 0
+        self.restarts = 0
+
+    @classmethod
+    def from_config(cls, cfg) -> "WhisperServer":
+        return cls(
+            model_path=cfg.get("whisper_model", str(DEFAULT_MODEL)),
+            language=cfg.get("whisper_language", "id"),
+            n_threads=cfg.get("whisper_threads", 4),
+            timeout=cfg.get("whisper_timeout", 30.0),
+        )
+
+    @staticmethod
+    def find_binary() -> Optional[Path]:
+        for name in SERVER_NAMES:
+            path = WHISPER_BIN / name
+            if path.exists():
+                return path
+        return None
+
+    def is_available(self) -> bool:
+        """Binary server dan model ada di thirdparty/whisper_bin."""
+        return self.find_binary() is not None and self.model_path.exists()
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set() and self._proc is not None and self._proc.poll() is None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self._proc.pid if self._proc is not None else None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self) -> bool:
+        """Jalankan server + load model di background. Return False kalau tidak tersedia."""
+        with self._start_lock:
+            if self._proc is not None and self._proc.poll() is None:
+                return True
+            if not self.is_available():
+                logger.info(f"Whisper server tidak tersedia (model: {self.model_path})")
+                return False
+
+            self._ready.clear()
+            self.port = self.port or _free_port()
+            cmd = [
+                str(self.find_binary()),
+                "-m", str(self.model_path),
+                "-l", self.language,
+                "-t", str(self.n_threads),
+                "--host", "127.0.0.1",
+                "--port", str(self.port),
+            ]
+            kwargs = {}
+            if hasattr(subprocess, "CREATE_NO_WINDOW"):
+                kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+            self._proc = subprocess.Popen(
+                cmd, cwd=str(WHISPER_BIN),
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs
+            )
+            threading.Thread(target=self._wait_ready, daemon=True).start()
+            return True
+
+    def _wait_ready(self):
+        import requests
+
+        start = time.time()
+        session = requests.Session()
+        while time.time() - start < self.startup_timeout:
+            if self._proc is None or self._proc.poll() is not None:
+                self._startup_failed("proses whisper server berhenti saat load model")
+                return
+            try:
+                # Warm-up: inference pertama menanggung alokasi buffer model
+                self._post(session, np.zeros(SAMPLE_RATE // 2, dtype=np.float32), self.language, timeout=5.0)
+                break
+            except Exception:
+                time.sleep(0.5)
+        else:
+            # Proses masih jalan tapi tidak pernah siap: matikan, jangan dibiarkan menggantung
+            self._startup_failed("timeout menunggu whisper server")
+            self.stop()
+            return
+
+        self._failed_at = None
+        self._session = session
+        self.load_time = time.time() - start
+        self._ready.set()
+        logger.info(f"Whisper server siap di port {self.port} ({self.load_time:.1f}s load + warm-up)")
+
+    def _startup_failed(self, error: str):
+        self.last_error = error
+        self._failed_at = time.time()
+        logger.error(f"Whisper server gagal start: {error} (coba lagi dalam {self.retry_after:.0f}s)")
+
+    def _post(self, session, pcm: np.ndarray, language: str, timeout: float) -> str:
+        response = session.post(
+            f"{self.url}/inference",
+            files={"file": ("audio.wav", pcm_to_wav_bytes(pcm), "audio/wav")},
+            data={"response_format": "json", "language": language, "temperature": "0.0"},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        return (response.json().get("text") or "").strip()
+
+    def wait_ready(self, timeout: float = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def transcribe_pcm(self, pcm: np.ndarray, language: str = None) -> Optional[str]:
+        """Transkrip PCM mono float32 16 kHz; None kalau server belum siap atau error."""
+        if not self.is_ready():
+            if self._failed_at is not None and time.time() - self._failed_at < self.retry_after:
+                # Start terakhir gagal: langsung fallback ke main.exe, jangan tunggu lagi
+                return None
+            if self._proc is None or self._proc.poll() is not None:
+                if self._proc is not None:
+                    # Proses mati (crash / di-kill): start ulang
+                    self.restarts += 1
+                    self._proc = None
+                if not self.start():
+                    return None
+            # Model masih di-load: tunggu sebentar, lebih cepat daripada load kedua lewat main.exe
+            deadline = time.time() + self.ready_timeout
+            while not self._ready.wait(0.2):
+                if self._proc is None or self._proc.poll() is not None or time.time() > deadline:
+                    return None
+
+        with self._lock:
+            start = time.time()
+            try:
+                text = self._post(self._session, pcm, language or self.language, self.timeout)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Whisper server error: {e}")
+                return None
+        self.requests += 1
+        self._latencies.append(time.time() - start)
+        return text
+
+    def transcribe_file(self, wav_path: str, language: str = None) -> Optional[str]:
+        return self.transcribe_pcm(load_pcm_16k(wav_path), language)
+
+    def p95(self) -> Optional[float]:
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def stop(self):
+        self._ready.clear()
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        proc.terminate()
+        try:
+            proc.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    def status(self) -> dict:
+        return {
+            "available": self.is_available(),
+            "ready": self.is_ready(),
+            "model": str(self.model_path),
+            "port": self.port,
+            "load_time": self.load_time,
+            "requests": self.requests,
+            "restarts": self.restarts,
+            "startup_failed": self._failed_at is not None,
+            "p95_latency": self.p95(),
+            "last_error": self.last_error,
+        }
+
+
+_whisper_server: Optional[WhisperServer] = None
+_whisper_server_lock = threading.Lock()
+
+
+def get_whisper_server(cfg=None) -> WhisperServer:
+    global _whisper_server
+    with _whisper_server_lock:
+        if _whisper_server is None:
+            _whisper_server = WhisperServer.from_config(cfg) if cfg is not None else WhisperServer()
+            # Proses server bukan child daemon: matikan saat aplikasi keluar
+            atexit.register(_whisper_server.stop)
+        return _whisper_server
@@ -0,0 +1,139 @@
+# modules_server/audio_dsp.py
+"""
+Rantai DSP playback TTS (NumPy, vectorized).
+
+  1. loudness : gain normalisasi dihitung sekali per clip dari RMS bagian
+                yang bersuara, supaya Google TTS dan gTTS terdengar setara
+  2. resample : interpolasi linear ke samplerate device; pitch (semitone,
+                dari tts_pitch) digabung di langkah ini, gaya tape: pitch
+                dan tempo naik/turun bersama
+  3. gain     : gain normalisasi × gain device (mis. boost virtual mic)
+  4. limiter  : soft limiter (tanh) di atas threshold, menggantikan hard clip
+
+Tahap 2–4 berjalan in-place di buffer milik DSPChain yang dialokasikan
+sekali lalu dipakai ulang (hanya tumbuh kalau ada clip yang lebih panjang).
+"""
+
+import time
+from typing import Dict
+
+import numpy as np
+
+MAX_PITCH_SEMITONES = 12.0
+
+
+def loudness_gain(data: np.ndarray, samplerate: int, target_db: float = -20.0,
+                  max_gain_db: float = 12.0, gate_db: float = -50.0) -> float:
+    """Gain linear untuk membawa RMS bagian bersuara ke target_db (dBFS)."""
+    if len(data) == 0:
+        return 1.0
+    # Power per blok 20 ms; blok hening di bawah gate tidak ikut dihitung
+    block = max(1, samplerate // 50)
+    n = len(data) // block * block
+    if n:
+        blocks = data[:n].reshape(-1, block)
+        power = np.einsum("ij,ij->i", blocks, blocks) / block
+    else:
+        power = np.array([np.dot(data, data) / len(data)])
+    voiced = power[power > 10 ** (gate_db / 10)]
+    if voiced.size == 0:
+        return 1.0
+    gain_db = target_db - 10 * np.log10(voiced.mean())
+    gain_db = min(max(gain_db, -max_gain_db), max_gain_db)
+    return float(10 ** (gain_db / 20))
+
+
+class DSPChain:
+    """Resample + gain + limiter dengan buffer kerja yang dipakai ulang."""
+
+    STAGES = ("resample", "gain", "limiter")
+
+    def __init__(self, limiter_threshold: float = 0.9):
+        self.limiter_threshold = limiter_threshold
+        self._capacity = 0
+        self._alloc(4096)
+
+        self.clips = 0
+        self.timings: Dict[str, float] = {stage: 0.0 for stage in self.STAGES}
+
+    def _alloc(self, capacity: int):
+        self._capacity = capacity
+        self._out = np.empty(capacity, dtype=np.float32)
+        self._tmp = np.empty(capacity, dtype=np.float32)
+        self._pos = np.empty(capacity, dtype=np.float64)
+        self._ramp = np.arange(capacity, dtype=np.float64)
+        self._idx0 = np.empty(capacity, dtype=np.intp)
+        self._idx1 = np.empty(capacity, dtype=np.intp)
+
+    def _ensure(self, n: int):
+        if n > self._capacity:
+            self._alloc(max(n, self._capacity * 2))
+
+    def _resample_into(self, data: np.ndarray, out: np.ndarray, step: float):
+        n_out = len(out)
+        pos = self._pos[:n_out]
+        i0 = self._idx0[:n_out]
+        i1 = self._idx1[:n_out]
+        tmp = self._tmp[:n_out]
+
+        np.multiply(self._ramp[:n_out], step, out=pos)
+        np.copyto(i0, pos, casting="unsafe")          # floor (pos >= 0)
+        np.subtract(pos, i0, out=pos)                  # pos → fraksi
+        np.add(i0, 1, out=i1)
+        np.minimum(i1, len(data) - 1, out=i1)
+
+        np.take(data, i0, out=out)
+        np.take(data, i1, out=tmp)
+        tmp -= out
+        np.multiply(tmp, pos, out=tmp, casting="unsafe")
+        out += tmp
+
+    def _limit(self, out: np.ndarray):
+        t = self.limiter_threshold
+        level = self._tmp[:len(out)]
+        np.abs(out, out=level)
+        over = level > t
+        if over.any():
+            peaks = out[over]
+            out[over] = np.sign(peaks) * (t + (1.0 - t) * np.tanh((np.abs(peaks) - t) / (1.0 - t)))
+
+    def process(self, data: np.ndarray, src_rate: int, dst_rate: int,
+                gain: float = 1.0, pitch: float = 0.0) -> np.ndarray:
+        """
+        data: mono float32. Return view ke buffer internal, valid sampai
+        process() berikutnya (pemanggil menyalinnya ke ring buffer).
+        """
+        pitch = min(max(float(pitch or 0.0), -MAX_PITCH_SEMITONES), MAX_PITCH_SEMITONES)
+        # Jumlah sample input per sample output
+        step = src_rate * (2.0 ** (pitch / 12.0)) / dst_rate
+        n_out = int(len(data) / step)
+        if n_out <= 0:
+            return self._out[:0]
+        self._ensure(n_out)
+        out = self._out[:n_out]
+
+        t0 = time.perf_counter()
+        if step == 1.0:
+            np.copyto(out, data[:n_out])
+        else:
+            self._resample_into(data, out, step)
+        t1 = time.perf_counter()
+        if gain != 1.0:
+            out *= gain
+        t2 = time.perf_counter()
+        self._limit(out)
+        t3 = time.perf_counter()
+
+        self.clips += 1
+        self.timings["resample"] += t1 - t0
+        self.timings["gain"] += t2 - t1
+        self.timings["limiter"] += t3 - t2
+        return out
+
+    def stats(self) -> Dict:
+        """Rata-rata waktu per clip (ms) untuk tiap tahap."""
+        clips = self.clips or 1
+        result = {f"{stage}_ms": round(self.timings[stage] / clips * 1000, 3) for stage in self.STAGES}
+        result["clips"] = self.clips
+        result["buffer_samples"] = self._capacity
+        return result
@@ -0,0 +1,377 @@
+# modules_server/audio_engine.py
+"""
+Audio engine long-lived untuk playback TTS.
+
+• Satu sd.OutputStream per device (speaker default & virtual mic) yang
+  tetap terbuka → tidak ada biaya buka device per kalimat
+• Tiap device punya ring buffer SPSC: thread feeder menulis, callback
+  PortAudio membaca. Index baca/tulis masing-masing hanya diubah oleh satu
+  pihak, jadi callback tidak pernah menunggu lock
+• Rantai DSP (audio_dsp): normalisasi loudness sekali per clip, lalu
+  resample ke rate device + pitch, gain per device (mis. boost virtual mic
+  1.4x) dan soft limiter di thread feeder, in-place di buffer yang dipakai
+  ulang. Callback realtime hanya menyalin dari ring buffer
+• Event start/end per playback dihitung dari posisi sample yang benar-benar
+  sudah dikonsumsi callback, bukan estimasi durasi
+"""
+
+import time
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from modules_server.audio_dsp import DSPChain, loudness_gain
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+
+class RingBuffer:
+    """Ring buffer float32 single-producer / single-consumer."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self._read = 0    # hanya diubah consumer (callback)
+        self._write = 0   # hanya diubah producer (feeder)
+
+    def available(self) -> int:
+        return self._write - self._read
+
+    def free(self) -> int:
+        return self.capacity - self.available()
+
+    def write(self, data: np.ndarray) -> int:
+        n = min(len(data), self.free())
+        if n <= 0:
+            return 0
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        if n > first:
+            self._buf[:n - first] = data[first:n]
+        self._write += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        n = min(len(out), self.available())
+        if n > 0:
+            start = self._read % self.capacity
+            first = min(n, self.capacity - start)
+            out[:first] = self._buf[start:start + first]
+            if n > first:
+                out[first:n] = self._buf[:n - first]
+            self._read += n
+        return n
+
+    def clear(self):
+        self._read = self._write
+
+
+class PlaybackHandle:
+    """Status satu playback di satu atau lebih device."""
+
+    def __init__(self, on_start: Callable = None, on_finished: Callable = None):
+        self.on_start = on_start
+        self.on_finished = on_finished
+        self.started = threading.Event()
+        self.finished = threading.Event()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+        self._pending_devices = 0
+        self._lock = threading.Lock()
+
+    def _mark_started(self):
+        with self._lock:
+            if self.started.is_set():
+                return
+            self.started_at = time.time()
+            self.started.set()
+        if self.on_start:
+            try:
+                self.on_start()
+            except Exception as e:
+                logger.error(f"Audio on_start error: {e}")
+
+    def _device_done(self):
+        with self._lock:
+            self._pending_devices -= 1
+            if self._pending_devices > 0 or self.finished.is_set():
+                return
+            self.finished_at = time.time()
+            self.finished.set()
+        if self.on_finished:
+            try:
+                self.on_finished()
+            except Exception as e:
+                logger.error(f"Audio on_finished error: {e}")
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.finished.wait(timeout)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DeviceOutput:
+    """OutputStream persisten untuk satu device."""
+
+    def __init__(self, device: Optional[int], samplerate: int = None, channels: int = 2,
+                 gain: float = 1.0, buffer_seconds: float = 30.0, blocksize: int = 512):
+        import sounddevice as sd
+
+        info = sd.query_devices(device, "output")
+        self.device = device
+        self.samplerate = int(samplerate or info["default_samplerate"])
+        self.channels = max(1, min(channels, int(info["max_output_channels"])))
+        self.gain = gain
+        self.ring = RingBuffer(int(self.samplerate * buffer_seconds))
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._markers: List[Tuple[int, int, PlaybackHandle]] = []  # (start, end, handle)
+        self._markers_lock = threading.Lock()
+        self._progress = threading.Event()
+        self._mono = np.zeros(blocksize * 4, dtype=np.float32)
+        self.underruns = 0
+        self._feeding = False
+        self._flush_requested = False
+        self._current: Optional[PlaybackHandle] = None  # clip yang sedang diproses feeder
+        self.dsp = DSPChain()  # hanya dipakai thread feeder
+
+        self.stream = sd.OutputStream(
+            device=device, samplerate=self.samplerate, channels=self.channels,
+            dtype="float32", blocksize=blocksize, latency="low", callback=self._callback,
+        )
+        self.stream.start()
+        threading.Thread(target=self._feeder, daemon=True).start()
+        threading.Thread(target=self._notifier, daemon=True).start()
+
+    # ─── Realtime callback ──────────────────────────────────────────
+    def _callback(self, outdata, frames, time_info, status):
+        if len(self._mono) < frames:
+            self._mono = np.zeros(frames, dtype=np.float32)
+        mono = self._mono[:frames]
+        if self._flush_requested:
+            # Clear dilakukan di sisi consumer supaya index baca tetap SPSC
+            self._flush_requested = False
+            self.ring.clear()
+        n = self.ring.read_into(mono)
+        if n < frames:
+            mono[n:] = 0.0
+            # Ring kosong padahal feeder masih menulis clip → underrun sungguhan
+            if self._feeding:
+                self.underruns += 1
+        outdata[:] = mono[:, None]
+        if n:
+            self._progress.set()
+
+    # ─── Producer ───────────────────────────────────────────────────
+    def enqueue(self, data: np.ndarray, samplerate: int, handle: PlaybackHandle,
+                gain: float = 1.0, pitch: float = 0.0):
+        """data: PCM mono float32 mentah; DSP dijalankan di thread feeder."""
+        self._queue.put(((data, samplerate, gain, pitch), handle))
+
+    def _feeder(self):
+        while True:
+            (raw, samplerate, gain, pitch), handle = self._queue.get()
+            with self._markers_lock:
+                self._current = handle
+            if handle.cancelled:
+                self._finish_current(handle)
+                continue
+            self.gain = gain
+            data = self.dsp.process(raw, samplerate, self.samplerate, gain, pitch)
+            if handle.cancelled:
+                # flush() saat DSP berjalan: clip belum punya marker, jangan ditulis ke ring
+                self._finish_current(handle)
+                continue
+            start = self.ring._write
+            with self._markers_lock:
+                self._markers.append((start, start + len(data), handle))
+            offset = 0
+            self._feeding = True
+            while offset < len(data):
+                if handle.cancelled:
+                    break
+                written = self.ring.write(data[offset:])
+                offset += written
+                if written == 0:
+                    time.sleep(0.01)
+            self._feeding = not self._queue.empty()
+            with self._markers_lock:
+                self._current = None
+                if offset < len(data):
+                    # Dibatalkan di tengah: geser akhir marker ke posisi terakhir yang ditulis
+                    self._markers = [(s, (s + offset if h is handle else e), h)
+                                     for s, e, h in self._markers]
+            self._progress.set()
+
+    def _finish_current(self, handle: PlaybackHandle):
+        with self._markers_lock:
+            self._current = None
+        handle._device_done()
+
+    def _notifier(self):
+        while True:
+            self._progress.wait(0.05)
+            self._progress.clear()
+            played = self.ring._read
+            with self._markers_lock:
+                markers = list(self._markers)
+            done = []
+            for start, end, handle in markers:
+                if played > start or (end == start and played >= start):
+                    handle._mark_started()
+                if played >= end:
+                    done.append((start, end, handle))
+            if done:
+                with self._markers_lock:
+                    self._markers = [m for m in self._markers if m not in done]
+                for _, _, handle in done:
+                    handle._device_done()
+
+    def flush(self):
+        """Buang audio yang belum diputar (cancel / barge-in)."""
+        # Clip yang masih antri di feeder ikut dibatalkan
+        while True:
+            try:
+                _, handle = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            handle.cancel()
+            handle._device_done()
+        with self._markers_lock:
+            # Termasuk clip yang sudah diambil feeder tapi masih di DSP (belum punya marker)
+            if self._current is not None:
+                self._current.cancel()
+            for _, _, handle in self._markers:
+                handle.cancel()
+        self._flush_requested = True
+        self._progress.set()
+
+    def close(self):
+        try:
+            self.stream.stop()
+            self.stream.close()
+        except Exception:
+            pass
+
+
+class AudioEngine:
+    """Routing playback ke device output yang selalu terbuka."""
+
+    def __init__(self, target_loudness_db: float = -20.0):
+        self._outputs: Dict[Optional[int], DeviceOutput] = {}
+        self._lock = threading.Lock()
+        self.target_loudness_db = target_loudness_db
+        self._loudness_time = 0.0
+        self._loudness_clips = 0
+
+    def output(self, device: Optional[int]) -> DeviceOutput:
+        with self._lock:
+            out = self._outputs.get(device)
+            if out is None:
+                out = self._outputs[device] = DeviceOutput(device)
+                logger.info(f"Audio engine: stream dibuka di device {device} ({out.samplerate} Hz)")
+            return out
+
+    def play(self, data: np.ndarray, samplerate: int, devices: List[Tuple[Optional[int], float]],
+             on_start: Callable = None, on_finished: Callable = None,
+             pitch: float = 0.0, normalize: bool = True) -> PlaybackHandle:
+        """
+        Antrikan PCM ke device (list (device_index, gain); None = speaker default).
+        Return handle yang selesai setelah semua device memutar sample terakhir.
+        """
+        data = np.asarray(data, dtype=np.float32)
+        if data.ndim > 1:
+            data = data.mean(axis=1, dtype=np.float32)
+        data = np.ascontiguousarray(data)
+
+        # Loudness dihitung sekali per clip, dipakai semua device
+        norm = 1.0
+        if normalize:
+            t0 = time.perf_counter()
+            norm = loudness_gain(data, samplerate, self.target_loudness_db)
+            self._loudness_time += time.perf_counter() - t0
+            self._loudness_clips += 1
+
+        # Buka semua stream dulu: device yang gagal dibuka tidak ikut dihitung,
+        # supaya handle tetap selesai saat device lain selesai memutar
+        outputs = []
+        error = None
+        for device, gain in devices:
+            try:
+                outputs.append((self.output(device), gain))
+            except Exception as e:
+                error = e
+                logger.error(f"Audio engine: gagal membuka device {device}: {e}")
+        if not outputs:
+            raise error or ValueError("Tidak ada device output")
+
+        handle = PlaybackHandle(on_start, on_finished)
+        handle._pending_devices = len(outputs)
+        for out, gain in outputs:
+            out.enqueue(data, samplerate, handle, gain * norm, pitch)
+        return handle
+
+    def flush(self):
+        with self._lock:
+            outputs = list(self._outputs.values())
+        for out in outputs:
+            out.flush()
+
+    def close(self):
+        with self._lock:
+            for out in self._outputs.values():
+                out.close()
+            self._outputs.clear()
+
+    def status(self) -> Dict:
+        with self._lock:
+            status = {
+                str(device): {
+                    "samplerate": out.samplerate,
+                    "gain": round(out.gain, 3),
+                    "buffered_ms": int(out.ring.available() / out.samplerate * 1000),
+                    "underruns": out.underruns,
+                    "dsp": out.dsp.stats(),
+                }
+                for device, out in self._outputs.items()
+            }
+            clips = self._loudness_clips or 1
+            status["loudness_ms"] = round(self._loudness_time / clips * 1000, 3)
+            return status
+
+
+_audio_engine: Optional[AudioEngine] = None
+_audio_engine_lock = threading.Lock()
+
+
+def get_audio_engine() -> AudioEngine:
+    global _audio_engine
+    with _audio_engine_lock:
+        if _audio_engine is None:
+            _audio_engine = AudioEngine()
+        return _audio_engine
+
+
+def play_routed(data: np.ndarray, samplerate: int, device_index: Optional[int] = None,
+                also_play_on_speaker: bool = True, boost_vm: bool = False,
+                on_start: Callable = None, on_finished: Callable = None,
+                pitch: float = 0.0) -> PlaybackHandle:
+    """
+    Routing standar StreamMate: speaker saja, virtual mic saja, atau dual
+    output (speaker + virtual mic dengan boost opsional 1.4x).
+    """
+    devices: List[Tuple[Optional[int], float]] = []
+    if device_index is not None:
+        devices.append((device_index, 1.4 if boost_vm else 1.0))
+        if also_play_on_speaker:
+            devices.append((None, 1.0))
+    else:
+        devices.append((None, 1.0))
+    return get_audio_engine().play(data, samplerate, devices, on_start=on_start, on_finished=on_finished,
+                                   pitch=pitch)
@@ -233,6 +233,21 @@ class BillingSecurityDB:
             "last_heartbeat": now
         }
     
+    def get_session_email(self, session_id: str) -> Optional[str]:
+        """Email pemilik session yang masih aktif (None kalau tidak ada)."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT email FROM user_sessions
+            WHERE session_id = ? AND is_active = 1
+        ''', (session_id,))
+        
+        result = cursor.fetchone()
+        conn.close()
+        
+        return result[0] if result else None
+    
     def end_session(self, session_id: str) -> Dict[str, Any]:
         """End session dan calculate final usage."""
         conn = sqlite3.connect(self.db_path)
@@ -1,31 +1,41 @@
 # modules_server/deepseek_ai.py
 
-import os
-import json
-import requests
+from typing import Dict, Optional, Tuple
+
 from dotenv import load_dotenv
 
+from modules_server.llm_router import get_router
+
 load_dotenv()
 
-API_KEY = os.getenv("DEEPSEEK_API_KEY")
-ENDPOINT = "https://api.deepseek.com/v1/chat/completions"
-
-def generate_reply(prompt: str) -> str | None:
-    headers = {
-        "Authorization": f"Bearer {API_KEY}",
-        "Content-Type":  "application/json",
-    }
-    payload = {
-        "model":       "deepseek-chat",
-        "messages":    [{"role": "user", "content": prompt}],
-        "max_tokens":  400,
-        "temperature": 0.8,
-        "top_p":       0.95,
-    }
-    try:
-        resp = requests.post(ENDPOINT, headers=headers, json=payload, timeout=30)
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"].strip()
-    except Exception as e:
-        print(f"[deepseek_ai] ERROR calling {ENDPOINT!r}: {e}")
-        return None
+# Parameter generate untuk balasan CoHost (juga bagian dari key reply cache)
+REPLY_PARAMS = {"max_tokens": 400, "temperature": 0.8, "top_p": 0.95}
+
+
+def _build_messages(prompt: str, system: str = None) -> list:
+    # System prefix dikirim sebagai message terpisah supaya prefix cache provider kena
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    return messages
+
+
+def generate_reply_with_usage(prompt: str, system: str = None) -> Tuple[Optional[str], Dict]:
+    """Generate balasan AI beserta info usage token (prompt/cached/completion)."""
+    reply, usage = get_router().generate_with_usage(
+        messages=_build_messages(prompt, system), **REPLY_PARAMS
+    )
+    if reply is None:
+        print("[deepseek_ai] ERROR: semua provider LLM gagal")
+    return reply, usage
+
+
+def generate_reply(prompt: str, system: str = None) -> str | None:
+    """
+    Generate balasan AI. Nama modul dipertahankan untuk kompatibilitas;
+    request sekarang dirutekan ke provider tercepat lewat llm_router
+    (DeepSeek tetap provider default).
+    """
+    reply, _ = generate_reply_with_usage(prompt, system)
+    return reply
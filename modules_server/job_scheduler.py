@@ -0,0 +1,242 @@
+# modules_server/job_scheduler.py
+"""
+Scheduler job upstream (LLM) untuk server AI.
+
+• Concurrency upstream dibatasi (AI_MAX_CONCURRENCY), panggilan blocking
+  dijalankan di thread pool sehingga event loop FastAPI tidak pernah macet
+• Weighted fair queuing per user: setiap job diberi virtual finish tag
+  max(virtual_time, tag_terakhir_user) + 1/bobot, job dengan tag terkecil
+  jalan duluan. Bobot dari tier lisensi (billing_db), jadi satu streamer
+  yang spam request tidak bisa menghabiskan slot user lain. Identitas &
+  tier diambil dari session billing yang aktif, bukan dari email yang
+  dikirim client; tanpa session valid → anonim per IP, tier terendah
+• Load shedding eksplisit:
+    429 kalau antrian user penuh (AI_USER_QUEUE_LIMIT)
+    503 kalau antrian global penuh (AI_MAX_QUEUE) atau job kelamaan
+        menunggu (AI_QUEUE_DEADLINE detik)
+  keduanya dengan perkiraan Retry-After.
+"""
+
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_TIER_WEIGHTS = {"demo": 1.0, "basic": 2.0, "pro": 4.0}
+
+
+class SchedulerRejected(Exception):
+    """Request ditolak scheduler; dipetakan ke HTTP status + Retry-After."""
+
+    def __init__(self, status_code: int, message: str, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class _Job:
+    __slots__ = ("user", "fn", "tag", "enqueued_at", "started", "future", "abandoned")
+
+    def __init__(self, user: str, fn: Callable, tag: float, loop):
+        self.user = user
+        self.fn = fn
+        self.tag = tag
+        self.enqueued_at = time.time()
+        self.started = asyncio.Event()
+        self.future = loop.create_future()
+        self.abandoned = False
+
+
+class FairScheduler:
+    """Weighted fair queue + bounded concurrency untuk panggilan upstream."""
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 200,
+                 user_queue_limit: int = 10, queue_deadline: float = 10.0,
+                 tier_weights: Dict[str, float] = None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.user_queue_limit = user_queue_limit
+        self.queue_deadline = queue_deadline
+        self.tier_weights = tier_weights or dict(DEFAULT_TIER_WEIGHTS)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                            thread_name_prefix="ai-upstream")
+        self._heap = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._user_tags: Dict[str, float] = defaultdict(float)
+        self._user_queued: Dict[str, int] = defaultdict(int)
+        self._queued = 0
+        self._running = 0
+        self._avg_service = 2.0  # EWMA durasi upstream (detik)
+
+        self.completed = 0
+        self.rejected_429 = 0
+        self.rejected_503 = 0
+        self.expired = 0
+
+    def weight(self, tier: str) -> float:
+        return self.tier_weights.get(tier or "demo", 1.0)
+
+    def _retry_after(self, queued: int) -> int:
+        # Perkiraan waktu sampai antrian di depan selesai
+        return max(1, math.ceil((queued + 1) * self._avg_service / self.max_concurrency))
+
+    # ─── Queue ──────────────────────────────────────────────────────
+    def _enqueue(self, user: str, tier: str, fn: Callable) -> _Job:
+        if self._user_queued[user] >= self.user_queue_limit:
+            self.rejected_429 += 1
+            raise SchedulerRejected(429, "Terlalu banyak request antri untuk user ini",
+                                    self._retry_after(self._user_queued[user]))
+        if self._queued >= self.max_queue:
+            self.rejected_503 += 1
+            raise SchedulerRejected(503, "Server AI sedang penuh", self._retry_after(self._queued))
+
+        tag = max(self._virtual_time, self._user_tags[user]) + 1.0 / self.weight(tier)
+        self._user_tags[user] = tag
+        job = _Job(user, fn, tag, asyncio.get_running_loop())
+        heapq.heappush(self._heap, (tag, next(self._seq), job))
+        self._user_queued[user] += 1
+        self._queued += 1
+        return job
+
+    def _dequeue_accounting(self, job: _Job):
+        self._queued -= 1
+        self._user_queued[job.user] -= 1
+        if self._user_queued[job.user] <= 0:
+            del self._user_queued[job.user]
+
+    def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while self._running < self.max_concurrency and self._heap:
+            tag, _, job = heapq.heappop(self._heap)
+            if job.abandoned:
+                continue
+            self._dequeue_accounting(job)
+            self._virtual_time = tag
+            self._running += 1
+            job.started.set()
+            started_at = time.time()
+            task = loop.run_in_executor(self._executor, job.fn)
+            task.add_done_callback(lambda t, j=job, s=started_at: self._on_done(t, j, s))
+
+        # Bersihkan tag user yang sudah idle supaya dict tidak tumbuh terus
+        if not self._heap and len(self._user_tags) > 1000:
+            self._user_tags.clear()
+
+    def _on_done(self, task, job: _Job, started_at: float):
+        self._running -= 1
+        self.completed += 1
+        self._avg_service = 0.8 * self._avg_service + 0.2 * (time.time() - started_at)
+        if not job.future.done():
+            if task.exception() is not None:
+                job.future.set_exception(task.exception())
+            else:
+                job.future.set_result(task.result())
+        self._dispatch()
+
+    async def submit(self, user: str, tier: str, fn: Callable):
+        """Jalankan fn() (blocking) lewat antrian fair-share; raise SchedulerRejected bila di-shed."""
+        job = self._enqueue(user, tier, fn)
+        self._dispatch()
+        try:
+            await asyncio.wait_for(job.started.wait(), timeout=self.queue_deadline)
+        except asyncio.TimeoutError:
+            # Timeout bisa balapan dengan _dispatch: kalau job sudah jalan,
+            # accounting-nya sudah dikurangi di sana → tunggu hasilnya saja
+            if not job.started.is_set():
+                job.abandoned = True
+                self._dequeue_accounting(job)
+                self.expired += 1
+                self.rejected_503 += 1
+                raise SchedulerRejected(503, "Antrian server AI terlalu lama", self._retry_after(self._queued))
+        return await job.future
+
+    def status(self) -> Dict:
+        return {
+            "running": self._running,
+            "max_concurrency": self.max_concurrency,
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+            "queued_users": len(self._user_queued),
+            "avg_service_time": round(self._avg_service, 3),
+            "completed": self.completed,
+            "rejected_429": self.rejected_429,
+            "rejected_503": self.rejected_503,
+            "expired": self.expired,
+        }
+
+
+class TierResolver:
+    """Identitas + tier user dari session & license cache billing_db, di-cache sebentar di memori."""
+
+    def __init__(self, billing_db, ttl: float = 60.0):
+        self.billing_db = billing_db
+        self.ttl = ttl
+        self._cache: Dict[str, tuple] = {}
+        self._sessions: Dict[str, tuple] = {}
+
+    def identify(self, session_id: Optional[str], client_host: Optional[str]) -> Tuple[str, str]:
+        """
+        (user, tier) untuk fair-share. User hanya dikenali lewat session
+        aktif di billing_db (dibuat saat tracking lisensi dimulai); email
+        di body request tidak dipercaya. Tanpa session → anonim per IP, "demo".
+        """
+        email = self._session_email(session_id) if session_id else None
+        if not email:
+            return f"ip:{client_host or 'anonymous'}", "demo"
+        return email, self.tier(email)
+
+    def _session_email(self, session_id: str) -> Optional[str]:
+        now = time.time()
+        cached = self._sessions.get(session_id)
+        if cached and now - cached[1] < self.ttl:
+            return cached[0]
+        email = None
+        try:
+            email = self.billing_db.get_session_email(session_id)
+        except Exception as e:
+            print(f"[job_scheduler] Gagal baca session: {e}")
+        if len(self._sessions) > 10000:
+            self._sessions.clear()
+        self._sessions[session_id] = (email, now)
+        return email
+
+    def tier(self, email: Optional[str]) -> str:
+        if not email:
+            return "demo"
+        now = time.time()
+        cached = self._cache.get(email)
+        if cached and now - cached[1] < self.ttl:
+            return cached[0]
+        tier = "demo"
+        try:
+            info = self.billing_db.get_license_cache(email, max_age_hours=24)
+            if info and info.get("is_valid"):
+                tier = info.get("tier", "basic")
+        except Exception as e:
+            print(f"[job_scheduler] Gagal baca tier {email}: {e}")
+        if len(self._cache) > 10000:
+            self._cache.clear()
+        self._cache[email] = (tier, now)
+        return tier
+
+
+def scheduler_from_env() -> FairScheduler:
+    weights = dict(DEFAULT_TIER_WEIGHTS)
+    for item in os.getenv("AI_TIER_WEIGHTS", "").split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            weights[name.strip()] = float(value)
+    return FairScheduler(
+        max_concurrency=int(os.getenv("AI_MAX_CONCURRENCY", "8")),
+        max_queue=int(os.getenv("AI_MAX_QUEUE", "200")),
+        user_queue_limit=int(os.getenv("AI_USER_QUEUE_LIMIT", "10")),
+        queue_deadline=float(os.getenv("AI_QUEUE_DEADLINE", "10")),
+        tier_weights=weights,
+    )
@@ -0,0 +1,301 @@
+# modules_server/llm_router.py
+"""
+Router multi-provider untuk backend /ai_reply.
+
+Semua provider memakai API OpenAI-compatible (DeepSeek, OpenAI, Groq,
+Together, OpenRouter, dst.) lewat paket `openai` dengan base_url berbeda.
+Tiap provider punya statistik latency/error rolling, batas concurrency,
+dan akuntansi token/biaya. Setiap request dikirim ke provider sehat dengan
+skor terbaik (latency p95 + penalti error x timeout + bobot biaya); kalau gagal,
+lanjut ke provider berikutnya.
+
+LLM_COST_WEIGHT (env) menukar biaya dengan latency: skor += bobot x
+(biaya input + output per 1k token), mis. 1000 → $0.001/1k setara 1 detik.
+
+Konfigurasi provider tambahan di config/llm_providers.json:
+    [
+      {"name": "deepseek", "base_url": "https://api.deepseek.com/v1",
+       "api_key_env": "DEEPSEEK_API_KEY", "model": "deepseek-chat",
+       "max_concurrency": 8, "cost_per_1k_input": 0.00027,
+       "cost_per_1k_output": 0.0011, "timeout": 30}
+    ]
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROVIDERS_FILE = Path(os.getenv("LLM_PROVIDERS_FILE", "config/llm_providers.json"))
+
+DEFAULT_PROVIDERS = [
+    {
+        "name": "deepseek",
+        "base_url": "https://api.deepseek.com/v1",
+        "api_key_env": "DEEPSEEK_API_KEY",
+        "model": "deepseek-chat",
+        "max_concurrency": 8,
+        "cost_per_1k_input": 0.00027,
+        "cost_per_1k_output": 0.0011,
+        "timeout": 30,
+    },
+]
+
+
+class ProviderStats:
+    """Statistik rolling (latency, error) plus akumulasi token & biaya."""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)  # (timestamp, latency, ok)
+        self._lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost = 0.0
+        self.requests = 0
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self._samples.append((time.time(), latency, ok))
+            self.requests += 1
+            self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+    def record_usage(self, prompt_tokens: int, completion_tokens: int, cached_tokens: int, cost: float):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cached_tokens += cached_tokens
+            self.cost += cost
+
+    def p95(self) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(lat for _, lat, ok in self._samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self._samples:
+                return 0.0
+            return sum(1 for _, _, ok in self._samples if not ok) / len(self._samples)
+
+    def snapshot(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "p95_latency": self.p95(),
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self.consecutive_failures,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost": round(self.cost, 6),
+        }
+
+
+class LLMProvider:
+    """Satu provider OpenAI-compatible + model."""
+
+    def __init__(self, name: str, base_url: str, model: str, api_key: str = None,
+                 api_key_env: str = None, max_concurrency: int = 8,
+                 cost_per_1k_input: float = 0.0, cost_per_1k_output: float = 0.0,
+                 timeout: float = 30, cooldown: float = 30.0, **_):
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.api_key = api_key or (os.getenv(api_key_env) if api_key_env else None)
+        self.max_concurrency = max_concurrency
+        self.cost_per_1k_input = cost_per_1k_input
+        self.cost_per_1k_output = cost_per_1k_output
+        self.timeout = timeout
+        self.cooldown = cooldown
+
+        self.stats = ProviderStats()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        self._cooldown_until = 0.0
+        self._client = None
+
+    @property
+    def client(self):
+        # Client dibuat sekali dan dipakai ulang (koneksi HTTP keep-alive)
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                  timeout=self.timeout, max_retries=0)
+        return self._client
+
+    def is_healthy(self) -> bool:
+        return bool(self.api_key) and time.time() >= self._cooldown_until
+
+    def try_acquire(self) -> bool:
+        if self._slots.acquire(blocking=False):
+            with self._in_flight_lock:
+                self._in_flight += 1
+            return True
+        return False
+
+    def release(self):
+        with self._in_flight_lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def score(self, cost_weight: float = 0.0) -> float:
+        """Skor lebih kecil = lebih baik."""
+        p95 = self.stats.p95()
+        if p95 is not None:
+            latency = p95
+        elif self.stats.requests:
+            # Sudah pernah dicoba tapi belum pernah sukses: anggap selambat timeout
+            latency = float(self.timeout)
+        else:
+            # Provider tanpa data dianggap optimis supaya langsung dicoba sekali
+            latency = 0.0
+        # Penalti error aditif: tiap request gagal kira-kira menghabiskan satu timeout
+        penalty = self.stats.error_rate() * self.timeout
+        load = 1.0 + self._in_flight / max(1, self.max_concurrency)
+        cost = (self.cost_per_1k_input + self.cost_per_1k_output) * cost_weight
+        return (latency + penalty) * load + cost
+
+    def complete(self, messages: List[Dict], **params) -> Tuple[str, Dict]:
+        start = time.time()
+        try:
+            resp = self.client.chat.completions.create(
+                model=self.model, messages=messages, **params
+            )
+        except Exception:
+            self.stats.record(time.time() - start, ok=False)
+            error_burst = self.stats.requests >= 10 and self.stats.error_rate() > 0.5
+            if self.stats.consecutive_failures >= 3 or error_burst:
+                self._cooldown_until = time.time() + self.cooldown
+            raise
+
+        self.stats.record(time.time() - start, ok=True)
+        usage = getattr(resp, "usage", None)
+        usage_info = {"provider": self.name, "model": self.model}
+        if usage is not None:
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            # DeepSeek: prompt_cache_hit_tokens; OpenAI: prompt_tokens_details.cached_tokens
+            cached = getattr(usage, "prompt_cache_hit_tokens", None)
+            if cached is None:
+                details = getattr(usage, "prompt_tokens_details", None)
+                cached = getattr(details, "cached_tokens", 0) if details else 0
+            cost = (prompt_tokens * self.cost_per_1k_input
+                    + completion_tokens * self.cost_per_1k_output) / 1000
+            self.stats.record_usage(prompt_tokens, completion_tokens, cached or 0, cost)
+            usage_info.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                              cached_tokens=cached or 0)
+
+        return resp.choices[0].message.content.strip(), usage_info
+
+    def status(self) -> Dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "healthy": self.is_healthy(),
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            **self.stats.snapshot(),
+        }
+
+
+class LLMRouter:
+    """Pilih provider tercepat yang sehat, failover ke provider berikutnya."""
+
+    def __init__(self, providers: List[LLMProvider], cost_weight: float = 0.0,
+                 queue_timeout: float = 5.0, explore_rate: float = 0.05):
+        self.providers = providers
+        self.cost_weight = cost_weight
+        self.queue_timeout = queue_timeout
+        self.explore_rate = explore_rate
+
+    def _ranked(self) -> List[LLMProvider]:
+        healthy = [p for p in self.providers if p.is_healthy()]
+        # Semua cooldown → tetap coba yang punya API key
+        candidates = healthy or [p for p in self.providers if p.api_key]
+        ranked = sorted(candidates, key=lambda p: p.score(self.cost_weight))
+        # Sesekali kirim ke provider lain supaya statistiknya tetap segar
+        if len(ranked) > 1 and random.random() < self.explore_rate:
+            ranked.insert(0, ranked.pop(random.randrange(1, len(ranked))))
+        return ranked
+
+    def _acquire(self, ranked: List[LLMProvider]) -> Optional[LLMProvider]:
+        """Ambil slot di provider terbaik yang belum penuh; tunggu sebentar jika semua penuh."""
+        deadline = time.time() + self.queue_timeout
+        while True:
+            for provider in ranked:
+                if provider.try_acquire():
+                    return provider
+            if time.time() >= deadline:
+                return None
+            time.sleep(0.02)
+
+    def generate(self, prompt: str = None, messages: List[Dict] = None,
+                 max_tokens: int = 400, temperature: float = 0.8, top_p: float = 0.95) -> Optional[str]:
+        reply, _ = self.generate_with_usage(prompt, messages, max_tokens, temperature, top_p)
+        return reply
+
+    def generate_with_usage(self, prompt: str = None, messages: List[Dict] = None,
+                            max_tokens: int = 400, temperature: float = 0.8,
+                            top_p: float = 0.95) -> Tuple[Optional[str], Dict]:
+        """Seperti generate(), plus info usage token dari provider yang menjawab."""
+        if messages is None:
+            messages = [{"role": "user", "content": prompt or ""}]
+
+        tried = set()
+        while True:
+            ranked = [p for p in self._ranked() if p.name not in tried]
+            if not ranked:
+                return None, {}
+            provider = self._acquire(ranked)
+            if provider is None:
+                print("[llm_router] Semua provider penuh (concurrency limit)")
+                return None, {}
+
+            tried.add(provider.name)
+            try:
+                return provider.complete(messages, max_tokens=max_tokens,
+                                         temperature=temperature, top_p=top_p)
+            except Exception as e:
+                print(f"[llm_router] ERROR provider {provider.name!r}: {e}")
+            finally:
+                provider.release()
+
+    def status(self) -> List[Dict]:
+        return [p.status() for p in self.providers]
+
+
+def load_providers(path: Path = PROVIDERS_FILE) -> List[LLMProvider]:
+    specs = DEFAULT_PROVIDERS
+    if path.exists():
+        try:
+            specs = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"[llm_router] Gagal baca {path}: {e}, pakai default")
+    return [LLMProvider(**spec) for spec in specs]
+
+
+_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> LLMRouter:
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = LLMRouter(
+                load_providers(),
+                cost_weight=float(os.getenv("LLM_COST_WEIGHT", "0")),
+            )
+        return _router
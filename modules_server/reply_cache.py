@@ -0,0 +1,216 @@
+# modules_server/reply_cache.py
+"""
+Cache balasan /ai_reply yang dipakai bersama semua client, plus
+single-flight: request identik yang datang bersamaan cukup memicu satu
+panggilan ke provider LLM, sisanya menunggu dan memakai hasil yang sama.
+
+Key = hash dari prompt yang dinormalisasi (whitespace & huruf besar/kecil)
++ system prompt + parameter model. Konfigurasi lewat env:
+    REPLY_CACHE_TTL   (detik, default 300; 0 = nonaktif)
+    REPLY_CACHE_SIZE  (jumlah entry, default 2000)
+"""
+
+import os
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+
+def normalize_prompt(text: str) -> str:
+    return " ".join((text or "").split()).casefold()
+
+
+def make_key(text: str, system: str = None, **params) -> str:
+    parts = [normalize_prompt(text), normalize_prompt(system or "")]
+    parts += [f"{k}={params[k]}" for k in sorted(params)]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """Satu panggilan upstream yang sedang berjalan untuk sebuah key."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class _LeaderCancelled(Exception):
+    """Leader flight async dibatalkan; waiter mencoba lagi, bukan ikut batal."""
+
+
+class ReplyCache:
+    """LRU + TTL in-memory dengan single-flight coalescing."""
+
+    def __init__(self, max_entries: int = 2000, ttl: float = 300.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._flights: Dict[str, _Flight] = {}
+        self._async_flights: Dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+
+    def _get(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if now >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: str, value, now: float):
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, key: str, compute: Callable[[], object],
+                       cacheable: Callable[[object], bool] = bool) -> Tuple[object, str]:
+        """
+        Return (value, source) dengan source "hit", "coalesced" atau "miss".
+        compute() hanya dipanggil oleh request pertama untuk key tersebut;
+        hasilnya disimpan kalau cacheable(value) True.
+        """
+        now = time.time()
+        with self._lock:
+            if self.ttl > 0:
+                value = self._get(key, now)
+                if value is not None:
+                    self.hits += 1
+                    return value, "hit"
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+                self.upstream_calls += 1
+            else:
+                flight.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, "coalesced"
+
+        try:
+            flight.result = compute()
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.upstream_errors += 1
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+                if flight.error is None and self.ttl > 0 and cacheable(flight.result):
+                    self._put(key, flight.result, time.time())
+            flight.done.set()
+
+        return flight.result, "miss"
+
+    async def get_or_compute_async(self, key: str, compute: Callable[[], Awaitable],
+                                   cacheable: Callable[[object], bool] = bool,
+                                   retry_on: Tuple[type, ...] = ()) -> Tuple[object, str]:
+        """
+        Versi asyncio: waiter menunggu Future, bukan memblokir thread.
+        Error leader bertipe retry_on (mis. penolakan scheduler untuk user
+        leader) tidak diteruskan ke waiter; waiter mencoba lagi dengan
+        compute() miliknya sendiri. Begitu juga kalau task leader dibatalkan
+        (client putus): pembatalan tidak pernah disimpan di Future bersama.
+        """
+        with self._lock:
+            if self.ttl > 0:
+                value = self._get(key, time.time())
+                if value is not None:
+                    self.hits += 1
+                    return value, "hit"
+            flight = self._async_flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._async_flights[key] = asyncio.get_running_loop().create_future()
+                self.misses += 1
+                self.upstream_calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            try:
+                return await asyncio.shield(flight), "coalesced"
+            except (_LeaderCancelled,) + tuple(retry_on):
+                # Flight gagal sudah dilepas; request ini jadi leader baru atau ikut flight berikutnya
+                return await self.get_or_compute_async(key, compute, cacheable, retry_on)
+
+        try:
+            result = await compute()
+        except asyncio.CancelledError:
+            with self._lock:
+                self._async_flights.pop(key, None)
+            flight.set_exception(_LeaderCancelled())
+            flight.exception()
+            raise
+        except BaseException as e:
+            with self._lock:
+                self.upstream_errors += 1
+                self._async_flights.pop(key, None)
+            flight.set_exception(e)
+            flight.exception()  # tandai sudah diambil supaya tidak ada warning
+            raise
+
+        with self._lock:
+            self._async_flights.pop(key, None)
+            if self.ttl > 0 and cacheable(result):
+                self._put(key, result, time.time())
+        flight.set_result(result)
+        return result, "miss"
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            requests = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "capacity": self.max_entries,
+                "ttl": self.ttl,
+                "requests": requests,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "misses": self.misses,
+                "upstream_calls": self.upstream_calls,
+                "upstream_errors": self.upstream_errors,
+                "in_flight": len(self._flights) + len(self._async_flights),
+                "hit_rate": round((self.hits + self.coalesced) / requests * 100, 1) if requests else 0.0,
+            }
+
+
+_reply_cache: Optional[ReplyCache] = None
+_reply_cache_lock = threading.Lock()
+
+
+def get_reply_cache() -> ReplyCache:
+    global _reply_cache
+    with _reply_cache_lock:
+        if _reply_cache is None:
+            _reply_cache = ReplyCache(
+                max_entries=int(os.getenv("REPLY_CACHE_SIZE", "2000")),
+                ttl=float(os.getenv("REPLY_CACHE_TTL", "300")),
+            )
+        return _reply_cache
@@ -1,43 +1,115 @@
 # modules_server/server.py - Final Version dengan Billing Security
-import base64
 import json
 from datetime import datetime
 from pathlib import Path
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
-from modules_server.deepseek_ai import generate_reply
-from modules_server.tts_engine import speak
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from modules_server.deepseek_ai import generate_reply_with_usage, REPLY_PARAMS
+from modules_server.llm_router import get_router
+from modules_server.reply_cache import get_reply_cache, make_key
+from modules_server.tts_service import MEDIA_TYPES, OUTPUT_RATE, synthesize_stream
+from modules_server.tts_backends import get_tts_backend
+from modules_server.tts_local import local_tts_enabled
+from modules_server.tts_metrics import get_tts_metrics
 from modules_server.logger_server import log_request, log_error
 from modules_server.billing_security import billing_db
+from modules_server.job_scheduler import SchedulerRejected, TierResolver, scheduler_from_env
 
 app = FastAPI(title="StreamMate AI Server", version="1.0.0")
 
+# Antrian fair-share untuk panggilan LLM (bobot per tier lisensi)
+scheduler = scheduler_from_env()
+tier_resolver = TierResolver(billing_db)
+
 # ========== EXISTING ENDPOINTS ==========
 @app.post("/ai_reply")
 async def ai_reply(request: Request):
     try:
         data = await request.json()
         text = data.get("text", "")
-        reply = generate_reply(text)
+        system = data.get("system")
+
+        # Identitas untuk fair-share: session billing aktif, fallback anonim per IP
+        user, tier = tier_resolver.identify(
+            data.get("session_id"), request.client.host if request.client else None
+        )
+
+        def upstream():
+            # Panggilan blocking → thread pool scheduler, event loop tetap bebas
+            return scheduler.submit(user, tier, lambda: generate_reply_with_usage(text, system=system))
+
+        if data.get("no_cache"):
+            (reply, usage), source = await upstream(), "bypass"
+        else:
+            # Prompt identik dari banyak client → satu panggilan upstream
+            (reply, usage), source = await get_reply_cache().get_or_compute_async(
+                make_key(text, system, **REPLY_PARAMS),
+                upstream,
+                cacheable=lambda result: result[0] is not None,
+                # Penolakan scheduler (429 per-user dsb.) milik leader, bukan milik waiter
+                retry_on=(SchedulerRejected,),
+            )
         log_request("ai_reply", {"text": text}, reply)
-        return {"reply": reply}
+        return {"reply": reply, "usage": dict(usage, cache=source)}
+    except SchedulerRejected as e:
+        log_error("ai_reply", f"{e.status_code}: {e}")
+        return JSONResponse(
+            status_code=e.status_code,
+            content={"error": str(e), "retry_after": e.retry_after},
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         log_error("ai_reply", str(e))
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.post("/tts/synthesize")
+async def tts_synthesize(request: Request):
+    """
+    Sintesis TTS tanpa playback di server.
+    Request: {"text": "...", "voice": "id-ID-Standard-A", "language": "id-ID",
+              "format": "ogg" | "pcm" | "wav", "pitch": 0}
+    Response: audio di-stream per segmen (chunked), Ogg Opus secara default.
+    """
+    return await _synthesize_response(request, default_format="ogg")
+
 @app.post("/speak")
 async def speak_text(request: Request):
+    """
+    Alias lama: sekarang synthesis-only (tidak memutar audio di server).
+    Default WAV satu file: client lama (sf.read) hanya men-decode logical
+    stream Ogg pertama, jadi Ogg berantai hanya kalau diminta lewat "format".
+    """
+    return await _synthesize_response(request, default_format="wav")
+
+async def _synthesize_response(request: Request, default_format: str):
     try:
         data = await request.json()
-        text = data.get("text", "")
+        text = (data.get("text") or "").strip()
         voice = data.get("voice", "id-ID-Standard-A")
-        # speak() harus mengembalikan audio dalam bentuk base64 string
-        audio_base64 = speak(text, voice_name=voice)
-        log_request("speak", {"text": text, "voice": voice}, "audio:base64")
-        # kembalikan byte audio asli
-        return base64.b64decode(audio_base64)
+        language = data.get("language") or ("-".join(voice.split("-")[:2]) if voice else "id-ID")
+        fmt = (data.get("format") or default_format).lower()
+        pitch = float(data.get("pitch") or 0)
+
+        if not text:
+            return JSONResponse(status_code=400, content={"error": "text is required"})
+        if fmt not in MEDIA_TYPES:
+            return JSONResponse(status_code=400, content={"error": f"format must be one of {list(MEDIA_TYPES)}"})
+
+        first, rest, segments = await synthesize_stream(text, voice, language, pitch, fmt)
+
+        async def body():
+            yield first
+            async for chunk in rest:
+                yield chunk
+
+        log_request("tts_synthesize", {"text": text, "voice": voice, "format": fmt}, f"audio:{fmt}:{segments}")
+        return StreamingResponse(
+            body(),
+            media_type=MEDIA_TYPES[fmt],
+            headers={"X-Sample-Rate": str(OUTPUT_RATE), "X-Segments": str(segments)},
+        )
     except Exception as e:
-        log_error("speak", str(e))
+        log_error("tts_synthesize", str(e))
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 # ========== BILLING SECURITY ENDPOINTS ==========
@@ -349,6 +421,28 @@ async def get_admin_stats():
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
+@app.get("/api/admin/llm_stats")
+async def get_llm_stats():
+    """Statistik provider LLM (latency, error, token, biaya), reply cache dan antrian."""
+    try:
+        return {
+            "providers": get_router().status(),
+            "reply_cache": get_reply_cache().stats(),
+            "scheduler": scheduler.status(),
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.get("/api/admin/tts_metrics")
+async def get_tts_metrics_endpoint(format: str = "json"):
+    """Histogram latency/RTF + cache hit TTS per engine/voice (format=json | prometheus)."""
+    try:
+        if format == "prometheus":
+            return PlainTextResponse(get_tts_metrics().to_prometheus(), media_type="text/plain; version=0.0.4")
+        return get_tts_metrics().snapshot()
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -371,6 +465,10 @@ async def startup_event():
     print("⏱️  Session Tracking: ACTIVE")
     print("📧 Email Tracking: ACTIVE")
     print("💾 License Cache: ACTIVE")
+    if local_tts_enabled():
+        # Worker TTS lokal load model sekarang, bukan saat request pertama
+        get_tts_backend("coqui").warm_up()
+        print("🗣️  Local TTS (Coqui): WARMING UP")
     print("=" * 60)
 
 if __name__ == "__main__":
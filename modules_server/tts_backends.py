@@ -0,0 +1,219 @@
+# modules_server/tts_backends.py
+"""
+Backend sintesis TTS yang mengembalikan PCM float32 langsung di memori.
+
+• GoogleTTSBackend : satu TextToSpeechClient dipakai ulang (channel gRPC
+                     tetap warm), LINEAR16 di-decode dari bytes response
+• GTTSBackend      : gTTS ditulis ke BytesIO lalu MP3 di-decode di memori
+• CoquiTTSBackend  : TTS lokal offline (CPU) lewat pool worker process warm
+
+Tidak ada file sementara di jalur sintesis → playback.
+"""
+
+import io
+import os
+import time
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from modules_server.tts_cache import get_tts_cache, tts_cache_key
+from modules_server.tts_metrics import get_tts_metrics
+from modules_server.tts_local import get_local_tts, is_local_voice, local_tts_enabled, model_for
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+GOOGLE_CREDENTIALS = Path("config/gcloud_tts_credentials.json")
+
+
+def decode_audio_bytes(content: bytes, fmt: str = None) -> Tuple[np.ndarray, int]:
+    """Decode WAV/OGG/FLAC (dan MP3 bila libsndfile mendukung) dari bytes."""
+    try:
+        data, samplerate = sf.read(io.BytesIO(content), dtype="float32")
+        return data, samplerate
+    except Exception:
+        if fmt != "mp3":
+            raise
+
+    # libsndfile lama belum bisa MP3 → decode via pydub/ffmpeg lewat pipe
+    from pydub import AudioSegment
+    audio = AudioSegment.from_file(io.BytesIO(content), format="mp3")
+    arr = np.array(audio.get_array_of_samples(), dtype=np.float32)
+    arr /= float(1 << (8 * audio.sample_width - 1))
+    if audio.channels > 1:
+        arr = arr.reshape(-1, audio.channels)
+    return arr, audio.frame_rate
+
+
+class TTSBackend:
+    name = "base"
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> Tuple[np.ndarray, int]:
+        raise NotImplementedError
+
+    def warm_up(self):
+        pass
+
+
+class GoogleTTSBackend(TTSBackend):
+    """Google Cloud TTS dengan client long-lived."""
+
+    name = "google"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from google.cloud import texttospeech
+                    self._client = texttospeech.TextToSpeechClient()
+        return self._client
+
+    def warm_up(self, language: str = "id-ID"):
+        """Buka channel gRPC lebih awal supaya request pertama tidak kena handshake."""
+        try:
+            self.client.list_voices(language_code=language)
+        except Exception as e:
+            logger.warning(f"Warm-up Google TTS gagal: {e}")
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> Tuple[np.ndarray, int]:
+        from google.cloud import texttospeech
+
+        response = self.client.synthesize_speech(
+            input=texttospeech.SynthesisInput(text=text),
+            voice=texttospeech.VoiceSelectionParams(
+                language_code=language or "id-ID",
+                name=voice or "id-ID-Standard-A",
+            ),
+            audio_config=texttospeech.AudioConfig(
+                audio_encoding=texttospeech.AudioEncoding.LINEAR16
+            ),
+        )
+        # LINEAR16 dari Google sudah ber-header WAV
+        return decode_audio_bytes(response.audio_content, "wav")
+
+
+class GTTSBackend(TTSBackend):
+    """gTTS (Google Translate TTS) tanpa kredensial."""
+
+    name = "gtts"
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> Tuple[np.ndarray, int]:
+        from gtts import gTTS
+
+        lang = (language or "en").split("-")[0].lower()
+        buf = io.BytesIO()
+        gTTS(text=text, lang=lang).write_to_fp(buf)
+        return decode_audio_bytes(buf.getvalue(), "mp3")
+
+
+class CoquiTTSBackend(TTSBackend):
+    """Coqui TTS offline di worker process (tier basic)."""
+
+    name = "coqui"
+
+    def warm_up(self, language: str = "id-ID"):
+        """Spawn worker + load model default bahasa ini di background."""
+        if not get_local_tts().start([model_for(None, language)]):
+            logger.info("TTS lokal tidak tersedia (pip install TTS)")
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> Tuple[np.ndarray, int]:
+        return get_local_tts().synthesize(text, voice, language)
+
+
+_BACKEND_CLASSES = {
+    GoogleTTSBackend.name: GoogleTTSBackend,
+    GTTSBackend.name: GTTSBackend,
+    CoquiTTSBackend.name: CoquiTTSBackend,
+}
+_backends: Dict[str, TTSBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_tts_backend(name: str) -> Optional[TTSBackend]:
+    """Instance backend bersama (dibuat sekali per proses)."""
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None and name in _BACKEND_CLASSES:
+            backend = _backends[name] = _BACKEND_CLASSES[name]()
+        return backend
+
+
+def warm_up_backends(language: str = "id-ID"):
+    """Warm-up Google TTS di background (dipanggil saat modul TTS dimuat)."""
+    def _run():
+        get_tts_backend("google").warm_up(language)
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def google_credentials_available() -> bool:
+    """
+    Cek kredensial Google Cloud TTS (satu-satunya sumber kebenaran untuk routing
+    dan speak_now): file config/gcloud_tts_credentials.json (dipasang ke env),
+    atau GOOGLE_APPLICATION_CREDENTIALS yang menunjuk ke file yang ada.
+    """
+    if GOOGLE_CREDENTIALS.exists():
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(GOOGLE_CREDENTIALS.resolve())
+        return True
+    env_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    return bool(env_path) and Path(env_path).is_file()
+
+
+def engine_for_voice(voice_name: str = None) -> str:
+    """
+    Engine yang dipakai speak() untuk voice ini: voice Coqui → lokal, Google
+    butuh kredensial, sisanya gTTS (atau TTS lokal kalau diaktifkan).
+    """
+    if is_local_voice(voice_name):
+        return "coqui"
+    if voice_name and google_credentials_available():
+        return "google"
+    return "coqui" if local_tts_enabled() else "gtts"
+
+
+def _cache_identity(engine: str, voice: str = None, language: str = None) -> Tuple[Optional[str], str]:
+    # Normalisasi voice/bahasa supaya key cache sama untuk input yang setara
+    if engine == "gtts":
+        return None, (language or "en").split("-")[0].lower()
+    if engine == "coqui":
+        return model_for(voice, language), (language or "id").split("-")[0].lower()
+    return voice, language
+
+
+def voice_label(engine: str, voice: str = None, language: str = None) -> str:
+    """Label voice untuk metrik, sama dengan yang dicatat synthesize_cached."""
+    voice, language = _cache_identity(engine, voice, language)
+    return voice or language
+
+
+def synthesize_cached(engine: str, text: str, voice: str = None,
+                      language: str = None) -> Tuple[np.ndarray, int]:
+    """Sintesis lewat cache audio TTS; key sama untuk playback dan pre-synthesis."""
+    voice, language = _cache_identity(engine, voice, language)
+    cache = get_tts_cache()
+    key = tts_cache_key(text, voice, language, engine=engine)
+    metrics = get_tts_metrics()
+    start = time.perf_counter()
+    cached = cache.get(key)
+    if cached is not None:
+        metrics.observe_synthesis(engine, voice or language, time.perf_counter() - start,
+                                  len(cached[0]) / cached[1], cached=True)
+        return cached
+    data, samplerate = get_tts_backend(engine).synthesize(text, voice, language)
+    metrics.observe_synthesis(engine, voice or language, time.perf_counter() - start,
+                              len(data) / samplerate, cached=False)
+    cache.put(key, data, samplerate)
+    return data, samplerate
+
+
+def is_cached(engine: str, text: str, voice: str = None, language: str = None) -> bool:
+    voice, language = _cache_identity(engine, voice, language)
+    return get_tts_cache().contains(tts_cache_key(text, voice, language, engine=engine))
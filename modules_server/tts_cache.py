@@ -0,0 +1,184 @@
+# modules_server/tts_cache.py
+"""
+Cache audio TTS (content-addressed).
+
+Frasa yang sama (sapaan, terima kasih, template fast path) tidak perlu
+disintesis ulang lewat network. Audio disimpan sebagai PCM float32 yang
+sudah di-decode, jadi hit bisa langsung diputar:
+
+  • memori : LRU dengan batas total byte
+  • disk   : temp/tts_cache/<key>.<samplerate>.npy, dibatasi ukuran total;
+             file yang paling lama tidak dipakai (mtime) dihapus duluan
+
+Key = sha1(teks ternormalisasi | voice | bahasa | engine). Pitch tidak
+ikut: pitch diterapkan DSP chain saat playback, PCM hasil sintesisnya sama.
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+CACHE_DIR = Path("temp/tts_cache")
+
+
+def normalize_tts_text(text: str) -> str:
+    # Spasi ganda & kapitalisasi tidak mengubah hasil suara secara berarti
+    return " ".join((text or "").split()).lower()
+
+
+def tts_cache_key(text: str, voice: str = None, language: str = None, engine: str = "google") -> str:
+    raw = "|".join([normalize_tts_text(text), voice or "", language or "", engine])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class TTSAudioCache:
+    """LRU memori + store disk untuk PCM hasil TTS."""
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, memory_mb: float = 64, disk_mb: float = 256):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_limit = int(memory_mb * 1024 * 1024)
+        self.disk_limit = int(disk_mb * 1024 * 1024)
+
+        self._lock = threading.RLock()
+        self._memory: "OrderedDict[str, Tuple[np.ndarray, int]]" = OrderedDict()
+        self._memory_bytes = 0
+        # Index key → file supaya lookup tidak perlu glob direktori
+        self._disk_index: Dict[str, Path] = {
+            f.name.split(".")[0]: f for f in self.cache_dir.glob("*.npy")
+        }
+        self._disk_bytes = sum(f.stat().st_size for f in self._disk_index.values())
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ─── Memori ─────────────────────────────────────────────────────
+    def _remember(self, key: str, data: np.ndarray, samplerate: int):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old[0].nbytes
+        self._memory[key] = (data, samplerate)
+        self._memory_bytes += data.nbytes
+        while self._memory_bytes > self.memory_limit and len(self._memory) > 1:
+            _, (evicted, _) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    # ─── Disk ───────────────────────────────────────────────────────
+    def _evict_disk(self):
+        if self._disk_bytes <= self.disk_limit:
+            return
+        entries = sorted(self._disk_index.items(), key=lambda kv: kv[1].stat().st_mtime)
+        for key, f in entries:
+            if self._disk_bytes <= self.disk_limit * 0.9:
+                break
+            try:
+                size = f.stat().st_size
+                f.unlink()
+                self._disk_bytes -= size
+            except OSError:
+                pass
+            self._disk_index.pop(key, None)
+
+    # ─── API ────────────────────────────────────────────────────────
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, int]]:
+        """Return (pcm float32, samplerate) atau None."""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+
+            path = self._disk_index.get(key)
+            if path is not None:
+                try:
+                    data = np.load(path)
+                    samplerate = int(path.name.split(".")[1])
+                    os.utime(path)  # tandai baru dipakai untuk eviction
+                    self._remember(key, data, samplerate)
+                    self.disk_hits += 1
+                    return data, samplerate
+                except Exception as e:
+                    logger.warning(f"TTS cache rusak {path.name}: {e}")
+                    self._disk_index.pop(key, None)
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+
+            self.misses += 1
+            return None
+
+    def contains(self, key: str) -> bool:
+        """Cek keberadaan key tanpa memengaruhi statistik hit/miss."""
+        with self._lock:
+            return key in self._memory or key in self._disk_index
+
+    def put(self, key: str, data: np.ndarray, samplerate: int):
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        data.flags.writeable = False  # dipakai bersama, jangan diubah in-place
+        with self._lock:
+            self._remember(key, data, samplerate)
+            if key in self._disk_index:
+                return
+            path = self.cache_dir / f"{key}.{int(samplerate)}.npy"
+            try:
+                tmp = path.with_suffix(".tmp")
+                with open(tmp, "wb") as f:
+                    np.save(f, data)
+                os.replace(tmp, path)
+                self._disk_index[key] = path
+                self._disk_bytes += path.stat().st_size
+                self._evict_disk()
+            except Exception as e:
+                logger.warning(f"Gagal simpan TTS cache: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for f in self._disk_index.values():
+                try:
+                    f.unlink()
+                except OSError:
+                    pass
+            self._disk_index.clear()
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_bytes / 1024 / 1024, 2),
+                "disk_entries": len(self._disk_index),
+                "disk_mb": round(self._disk_bytes / 1024 / 1024, 2),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups * 100 if lookups else 0,
+            }
+
+
+_tts_cache: Optional[TTSAudioCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSAudioCache:
+    global _tts_cache
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSAudioCache(
+                memory_mb=float(os.getenv("TTS_CACHE_MEMORY_MB", "64")),
+                disk_mb=float(os.getenv("TTS_CACHE_DISK_MB", "256")),
+            )
+        return _tts_cache
@@ -17,10 +17,8 @@ def speak_with_callback(text, language_code=None, voice_name=None, callback=None
         # Panggil TTS original dalam thread terpisah
         def tts_thread():
             try:
-                original_speak(text, language_code, voice_name)
-                # TTS selesai, panggil callback
-                if callback:
-                    callback()
+                # Callback dipanggil antrian TTS setelah audio selesai diputar
+                original_speak(text, language_code, voice_name, on_finished=callback)
             except Exception as e:
                 print(f"Error in TTS thread: {e}")
                 # Tetap panggil callback
@@ -53,10 +51,8 @@ def speak_with_google_cloud_callback(text, voice_name=None, language_code=None,
         # Panggil TTS Google dalam thread terpisah
         def tts_thread():
             try:
-                original_speak_google(text, voice_name, language_code)
-                # TTS selesai, panggil callback
-                if callback:
-                    callback()
+                # Callback dipanggil antrian TTS setelah audio selesai diputar
+                original_speak_google(text, voice_name, language_code, on_finished=callback)
             except Exception as e:
                 print(f"Error in Google TTS thread: {e}")
                 # Tetap panggil callback
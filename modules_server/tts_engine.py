@@ -1,6 +1,5 @@
 # modules_server/tts_engine.py
 import os
-import tempfile
 import threading
 import time
 import numpy as np
@@ -11,6 +10,18 @@ import json
 import logging
 logger = logging.getLogger('StreamMate')
 
+from modules_server.tts_cache import get_tts_cache
+from modules_server.tts_backends import (
+    engine_for_voice, get_tts_backend, google_credentials_available, synthesize_cached,
+    voice_label, warm_up_backends
+)
+from modules_server.tts_metrics import get_tts_metrics, trace_audio, trace_label, trace_synthesis_started
+from modules_server.tts_local import enable_local_tts, get_local_tts, is_local_voice, model_for
+from modules_server.audio_engine import play_routed
+from modules_server.tts_stream import stream_segments
+from modules_server.tts_prewarm import get_tts_prewarmer, plan_segments
+from modules_server.tts_queue import get_tts_queue
+
 # Load environment variables
 load_dotenv()
 
@@ -28,12 +39,6 @@ logging.basicConfig(
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
 
-# Queue untuk mencegah overlapping audio
-_audio_queue = []
-_queue_lock = threading.Lock()
-_queue_thread = None
-_is_queue_running = False
-
 # API URL untuk Animaze WebSocket Server
 ANIMAZE_API_URL = "http://animaze.streammateai.com/api/hotkey"
 
@@ -57,70 +62,175 @@ def send_animaze_hotkey(key):
         return False
         
 
-def _play_audio_queue():
-    """Background thread untuk memainkan audio dalam queue."""
-    global _is_queue_running
-    _is_queue_running = True
-    
-    while True:
-        # Check if queue is empty
-        with _queue_lock:
-            if not _audio_queue:
-                _is_queue_running = False
-                break
-            
-            # Get next audio data
-            audio_data = _audio_queue.pop(0)
-        
-        try:
-            # Play audio
-            from pydub.playback import play
-            play(audio_data)
-        except Exception as e:
-            logging.error(f"Failed to play audio: {e}")
-        
-        # Small delay to prevent CPU overload
-        time.sleep(0.1)
+def _tts_setting(key: str, default=None):
+    """Baca satu key dari config/settings.json."""
+    try:
+        settings = json.loads(Path("config/settings.json").read_text(encoding="utf-8"))
+        return settings.get(key, default)
+    except Exception:
+        return default
+
+def _tts_pitch() -> float:
+    """Nilai tts_pitch dari settings (diterapkan DSP chain saat playback)."""
+    try:
+        return float(_tts_setting("tts_pitch", 0) or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+def tts_cache_stats() -> dict:
+    """Statistik hit/miss cache audio TTS."""
+    return get_tts_cache().stats()
+
+def tts_queue_stats() -> dict:
+    """Kedalaman & status antrian TTS."""
+    return get_tts_queue().stats()
+
+def prewarm_tts(templates, voices, phrases=()) -> int:
+    """
+    Pre-synthesis template/frasa untuk voice yang dipakai, di background saat
+    antrian TTS kosong. voices: list (voice_name, language_code).
+    """
+    return get_tts_prewarmer().prewarm(templates, voices, phrases=phrases)
+
+def tts_prewarm_stats() -> dict:
+    return get_tts_prewarmer().stats()
+
+def tts_local_stats() -> dict:
+    """Status pool worker TTS lokal (Coqui)."""
+    return get_local_tts().status()
+
+def tts_metrics_stats() -> dict:
+    """Histogram latency/RTF + cache hit per engine/voice."""
+    return get_tts_metrics().snapshot()
 
-def speak(text: str, language_code: str = None, voice_name: str = None, output_device: int = None, on_finished=None):
+def tts_metrics_summary() -> list:
+    return get_tts_metrics().summary_lines()
+
+def export_tts_metrics(path="logs/tts_metrics.json"):
+    """Ekspor metrik TTS (.json, atau .prom untuk format Prometheus)."""
+    return get_tts_metrics().export(path)
+
+def speak(text: str, language_code: str = None, voice_name: str = None, output_device: int = None,
+          on_finished=None, priority: str = "reply"):
     """
-    General TTS wrapper dengan fallback handling.
+    General TTS wrapper: masukkan teks ke antrian TTS bersama.
     
     Args:
         text: Teks untuk diucapkan
         language_code: Kode bahasa
         voice_name: Model suara 
         output_device: Audio output device index
-        on_finished: Callback saat audio selesai
+        on_finished: Callback saat audio selesai (juga saat dibatalkan/gagal)
+        priority: "donation", "reply" atau "preview"
+
+    Returns:
+        TTSJob (bisa di-cancel lewat get_tts_queue().cancel(job.id)), atau None untuk teks kosong
     """
     if not text or text.strip() == "":
         if on_finished:
             on_finished()
-        return
-    
+        return None
+
+    print(f"[DEBUG] speak() queued: text='{text[:30]}...', priority={priority}")
+    return get_tts_queue().submit(text, language_code, voice_name, output_device, on_finished, priority)
+
+def _vm_routing(output_device: int = None):
+    """Load VM config → (output_device, use_dual_output, boost_vm)."""
+    try:
+        vm_config_path = Path("config/live_state.json")
+        if vm_config_path.exists():
+            vm_config = json.loads(vm_config_path.read_text(encoding="utf-8"))
+            vm_active = vm_config.get("virtual_mic_active", False)
+            dual_output = vm_config.get("dual_output", True)
+            boost_vm = vm_config.get("boost_virtual_mic", False)
+            
+            if vm_active and output_device is None:
+                output_device = vm_config.get("virtual_mic_device_index")
+                print(f"[DEBUG] Using virtual mic device from config: {output_device}")
+            
+            use_dual_output = dual_output if output_device is not None else False
+            return output_device, use_dual_output, boost_vm
+    except Exception as e:
+        print(f"[DEBUG] Error loading VM config: {e}")
+    return output_device, True, False
+
+def _speak_remote(text, language_code, voice_name, output_device, pitch, should_stop=None) -> bool:
+    """
+    Thin client: sintesis di server (/tts/synthesize), segmen Ogg Opus diputar
+    begitu diterima. Return False kalau belum ada audio yang sempat diputar
+    (pemanggil boleh fallback ke sintesis lokal).
+    """
+    from modules_client.api import synthesize_speech
+
+    output_device, use_dual_output, boost_vm = _vm_routing(output_device)
+    handle = None
+    total_seconds = 0.0
+    trace_label("remote", voice_name or language_code)
+    trace_synthesis_started()
+    try:
+        # Pitch & normalisasi sudah diterapkan server
+        for data, fs in synthesize_speech(text, voice_name, language_code, pitch):
+            if should_stop and should_stop():
+                break
+            total_seconds += len(data) / fs
+            handle = play_routed(data, fs, output_device, use_dual_output, boost_vm)
+            trace_audio(handle, len(data) / fs)
+    except Exception as e:
+        logging.error(f"[TTS] Error remote TTS: {e}")
+        if handle is None:
+            return False
+    if handle is not None:
+        handle.wait(timeout=total_seconds + 5.0)
+    return handle is not None or bool(should_stop and should_stop())
+
+def speak_now(text: str, language_code: str = None, voice_name: str = None, output_device: int = None,
+              should_stop=None):
+    """
+    Sintesis + playback blocking dengan fallback TTS lokal / Google Cloud → gTTS.
+    Dipanggil worker antrian TTS; should_stop() True menghentikan sisa segmen.
+    """
+    pitch = _tts_pitch()
+    # Balasan panjang dipecah per kalimat supaya suara pertama keluar lebih cepat
+    streaming = bool(_tts_setting("tts_streaming", True))
+
     # TAMBAHAN: Add logging
     logger.info(f"TTS started: {text[:30]}... (voice={voice_name}, lang={language_code})")
     start_time = time.time()
     
     # Debug logging
-    print(f"[DEBUG] speak() called with: text='{text[:30]}...', language={language_code}, voice={voice_name}")
-    if on_finished:
-        print(f"[DEBUG] Callback provided: {on_finished}")
+    print(f"[DEBUG] speak_now() called with: text='{text[:30]}...', language={language_code}, voice={voice_name}")
     
-    # 1) Coba Google Cloud TTS dulu jika voice_name disediakan
-    if voice_name:
+    # 0) Thin client: sintesis di server, audio dikirim terkompresi (Opus)
+    if _tts_setting("tts_remote", False):
+        if _speak_remote(text, language_code, voice_name, output_device, pitch, should_stop):
+            logger.info(f"TTS completed (remote) in {time.time() - start_time:.2f}s")
+            return
+        print(f"[DEBUG] Remote TTS gagal, fallback ke sintesis lokal")
+
+    # 1) TTS lokal offline (tier basic): voice Coqui, atau tts_local aktif tanpa Google
+    if engine_for_voice(voice_name) == "coqui":
+        try:
+            logging.info(f"[TTS] Menggunakan TTS lokal: {model_for(voice_name, language_code)}")
+            _speak_segments("coqui", text, voice_name, language_code, output_device, pitch, streaming,
+                            should_stop)
+            logger.info(f"TTS completed (local) in {time.time() - start_time:.2f}s")
+            return
+        except Exception as e:
+            logging.error(f"[TTS] Error TTS lokal: {e}")
+            print(f"[DEBUG] Error local TTS: {e}, falling back to gTTS")
+        if should_stop and should_stop():
+            return
+
+    # 2) Coba Google Cloud TTS jika voice_name Google disediakan
+    if voice_name and not is_local_voice(voice_name):
         try:
-            # Cek kredensial
-            from pathlib import Path
-            cred_path = Path("config/gcloud_tts_credentials.json")
-            if cred_path.exists():
-                os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(cred_path.resolve())
-                
+            # Cek kredensial (sama dengan routing engine_for_voice)
+            if google_credentials_available():
                 try:
-                    from modules_server.tts_google import speak_with_google_cloud
+                    from modules_server.tts_google import play_google_tts
                     logging.info(f"[TTS] Menggunakan Google Cloud dengan suara: {voice_name}")
-                    print(f"[DEBUG] Forwarding to speak_with_google_cloud with callback")
-                    speak_with_google_cloud(text, voice_name, language_code, output_device, also_play_on_speaker=True, on_finished=on_finished)
+                    play_google_tts(text, voice_name, language_code, output_device, also_play_on_speaker=True,
+                                    pitch=pitch, streaming=streaming, should_stop=should_stop)
                     
                     # TAMBAHAN: Success logging untuk Google Cloud
                     duration = time.time() - start_time
@@ -137,119 +247,21 @@ def speak(text: str, language_code: str = None, voice_name: str = None, output_d
             logging.error(f"[TTS] Error saat setup Google Cloud: {e}")
             print(f"[DEBUG] Error setting up Google Cloud: {e}, falling back to gTTS")
     
-    # 2) Fallback ke gTTS
+    if should_stop and should_stop():
+        return
+
+    # 3) Fallback ke gTTS
     lang = "en"
     if language_code:
         lang = language_code.split("-")[0].lower()
     
     try:
-        from gtts import gTTS
-        from pydub import AudioSegment
-        from pydub.playback import play
-        
         logging.info(f"[TTS] Menggunakan gTTS dengan bahasa: {lang}")
         print(f"[DEBUG] Using gTTS with language: {lang}")
-        
-        tts = gTTS(text=text, lang=lang)
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as tmp:
-            temp_path = tmp.name
-            
-        tts.save(temp_path)
-        audio = AudioSegment.from_file(temp_path, format="mp3")
-        
-        # Load VM config
-        try:
-            from pathlib import Path
-            vm_config_path = Path("config/live_state.json")
-            if vm_config_path.exists():
-                vm_config = json.loads(vm_config_path.read_text(encoding="utf-8"))
-                vm_active = vm_config.get("virtual_mic_active", False)
-                dual_output = vm_config.get("dual_output", True)
-                boost_vm = vm_config.get("boost_virtual_mic", False)
-                
-                if vm_active and output_device is None:
-                    output_device = vm_config.get("virtual_mic_device_index")
-                    print(f"[DEBUG] Using virtual mic device from config: {output_device}")
-                
-                use_dual_output = dual_output if output_device is not None else False
-            else:
-                use_dual_output = True
-                boost_vm = False
-        except Exception as e:
-            print(f"[DEBUG] Error loading VM config: {e}")
-            use_dual_output = True
-            boost_vm = False
-        
-        # Proses audio output
-        if output_device is not None:
-            try:
-                import sounddevice as sd
-                import soundfile as sf
-                
-                samples = audio.get_array_of_samples()
-                arr = np.array(samples)
-                
-                # Boost jika diminta
-                if boost_vm:
-                    vm_arr = arr * 1.4
-                    vm_arr = np.clip(vm_arr, np.iinfo(arr.dtype).min, np.iinfo(arr.dtype).max).astype(arr.dtype)
-                else:
-                    vm_arr = arr
-                
-                if use_dual_output:
-                    # DUAL OUTPUT MODE
-                    def vm_thread_func():
-                        try:
-                            sd.play(vm_arr, audio.frame_rate, device=output_device)
-                            sd.wait()
-                            print(f"[DEBUG] Virtual mic playback completed")
-                        except Exception as e:
-                            print(f"[DEBUG] Error in VM thread: {e}")
-                    
-                    vm_thread = threading.Thread(target=vm_thread_func, daemon=True)
-                    vm_thread.start()
-                    
-                    print(f"[DEBUG] Playing audio on default speaker")
-                    play(audio)
-                    
-                    print(f"[DEBUG] Default speaker playback done, waiting for VM thread")
-                    vm_thread.join(timeout=10.0)
-                    
-                    if on_finished:
-                        print(f"[DEBUG] Calling on_finished callback after dual output")
-                        on_finished()
-                else:
-                    # SINGLE OUTPUT MODE  
-                    print(f"[DEBUG] Playing only on virtual mic (device {output_device})")
-                    sd.play(vm_arr, audio.frame_rate, device=output_device)
-                    sd.wait()
-                    
-                    if on_finished:
-                        print(f"[DEBUG] Calling on_finished callback after VM only")
-                        on_finished()
-                
-            except Exception as e:
-                logging.error(f"[TTS] Error playing with sounddevice: {e}")
-                print(f"[DEBUG] Error playing with sounddevice: {e}, falling back to pydub")
-                play(audio)
-                if on_finished:
-                    print(f"[DEBUG] Fallback playback complete, calling callback")
-                    on_finished()
-        else:
-            # Standard play
-            print(f"[DEBUG] Using standard pydub.playback.play")
-            play(audio)
-            print(f"[DEBUG] Standard playback complete, calling callback")
-            if on_finished:
-                on_finished()
-        
-        # Clean up
-        try:
-            os.remove(temp_path)
-        except:
-            pass
-        
+
+        # Sintesis + decode MP3 di memori (tanpa file sementara), lewat cache audio
+        _speak_segments("gtts", text, None, lang, output_device, pitch, streaming, should_stop)
+
         # TAMBAHAN: Success logging untuk gTTS
         duration = time.time() - start_time
         logger.info(f"TTS completed (gTTS) in {duration:.2f}s")
@@ -258,9 +270,40 @@ def speak(text: str, language_code: str = None, voice_name: str = None, output_d
         # TAMBAHAN: Error logging
         logger.error(f"TTS failed: {str(e)}")
         logging.error(f"[TTS] Error gTTS: {e}")
-        print(f"[DEBUG] Error in gTTS: {e}, still calling callback")
-        if on_finished:
-            on_finished()
+        print(f"[DEBUG] Error in gTTS: {e}")
+        raise
+
+def _speak_segments(engine, text, voice_name, language_code, output_device, pitch, streaming,
+                    should_stop=None):
+    """Sintesis per segmen lewat cache (engine tts_backends) + playback gapless, blocking."""
+    import sounddevice as sd
+
+    def synth(segment):
+        return synthesize_cached(engine, segment, voice_name, language_code)
+
+    trace_label(engine, voice_label(engine, voice_name, language_code))
+    
+    output_device, use_dual_output, boost_vm = _vm_routing(output_device)
+    
+    total_seconds = [0.0]
+
+    def play(data, fs):
+        total_seconds[0] += len(data) / fs
+        # Proses audio output lewat audio engine (stream device persisten)
+        try:
+            return play_routed(data, fs, output_device, use_dual_output, boost_vm, pitch=pitch)
+        except Exception as e:
+            logging.error(f"[TTS] Error playing with audio engine: {e}")
+            print(f"[DEBUG] Error playing with audio engine: {e}, falling back to sd.play")
+            sd.play(data, fs)
+            sd.wait()
+            return None
+
+    # Segmen disintesis paralel, diputar berurutan tanpa jeda
+    segments = plan_segments(text, streaming)
+    handle = stream_segments(segments, synth, play, should_stop=should_stop)
+    if handle is not None:
+        handle.wait(timeout=total_seconds[0] + 5.0)
             
 def check_audio_devices():
     """Cek ketersediaan perangkat audio dan log status."""
@@ -280,4 +323,13 @@ def check_audio_devices():
 try:
     check_audio_devices()
 except:
-    pass
\ No newline at end of file
+    pass
+
+# Buka channel Google TTS di background supaya reply pertama tidak kena handshake
+if google_credentials_available():
+    warm_up_backends()
+
+# TTS lokal offline: model di-load ke worker process sejak awal supaya tetap warm
+if _tts_setting("tts_local", False):
+    enable_local_tts(True)
+    get_tts_backend("coqui").warm_up(_tts_setting("tts_local_language", "id-ID"))
@@ -0,0 +1,314 @@
+# modules_server/tts_local.py
+"""
+TTS lokal offline (CPU) untuk tier basic ("coqui").
+
+Model VITS Coqui TTS (mis. MMS tts_models/ind/fairseq/vits untuk Indonesia)
+dijalankan di worker process terpisah. Tiap worker load model sekali saat
+start, di-warm-up dengan satu kalimat pendek, lalu tetap resident; hasil
+sintesis dikirim balik sebagai PCM float32 lewat pipe (tanpa file).
+
+Pool berisi beberapa worker warm (default 1, TTS_LOCAL_WORKERS) supaya
+potongan kalimat dari stream_segments bisa disintesis paralel. Worker yang
+mati di-spawn ulang di background. Model pertama kali diunduh ke cache
+Coqui; setelah itu sintesis sepenuhnya offline dan tidak bergantung network.
+
+Dependency opsional: pip install TTS
+"""
+
+import os
+import time
+import queue
+import threading
+import importlib.util
+import multiprocessing as mp
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+# Model default per bahasa (kode 2 huruf dari language_code)
+DEFAULT_MODELS = {
+    "id": "tts_models/ind/fairseq/vits",
+    "en": "tts_models/en/ljspeech/vits",
+}
+MODEL_PREFIX = "tts_models/"
+
+_enabled = os.getenv("TTS_LOCAL", "0") == "1"
+
+
+def is_local_voice(voice_name: str = None) -> bool:
+    """Voice dari section "coqui" di voices.json berupa nama model Coqui."""
+    return bool(voice_name) and voice_name.startswith(MODEL_PREFIX)
+
+
+def model_for(voice_name: str = None, language_code: str = None) -> str:
+    if is_local_voice(voice_name):
+        return voice_name
+    lang = (language_code or "id").split("-")[0].lower()
+    return DEFAULT_MODELS.get(lang, DEFAULT_MODELS["en"])
+
+
+def local_tts_available() -> bool:
+    return importlib.util.find_spec("TTS") is not None
+
+
+def enable_local_tts(enabled: bool = True):
+    """Pakai TTS lokal menggantikan gTTS untuk voice non-Google."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def local_tts_enabled() -> bool:
+    return _enabled and local_tts_available()
+
+
+def _worker_main(conn, models: List[str], n_threads: int):
+    """Entry point worker process: load model sekali, layani request via pipe."""
+    try:
+        import torch
+        from TTS.api import TTS
+
+        torch.set_num_threads(n_threads)
+        loaded = {}
+
+        def load(model):
+            if model not in loaded:
+                loaded[model] = TTS(model_name=model, progress_bar=False)
+            return loaded[model]
+
+        start = time.time()
+        for model in models:
+            # Warm-up supaya request pertama tidak menanggung alokasi awal
+            load(model).tts(text="halo")
+        conn.send(("ready", time.time() - start))
+    except Exception as e:
+        conn.send(("error", str(e)))
+        return
+
+    while True:
+        try:
+            msg = conn.recv()
+        except (EOFError, OSError):
+            break
+        if msg is None:
+            break
+
+        request_id, text, model, language = msg
+        try:
+            tts = load(model)
+            kwargs = {"language": language} if getattr(tts, "is_multi_lingual", False) else {}
+            wav = np.asarray(tts.tts(text=text, **kwargs), dtype=np.float32)
+            conn.send((request_id, wav, tts.synthesizer.output_sample_rate, None))
+        except Exception as e:
+            conn.send((request_id, None, 0, str(e)))
+
+
+class _LocalTTSWorker:
+    """Satu worker process warm beserta pipe-nya."""
+
+    def __init__(self, models: List[str], n_threads: int):
+        parent_conn, child_conn = mp.Pipe()
+        self.conn = parent_conn
+        self.proc = mp.Process(target=_worker_main, args=(child_conn, models, n_threads), daemon=True)
+        self.proc.start()
+        self.request_id = 0
+
+    def wait_ready(self) -> Tuple[str, object]:
+        try:
+            return self.conn.recv()
+        except (EOFError, OSError) as e:
+            return "error", str(e)
+
+    def is_alive(self) -> bool:
+        return self.proc.is_alive()
+
+    def synthesize(self, text: str, model: str, language: str, timeout: float) -> Tuple[np.ndarray, int]:
+        self.request_id += 1
+        request_id = self.request_id
+        self.conn.send((request_id, text, model, language))
+        deadline = time.time() + timeout
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0 or not self.conn.poll(remaining):
+                raise TimeoutError(f"TTS lokal timeout ({timeout:.0f}s)")
+            rid, wav, samplerate, error = self.conn.recv()
+            # Buang hasil basi dari request sebelumnya yang timeout
+            if rid == request_id:
+                break
+        if error:
+            raise RuntimeError(error)
+        return wav, samplerate
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.proc.join(timeout=2)
+        if self.proc.is_alive():
+            self.proc.terminate()
+
+    def kill(self):
+        """Matikan langsung (worker macet di tengah inference tidak membaca sinyal stop)."""
+        self.proc.terminate()
+        self.proc.join(timeout=2)
+
+
+class LocalTTSPool:
+    """Pool worker process TTS lokal yang model-nya tetap warm."""
+
+    def __init__(self, workers: int = 1, n_threads: int = 2, timeout: float = 15.0):
+        self.workers = max(1, workers)
+        self.n_threads = n_threads
+        self.timeout = timeout
+
+        self._models: List[str] = []
+        self._idle: "queue.Queue[_LocalTTSWorker]" = queue.Queue()
+        self._all: List[_LocalTTSWorker] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._loading = 0
+        self._latencies = deque(maxlen=50)
+        self.load_time = None
+        self.last_error = None
+        self.requests = 0
+        self.failed = 0
+        self.restarts = 0
+
+    def start(self, models: Iterable[str] = ()) -> bool:
+        """Spawn worker dan load model di background. Return False kalau Coqui tidak terinstall."""
+        if not local_tts_available():
+            return False
+        with self._lock:
+            for model in models:
+                if model not in self._models:
+                    self._models.append(model)
+            if self._started:
+                return True
+            self._started = True
+        for _ in range(self.workers):
+            self._spawn()
+        return True
+
+    def _spawn(self):
+        with self._lock:
+            self._loading += 1
+
+        def _run():
+            worker = _LocalTTSWorker(list(self._models), self.n_threads)
+            status, value = worker.wait_ready()
+            with self._lock:
+                self._loading -= 1
+                if status == "ready":
+                    self._all.append(worker)
+            if status != "ready":
+                self.last_error = value
+                logger.error(f"TTS lokal gagal load: {value}")
+                worker.stop()
+                return
+            self.load_time = value
+            logger.info(f"TTS lokal siap ({value:.1f}s load + warm-up)")
+            self._idle.put(worker)
+        threading.Thread(target=_run, daemon=True).start()
+
+    def is_ready(self) -> bool:
+        with self._lock:
+            return any(worker.is_alive() for worker in self._all)
+
+    def synthesize(self, text: str, voice: str = None, language: str = None) -> Tuple[np.ndarray, int]:
+        model = model_for(voice, language)
+        self.start([model])
+        lang = (language or "id").split("-")[0].lower()
+        with self._lock:
+            if not self._all and not self._loading:
+                # Semua worker gagal load → langsung gagal, pemanggil fallback ke gTTS
+                raise RuntimeError(f"TTS lokal tidak siap: {self.last_error}")
+        try:
+            # Menunggu worker bebas (atau worker pertama selesai load)
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            self.failed += 1
+            raise TimeoutError("Tidak ada worker TTS lokal yang siap")
+
+        start = time.time()
+        self.requests += 1
+        try:
+            wav, samplerate = worker.synthesize(text, model, lang, self.timeout)
+        except TimeoutError as e:
+            # Worker masih sibuk dengan request ini: jangan kembali ke _idle (request
+            # berikutnya akan antre di belakangnya), matikan dan ganti worker baru
+            self._replace_worker(worker, f"worker macet: {e}")
+            worker.kill()
+            raise
+        except (EOFError, OSError) as e:
+            # Worker mati: ganti dengan worker baru, model di-load ulang di background
+            self._replace_worker(worker, f"worker mati: {e!r}")
+            worker.stop()
+            raise
+        except Exception as e:
+            self.failed += 1
+            self.last_error = str(e)
+            self._idle.put(worker)
+            raise
+        self._idle.put(worker)
+        self._latencies.append(time.time() - start)
+        return wav, samplerate
+
+    def _replace_worker(self, worker: _LocalTTSWorker, error: str):
+        self.failed += 1
+        self.restarts += 1
+        self.last_error = error
+        logger.warning(f"TTS lokal: {error}, worker diganti")
+        with self._lock:
+            if worker in self._all:
+                self._all.remove(worker)
+        self._spawn()
+
+    def p95(self) -> Optional[float]:
+        samples = sorted(self._latencies)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    def stop(self):
+        with self._lock:
+            workers, self._all = self._all, []
+            self._started = False
+        self._idle = queue.Queue()
+        for worker in workers:
+            worker.stop()
+
+    def status(self) -> Dict:
+        with self._lock:
+            alive = sum(1 for worker in self._all if worker.is_alive())
+        return {
+            "available": local_tts_available(),
+            "enabled": _enabled,
+            "workers": alive,
+            "idle": self._idle.qsize(),
+            "models": list(self._models),
+            "load_time": self.load_time,
+            "requests": self.requests,
+            "failed": self.failed,
+            "restarts": self.restarts,
+            "p95_latency": self.p95(),
+            "last_error": self.last_error,
+        }
+
+
+_pool: Optional[LocalTTSPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_local_tts() -> LocalTTSPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = LocalTTSPool(
+                workers=int(os.getenv("TTS_LOCAL_WORKERS", "1")),
+                n_threads=int(os.getenv("TTS_LOCAL_THREADS", "2")),
+            )
+        return _pool
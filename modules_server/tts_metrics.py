@@ -0,0 +1,281 @@
+# modules_server/tts_metrics.py
+"""
+Instrumentasi latency TTS per engine/voice.
+
+Per sintesis (synthesize_cached, juga dipakai endpoint server):
+  • synthesis_ms : waktu sintesis satu segmen (cache miss)
+  • rtf          : real-time factor = waktu sintesis / durasi audio
+  • cache hit / miss
+
+Per request (job antrian TTS, dari enqueue sampai audio selesai):
+  • request_to_synthesis_ms   : enqueue → sintesis dimulai (antri + setup)
+  • synthesis_to_first_audio_ms : sintesis dimulai → sample pertama keluar
+                                  dari device (PlaybackHandle.started_at)
+  • request_to_first_audio_ms : latency yang didengar penonton
+  • audio_seconds             : durasi audio yang diputar
+
+Histogram memakai bucket tetap (gaya Prometheus) sehingga bisa diekspor
+ke JSON atau format teks Prometheus, dan percentile dihitung dari bucket.
+"""
+
+import json
+import time
+import bisect
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+LATENCY_BUCKETS_MS = (25, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000)
+RTF_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0)
+DURATION_BUCKETS_S = (0.5, 1, 2, 3, 5, 8, 13, 20, 30)
+
+HISTOGRAMS = {
+    "synthesis_ms": LATENCY_BUCKETS_MS,
+    "rtf": RTF_BUCKETS,
+    "request_to_synthesis_ms": LATENCY_BUCKETS_MS,
+    "synthesis_to_first_audio_ms": LATENCY_BUCKETS_MS,
+    "request_to_first_audio_ms": LATENCY_BUCKETS_MS,
+    "audio_seconds": DURATION_BUCKETS_S,
+}
+
+DEFAULT_EXPORT = Path("logs/tts_metrics.json")
+
+
+class Histogram:
+    """Histogram bucket tetap: count per bucket + sum + max."""
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # bucket terakhir = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimasi percentile: interpolasi linear di dalam bucket."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.counts):
+            if n and cumulative + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return lower + (upper - lower) * (rank - cumulative) / n
+            cumulative += n
+        return self.max
+
+    def snapshot(self) -> Dict:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(list(self.bounds) + ["+Inf"], self.counts):
+            cumulative += n
+            buckets[str(bound)] = cumulative
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.count, 3) if self.count else None,
+            "p50": round(p50, 3) if p50 is not None else None,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "max": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+class TTSTrace:
+    """Timeline satu request TTS; diisi oleh jalur sintesis/playback."""
+
+    def __init__(self, requested_at: float = None):
+        self.requested_at = requested_at or time.time()
+        self.engine: Optional[str] = None
+        self.voice: Optional[str] = None
+        self.synthesis_started_at: Optional[float] = None
+        self.first_handle = None
+        self.audio_seconds = 0.0
+
+
+class _Series:
+    def __init__(self):
+        self.histograms = {name: Histogram(bounds) for name, bounds in HISTOGRAMS.items()}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.requests = 0
+        self.failed = 0
+        self.cancelled = 0
+
+
+class TTSMetrics:
+    """Registry histogram & counter per (engine, voice)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, str], _Series] = {}
+        self._local = threading.local()
+
+    def _get(self, engine: str, voice: str) -> _Series:
+        key = (engine or "unknown", voice or "-")
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series()
+        return series
+
+    # ─── Sintesis ───────────────────────────────────────────────────
+    def observe_synthesis(self, engine: str, voice: str, seconds: float,
+                          audio_seconds: float, cached: bool):
+        with self._lock:
+            series = self._get(engine, voice)
+            if cached:
+                series.cache_hits += 1
+                return
+            series.cache_misses += 1
+            series.histograms["synthesis_ms"].observe(seconds * 1000)
+            if audio_seconds > 0:
+                series.histograms["rtf"].observe(seconds / audio_seconds)
+
+    # ─── Trace per request (thread worker antrian TTS) ──────────────
+    def begin_trace(self, requested_at: float = None) -> TTSTrace:
+        trace = TTSTrace(requested_at)
+        self._local.trace = trace
+        return trace
+
+    def current_trace(self) -> Optional[TTSTrace]:
+        return getattr(self._local, "trace", None)
+
+    def end_trace(self, trace: TTSTrace, status: str = "done"):
+        if getattr(self._local, "trace", None) is trace:
+            self._local.trace = None
+        if trace.engine is None:
+            # Tidak sampai ke jalur sintesis (teks kosong / gagal sebelum mulai)
+            return
+
+        first_audio_at = trace.first_handle.started_at if trace.first_handle is not None else None
+        with self._lock:
+            series = self._get(trace.engine, trace.voice)
+            series.requests += 1
+            if status == "failed":
+                series.failed += 1
+            elif status == "cancelled":
+                series.cancelled += 1
+            h = series.histograms
+            if trace.synthesis_started_at is not None:
+                h["request_to_synthesis_ms"].observe((trace.synthesis_started_at - trace.requested_at) * 1000)
+                if first_audio_at is not None:
+                    h["synthesis_to_first_audio_ms"].observe((first_audio_at - trace.synthesis_started_at) * 1000)
+            if first_audio_at is not None:
+                h["request_to_first_audio_ms"].observe((first_audio_at - trace.requested_at) * 1000)
+            if trace.audio_seconds:
+                h["audio_seconds"].observe(trace.audio_seconds)
+
+        if first_audio_at is not None:
+            logger.info(f"TTS metrics [{trace.engine}/{trace.voice}] first audio "
+                        f"{(first_audio_at - trace.requested_at) * 1000:.0f} ms, "
+                        f"audio {trace.audio_seconds:.1f}s, status={status}")
+
+    # ─── Export ─────────────────────────────────────────────────────
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                f"{engine}/{voice}": {
+                    "engine": engine,
+                    "voice": voice,
+                    "requests": s.requests,
+                    "failed": s.failed,
+                    "cancelled": s.cancelled,
+                    "cache_hits": s.cache_hits,
+                    "cache_misses": s.cache_misses,
+                    "histograms": {name: hist.snapshot() for name, hist in s.histograms.items()},
+                }
+                for (engine, voice), s in self._series.items()
+            }
+
+    def summary_lines(self) -> List[str]:
+        """Ringkasan satu baris per engine/voice untuk panel statistik."""
+        lines = []
+        for name, s in sorted(self.snapshot().items()):
+            h = s["histograms"]
+            ttfa = h["request_to_first_audio_ms"]
+            lookups = s["cache_hits"] + s["cache_misses"]
+            hit_rate = s["cache_hits"] / lookups * 100 if lookups else 0.0
+            lines.append(
+                f"{name}: first audio p50 {ttfa['p50'] or 0:.0f} / p95 {ttfa['p95'] or 0:.0f} ms, "
+                f"RTF p50 {h['rtf']['p50'] or 0:.2f}, cache hit {hit_rate:.0f}% ({s['requests']} req)"
+            )
+        return lines
+
+    def to_prometheus(self) -> str:
+        """Format teks Prometheus (histogram _bucket/_sum/_count + counter)."""
+        out = []
+        snapshot = self.snapshot()
+        for metric in HISTOGRAMS:
+            out.append(f"# TYPE streammate_tts_{metric} histogram")
+            for s in snapshot.values():
+                labels = f'engine="{s["engine"]}",voice="{s["voice"]}"'
+                hist = s["histograms"][metric]
+                for bound, cumulative in hist["buckets"].items():
+                    out.append(f'streammate_tts_{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                out.append(f"streammate_tts_{metric}_sum{{{labels}}} {hist['sum']}")
+                out.append(f"streammate_tts_{metric}_count{{{labels}}} {hist['count']}")
+        for counter in ("requests", "failed", "cancelled", "cache_hits", "cache_misses"):
+            out.append(f"# TYPE streammate_tts_{counter}_total counter")
+            for s in snapshot.values():
+                labels = f'engine="{s["engine"]}",voice="{s["voice"]}"'
+                out.append(f"streammate_tts_{counter}_total{{{labels}}} {s[counter]}")
+        return "\n".join(out) + "\n"
+
+    def export(self, path: Path = DEFAULT_EXPORT) -> Path:
+        """Tulis snapshot ke file: .prom → teks Prometheus, selain itu JSON."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".prom":
+            path.write_text(self.to_prometheus(), encoding="utf-8")
+        else:
+            payload = {"exported_at": time.time(), "series": self.snapshot()}
+            path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+_metrics: Optional[TTSMetrics] = None
+_metrics_lock = threading.Lock()
+
+
+def get_tts_metrics() -> TTSMetrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = TTSMetrics()
+        return _metrics
+
+
+# ─── Helper untuk jalur sintesis/playback (no-op tanpa trace aktif) ──
+def trace_label(engine: str, voice: str = None):
+    trace = get_tts_metrics().current_trace()
+    if trace is not None:
+        trace.engine, trace.voice = engine, voice
+
+
+def trace_synthesis_started():
+    trace = get_tts_metrics().current_trace()
+    if trace is not None and trace.synthesis_started_at is None:
+        trace.synthesis_started_at = time.time()
+
+
+def trace_audio(handle, seconds: float):
+    trace = get_tts_metrics().current_trace()
+    if trace is not None:
+        if trace.first_handle is None and handle is not None:
+            trace.first_handle = handle
+        trace.audio_seconds += seconds
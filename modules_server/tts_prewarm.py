@@ -0,0 +1,216 @@
+# modules_server/tts_prewarm.py
+"""
+Pre-synthesis frasa yang bisa ditebak (sapaan, terima kasih, template game,
+kalimat fallback) ke cache audio TTS, supaya balasan fast path langsung
+terdengar tanpa menunggu network.
+
+Template dengan {name} dipecah jadi segmen prefix/suffix yang disintesis
+lebih dulu; saat playback hanya nama penonton yang perlu disintesis, lalu
+prefix + nama + suffix diputar berurutan (gapless) lewat stream_segments.
+
+Pekerjaan pre-synthesis berjalan di thread background dan hanya saat
+antrian TTS sedang kosong, jadi tidak pernah menunda balasan yang live.
+"""
+
+import re
+import time
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from modules_server.tts_stream import split_for_tts
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+NAME_PLACEHOLDER = "{name}"
+
+_PUNCT_RE = re.compile(r"[^\w\s\?]")
+
+
+def clean_phrase(text: str) -> str:
+    # Sama dengan pembersihan balasan CoHost: buang tanda baca kecuali "?"
+    return " ".join(_PUNCT_RE.sub(" ", text or "").split())
+
+
+class PhraseTemplate:
+    """Template ternormalisasi + regex untuk mengenali teks hasil template."""
+
+    def __init__(self, template: str):
+        self.template = template
+        self.has_name = NAME_PLACEHOLDER in template
+        prefix, suffix = template.split(NAME_PLACEHOLDER) if self.has_name else (template, "")
+        self.prefix = clean_phrase(prefix)
+        self.suffix = clean_phrase(suffix)
+
+        pattern = "^"
+        if self.has_name:
+            if self.prefix:
+                pattern += re.escape(self.prefix) + r"\s+"
+            pattern += r"(?P<name>.+?)"
+            if self.suffix:
+                pattern += r"\s+" + re.escape(self.suffix)
+        else:
+            pattern += re.escape(self.prefix)
+        pattern += r"(?P<tail>\s.+)?$"
+        self._regex = re.compile(pattern, re.IGNORECASE)
+
+    def pieces(self) -> List[str]:
+        """Segmen statis yang bisa disintesis sebelum nama penonton diketahui."""
+        return [p for p in (self.prefix, self.suffix) if p]
+
+    def match(self, text: str) -> Optional[List[str]]:
+        m = self._regex.match(text)
+        if not m:
+            return None
+        segments = [self.prefix] if self.prefix else []
+        if self.has_name:
+            segments.append(m.group("name"))
+            if self.suffix:
+                segments.append(self.suffix)
+        if m.group("tail"):
+            # Sisa teks (mis. suffix personalisasi atau balasan LLM) tetap dipecah per kalimat
+            segments.extend(split_for_tts(m.group("tail")))
+        return segments
+
+
+class TTSPrewarmer:
+    """Registry template + worker pre-synthesis background."""
+
+    def __init__(self):
+        self._templates: Dict[str, PhraseTemplate] = {}
+        self._ordered: List[PhraseTemplate] = []
+        self._lock = threading.Lock()
+        self._pending: "deque[Tuple[str, str, str, str, float]]" = deque()
+        self._queued = set()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.synthesized = 0
+        self.already_cached = 0
+        self.failed = 0
+
+    # ─── Registry ───────────────────────────────────────────────────
+    def register(self, templates: Iterable[str]) -> List[PhraseTemplate]:
+        registered = []
+        with self._lock:
+            for template in templates:
+                # Template tanpa teks statis atau dengan >1 nama tidak bisa di-prewarm
+                if (not template or template.count(NAME_PLACEHOLDER) > 1
+                        or not clean_phrase(template.replace(NAME_PLACEHOLDER, ""))):
+                    continue
+                entry = self._templates.get(template)
+                if entry is None:
+                    entry = self._templates[template] = PhraseTemplate(template)
+                registered.append(entry)
+            # Template terpanjang dulu supaya prefix pendek tidak "menelan" template lain
+            self._ordered = sorted(self._templates.values(),
+                                   key=lambda t: len(t.prefix) + len(t.suffix), reverse=True)
+        return registered
+
+    def match(self, text: str) -> Optional[List[str]]:
+        """Pecah teks jadi segmen template (prefix, nama, suffix, sisa) kalau cocok."""
+        cleaned = clean_phrase(text)
+        if not cleaned:
+            return None
+        with self._lock:
+            templates = self._ordered
+        for template in templates:
+            segments = template.match(cleaned)
+            if segments:
+                return segments
+        return None
+
+    # ─── Pre-synthesis ──────────────────────────────────────────────
+    def prewarm(self, templates: Iterable[str], voices: Iterable[Tuple[str, str]],
+                phrases: Iterable[str] = ()) -> int:
+        """
+        Daftarkan template lalu antrikan segmen statisnya untuk tiap
+        (voice_name, language_code). Return jumlah segmen yang diantrikan.
+        """
+        from modules_server.tts_backends import engine_for_voice
+
+        pieces: List[str] = []
+        for template in self.register(templates):
+            pieces.extend(template.pieces())
+        pieces.extend(clean_phrase(p) for p in phrases if clean_phrase(p))
+
+        added = 0
+        with self._lock:
+            for voice_name, language_code in voices:
+                engine = engine_for_voice(voice_name)
+                for piece in dict.fromkeys(pieces):
+                    job = (engine, piece, voice_name, language_code)
+                    if job not in self._queued:
+                        self._queued.add(job)
+                        self._pending.append(job)
+                        added += 1
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        logger.info(f"TTS prewarm: {added} segmen diantrikan")
+        return added
+
+    def _worker(self):
+        from modules_server.tts_backends import is_cached, synthesize_cached
+        from modules_server.tts_queue import get_tts_queue
+
+        queue = get_tts_queue()
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                job = self._pending[0]
+
+            # Hanya jalan saat antrian TTS kosong (stream start / idle)
+            if not queue.is_idle():
+                self._wakeup.wait(0.5)
+                self._wakeup.clear()
+                continue
+
+            engine, piece, voice_name, language_code = job
+            try:
+                if is_cached(engine, piece, voice_name, language_code):
+                    self.already_cached += 1
+                else:
+                    synthesize_cached(engine, piece, voice_name, language_code)
+                    self.synthesized += 1
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"TTS prewarm gagal '{piece}': {e}")
+                time.sleep(1.0)
+
+            with self._lock:
+                self._pending.popleft()
+                self._queued.discard(job)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "templates": len(self._templates),
+                "pending": len(self._pending),
+                "synthesized": self.synthesized,
+                "already_cached": self.already_cached,
+                "failed": self.failed,
+            }
+
+
+_prewarmer: Optional[TTSPrewarmer] = None
+_prewarmer_lock = threading.Lock()
+
+
+def get_tts_prewarmer() -> TTSPrewarmer:
+    global _prewarmer
+    with _prewarmer_lock:
+        if _prewarmer is None:
+            _prewarmer = TTSPrewarmer()
+        return _prewarmer
+
+
+def plan_segments(text: str, streaming: bool = True) -> List[str]:
+    """Segmen playback: template yang sudah di-prewarm, atau potongan kalimat."""
+    segments = get_tts_prewarmer().match(text)
+    if segments:
+        return segments
+    return split_for_tts(text) if streaming else [text]
@@ -0,0 +1,265 @@
+# modules_server/tts_queue.py
+"""
+Antrian TTS tunggal untuk semua fitur (CoHost, Translate, Trakteer, preview).
+
+• Satu worker memutar job satu per satu → audio tidak pernah tumpang tindih
+• Prioritas: donation > reply > preview (urutan FIFO di prioritas yang sama)
+• Job yang masih antri bisa dibatalkan; job yang sedang diputar bisa di-skip
+  (sisa segmen tidak disintesis/diputar, buffer audio engine di-flush)
+• Barge-in: saat streamer menahan hotkey bicara, playback dihentikan dan
+  antrian ditahan sampai hotkey dilepas
+• on_finished selalu dipanggil tepat sekali (selesai, batal, atau gagal);
+  di aplikasi Qt callback dijalankan di main thread
+"""
+
+import sys
+import time
+import heapq
+import itertools
+import threading
+from typing import Callable, Dict, List, Optional
+
+from modules_server.tts_metrics import get_tts_metrics
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+PRIORITIES = {"donation": 0, "reply": 1, "preview": 2}
+
+_job_ids = itertools.count(1)
+
+
+class TTSJob:
+    """Satu permintaan TTS di antrian."""
+
+    def __init__(self, text: str, language_code: str = None, voice_name: str = None,
+                 output_device: int = None, priority: str = "reply", on_finished: Callable = None):
+        self.id = next(_job_ids)
+        self.text = text
+        self.language_code = language_code
+        self.voice_name = voice_name
+        self.output_device = output_device
+        self.priority = priority if priority in PRIORITIES else "reply"
+        self.on_finished = on_finished
+        self.status = "queued"  # queued / playing / done / cancelled / failed
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.status == "cancelled"
+
+    def wait(self, timeout: float = None) -> bool:
+        return self.done.wait(timeout)
+
+
+_dispatcher = None
+
+
+def _qt_dispatcher():
+    """QObject di main thread untuk menjalankan callback dari worker."""
+    global _dispatcher
+    if _dispatcher is None:
+        from PyQt6.QtCore import QObject, QCoreApplication, pyqtSignal, pyqtSlot
+
+        app = QCoreApplication.instance()
+        if app is None:
+            return None
+
+        class _Dispatcher(QObject):
+            call = pyqtSignal(object)
+
+            @pyqtSlot(object)
+            def run(self, fn):
+                fn()
+
+        dispatcher = _Dispatcher()
+        dispatcher.moveToThread(app.thread())
+        dispatcher.call.connect(dispatcher.run)
+        _dispatcher = dispatcher
+    return _dispatcher
+
+
+def _dispatch(callback: Callable):
+    if not callback:
+        return
+    try:
+        if "PyQt6" in sys.modules:
+            dispatcher = _qt_dispatcher()
+            if dispatcher is not None:
+                dispatcher.call.emit(callback)
+                return
+        callback()
+    except Exception as e:
+        logger.error(f"TTS on_finished error: {e}")
+
+
+class TTSQueue:
+    """Scheduler TTS berprioritas dengan satu worker playback."""
+
+    def __init__(self, runner: Callable):
+        # runner(text, language_code, voice_name, output_device, should_stop) → blocking
+        self._runner = runner
+        self._heap: List = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current: Optional[TTSJob] = None
+        self._paused = False
+
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.max_depth = 0
+        self._wait_total = 0.0
+        self._started = 0
+
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    # ─── Submit / cancel ────────────────────────────────────────────
+    def submit(self, text: str, language_code: str = None, voice_name: str = None,
+               output_device: int = None, on_finished: Callable = None,
+               priority: str = "reply") -> TTSJob:
+        job = TTSJob(text, language_code, voice_name, output_device, priority, on_finished)
+        dropped = []
+        with self._cond:
+            if job.priority == "preview":
+                # Preview baru menggantikan preview lama yang belum diputar
+                dropped = self._remove_queued(lambda j: j.priority == "preview")
+            heapq.heappush(self._heap, (PRIORITIES[job.priority], next(self._seq), job))
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(self._heap))
+            self._cond.notify()
+        for old in dropped:
+            self._finish(old, "cancelled")
+        return job
+
+    def _remove_queued(self, match: Callable[[TTSJob], bool]) -> List[TTSJob]:
+        removed = [entry[2] for entry in self._heap if match(entry[2])]
+        if removed:
+            self._heap = [entry for entry in self._heap if not match(entry[2])]
+            heapq.heapify(self._heap)
+        return removed
+
+    def cancel(self, job_id: int) -> bool:
+        """Batalkan job (yang masih antri atau sedang diputar)."""
+        with self._cond:
+            current = self._current
+            if current is not None and current.id == job_id:
+                return self.skip()
+            removed = self._remove_queued(lambda j: j.id == job_id)
+        for job in removed:
+            self._finish(job, "cancelled")
+        return bool(removed)
+
+    def skip(self) -> bool:
+        """Hentikan job yang sedang diputar; job berikutnya langsung jalan."""
+        with self._cond:
+            job = self._current
+            if job is None or job.status != "playing":
+                return False
+            job.status = "cancelled"
+        from modules_server.audio_engine import get_audio_engine
+        get_audio_engine().flush()
+        logger.info(f"TTS job {job.id} di-skip")
+        return True
+
+    def clear(self, priority: str = None) -> int:
+        """Batalkan semua job yang masih antri (opsional per prioritas)."""
+        with self._cond:
+            removed = self._remove_queued(lambda j: priority is None or j.priority == priority)
+        for job in removed:
+            self._finish(job, "cancelled")
+        return len(removed)
+
+    # ─── Barge-in ───────────────────────────────────────────────────
+    def barge_in(self):
+        """Streamer mulai bicara: hentikan playback dan tahan antrian."""
+        with self._cond:
+            self._paused = True
+        self.skip()
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify()
+
+    # ─── Worker ─────────────────────────────────────────────────────
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._paused or not self._heap:
+                    self._cond.wait()
+                _, _, job = heapq.heappop(self._heap)
+                job.status = "playing"
+                job.started_at = time.time()
+                self._current = job
+                self._wait_total += job.started_at - job.enqueued_at
+                self._started += 1
+
+            status = "done"
+            # Trace latency per request (enqueue → sintesis → sample pertama)
+            trace = get_tts_metrics().begin_trace(job.enqueued_at)
+            try:
+                self._runner(job.text, job.language_code, job.voice_name, job.output_device,
+                             should_stop=lambda: job.cancelled)
+            except Exception as e:
+                logger.error(f"TTS job {job.id} gagal: {e}")
+                status = "failed"
+            get_tts_metrics().end_trace(trace, "cancelled" if job.cancelled else status)
+
+            with self._cond:
+                self._current = None
+            self._finish(job, "cancelled" if job.cancelled else status)
+
+    def _finish(self, job: TTSJob, status: str):
+        with self._cond:
+            job.status = status
+            job.finished_at = time.time()
+            if status == "done":
+                self.completed += 1
+            elif status == "cancelled":
+                self.cancelled += 1
+            else:
+                self.failed += 1
+        job.done.set()
+        _dispatch(job.on_finished)
+
+    # ─── Metrics ────────────────────────────────────────────────────
+    def is_idle(self) -> bool:
+        with self._cond:
+            return not self._heap and self._current is None
+
+    def stats(self) -> Dict:
+        with self._cond:
+            by_priority = {name: 0 for name in PRIORITIES}
+            for _, _, job in self._heap:
+                by_priority[job.priority] += 1
+            current = self._current
+            return {
+                "depth": len(self._heap),
+                "depth_by_priority": by_priority,
+                "max_depth": self.max_depth,
+                "playing": f"[{current.priority}] {current.text[:40]}" if current else None,
+                "paused": self._paused,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "avg_wait_ms": round(self._wait_total / self._started * 1000, 1) if self._started else 0.0,
+            }
+
+
+_tts_queue: Optional[TTSQueue] = None
+_tts_queue_lock = threading.Lock()
+
+
+def get_tts_queue() -> TTSQueue:
+    global _tts_queue
+    with _tts_queue_lock:
+        if _tts_queue is None:
+            from modules_server.tts_engine import speak_now
+            _tts_queue = TTSQueue(speak_now)
+        return _tts_queue
@@ -0,0 +1,107 @@
+# modules_server/tts_service.py
+"""
+TTS synthesis-only untuk endpoint server (/tts/synthesize, /speak).
+
+Tidak ada playback di mesin server: teks dipecah per kalimat, tiap segmen
+disintesis paralel lewat cache audio TTS server, dinormalisasi (loudness +
+pitch opsional) lalu di-encode dan dikirim berurutan begitu siap.
+
+Format output:
+  • ogg : Ogg Opus, satu logical stream per segmen (chained Ogg). Kecil
+          (~24 kbps) dan tiap segmen bisa di-decode begitu selesai diterima
+  • pcm : PCM s16le mono mentah, bisa langsung disambung antar segmen
+  • wav : satu file WAV utuh (tanpa streaming per segmen)
+"""
+
+import io
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from modules_server.audio_dsp import DSPChain, loudness_gain
+from modules_server.tts_backends import engine_for_voice, synthesize_cached
+from modules_server.tts_stream import split_for_tts
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+# Opus hanya menerima 8/12/16/24/48 kHz; 24 kHz cukup untuk suara TTS
+OUTPUT_RATE = 24000
+
+MEDIA_TYPES = {
+    "ogg": "audio/ogg",
+    "pcm": f"audio/L16;rate={OUTPUT_RATE};channels=1",
+    "wav": "audio/wav",
+}
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TTS_MAX_CONCURRENCY", "4")),
+    thread_name_prefix="tts-synth",
+)
+
+
+def encode_audio(data: np.ndarray, samplerate: int, fmt: str) -> bytes:
+    if fmt == "pcm":
+        return (np.clip(data, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    buf = io.BytesIO()
+    if fmt == "ogg":
+        sf.write(buf, data, samplerate, format="OGG", subtype="OPUS")
+    else:
+        sf.write(buf, data, samplerate, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def render_pcm(text: str, voice: str = None, language: str = None, pitch: float = 0) -> np.ndarray:
+    """Sintesis (lewat cache) → mono float32 ter-normalisasi di OUTPUT_RATE."""
+    engine = engine_for_voice(voice)
+    data, samplerate = synthesize_cached(engine, text, voice, language)
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim > 1:
+        data = data.mean(axis=1, dtype=np.float32)
+    data = np.ascontiguousarray(data)
+    # DSPChain per panggilan: buffer-nya tidak aman dipakai bersama antar thread
+    gain = loudness_gain(data, samplerate)
+    return DSPChain().process(data, samplerate, OUTPUT_RATE, gain, pitch).copy()
+
+
+def render_segment(text: str, voice: str = None, language: str = None,
+                   pitch: float = 0, fmt: str = "ogg") -> bytes:
+    return encode_audio(render_pcm(text, voice, language, pitch), OUTPUT_RATE, fmt)
+
+
+async def synthesize_stream(text: str, voice: str = None, language: str = None,
+                            pitch: float = 0, fmt: str = "ogg") -> Tuple[bytes, AsyncIterator[bytes], int]:
+    """
+    Mulai sintesis semua segmen paralel. Return (chunk pertama, iterator sisa,
+    jumlah segmen). Chunk pertama ditunggu di sini supaya error total masih
+    bisa dikembalikan sebagai status HTTP sebelum body streaming dimulai.
+    """
+    loop = asyncio.get_running_loop()
+    segments = split_for_tts(text) if fmt != "wav" else [text]
+    tasks = [loop.run_in_executor(_executor, render_segment, seg, voice, language, pitch, fmt)
+             for seg in segments]
+
+    first = None
+    index = 0
+    while first is None:
+        try:
+            first = await tasks[index]
+        except Exception as e:
+            if index == len(tasks) - 1:
+                raise
+            logger.error(f"TTS segmen {index + 1}/{len(tasks)} gagal: {e}")
+        index += 1
+
+    async def rest() -> AsyncIterator[bytes]:
+        for i, task in enumerate(tasks[index:], start=index):
+            try:
+                yield await task
+            except Exception as e:
+                # Segmen gagal dilewati; segmen lain tetap terkirim
+                logger.error(f"TTS segmen {i + 1}/{len(tasks)} gagal: {e}")
+
+    return first, rest(), len(segments)
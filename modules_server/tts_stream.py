@@ -0,0 +1,89 @@
+# modules_server/tts_stream.py
+"""
+TTS streaming per kalimat.
+
+Balasan dipecah jadi kalimat/klausa; tiap potongan disintesis paralel
+(dibatasi max_workers) lalu diantrikan ke audio engine sesuai urutan
+begitu siap. Karena engine menulis ke ring buffer yang sama, potongan
+berurutan diputar tanpa jeda, dan suara pertama keluar setelah potongan
+pertama selesai disintesis, bukan setelah seluruh balasan.
+
+Balasan CoHost sering sudah dibersihkan dari tanda baca, jadi teks tanpa
+tanda baca dipecah per jumlah kata (potongan pertama dibuat pendek).
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from modules_server.tts_metrics import trace_audio, trace_synthesis_started
+
+import logging
+logger = logging.getLogger('StreamMate')
+
+_CLAUSE_RE = re.compile(r"(?<=[.!?;:,])\s+")
+
+_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="tts-stream")
+
+
+def split_for_tts(text: str, first_words: int = 6, max_words: int = 14, min_chars: int = 12) -> List[str]:
+    """Pecah teks jadi potongan yang enak diucapkan dan cepat disintesis."""
+    text = " ".join((text or "").split())
+    if not text:
+        return []
+
+    segments: List[str] = []
+    for clause in _CLAUSE_RE.split(text):
+        # Gabung klausa yang terlalu pendek ke sebelumnya (hindari jeda aneh)
+        if segments and len(clause) < min_chars:
+            segments[-1] = f"{segments[-1]} {clause}"
+        else:
+            segments.append(clause)
+
+    result: List[str] = []
+    for segment in segments:
+        words = segment.split()
+        limit = first_words if not result else max_words
+        while len(words) > limit + 3:
+            result.append(" ".join(words[:limit]))
+            words = words[limit:]
+            limit = max_words
+        result.append(" ".join(words))
+    return result
+
+
+def stream_segments(segments: List[str],
+                    synthesize: Callable[[str], Tuple[np.ndarray, int]],
+                    play: Callable[[np.ndarray, int], object],
+                    on_first_audio: Callable[[], None] = None,
+                    should_stop: Callable[[], bool] = None) -> Optional[object]:
+    """
+    Sintesis paralel, enqueue berurutan. Return handle playback potongan
+    terakhir (selesainya = akhir seluruh balasan), atau None kalau semua gagal.
+    should_stop() dicek sebelum tiap potongan (cancel / barge-in).
+    """
+    trace_synthesis_started()
+    futures = [_executor.submit(synthesize, segment) for segment in segments]
+    last_handle = None
+    errors = 0
+    for index, future in enumerate(futures):
+        try:
+            data, samplerate = future.result()
+        except Exception as e:
+            errors += 1
+            logger.error(f"TTS segmen {index + 1}/{len(segments)} gagal: {e}")
+            continue
+        if should_stop and should_stop():
+            for pending in futures[index + 1:]:
+                pending.cancel()
+            return last_handle
+        last_handle = play(data, samplerate)
+        trace_audio(last_handle, len(data) / samplerate)
+        if on_first_audio and index - errors == 0:
+            on_first_audio()
+
+    if last_handle is None and errors:
+        raise RuntimeError(f"Semua {errors} segmen TTS gagal disintesis")
+    return last_handle
@@ -0,0 +1,48 @@
+# tests/test_audio_capture.py
+import numpy as np
+import pytest
+
+try:
+    from modules_client.audio_capture import RecordingBuffer
+except (ImportError, OSError):  # sounddevice / PortAudio tidak tersedia
+    pytest.skip("butuh sounddevice + PortAudio", allow_module_level=True)
+
+
+def make_buffer(capacity):
+    return RecordingBuffer(max_seconds=capacity, samplerate=1)
+
+
+def test_read_before_wrap_is_view():
+    buffer = make_buffer(8)
+    buffer.write(np.arange(5, dtype=np.float32))
+    pcm = buffer.pcm()
+    assert pcm.tolist() == [0, 1, 2, 3, 4]
+    assert np.shares_memory(pcm, buffer._data)
+    assert buffer.read(1, 3).tolist() == [1, 2]
+
+
+def test_wrap_keeps_latest_samples_in_order():
+    buffer = make_buffer(8)
+    buffer.write(np.arange(6, dtype=np.float32))
+    buffer.write(np.arange(6, 11, dtype=np.float32))
+    assert buffer.written == 11
+    assert buffer.oldest == 3
+    assert buffer.overflows == 3
+    assert buffer.pcm().tolist() == list(range(3, 11))
+    # Posisi absolut yang sudah tertimpa dipotong ke sample tertua
+    assert buffer.read(0, 5).tolist() == [3, 4]
+    assert buffer.read(7, 11).tolist() == [7, 8, 9, 10]
+
+
+def test_write_larger_than_capacity():
+    buffer = make_buffer(4)
+    buffer.write(np.arange(10, dtype=np.float32))
+    assert buffer.pcm().tolist() == [6, 7, 8, 9]
+    assert buffer.seconds == 4
+
+
+def test_empty_range():
+    buffer = make_buffer(4)
+    assert len(buffer.pcm()) == 0
+    buffer.write(np.ones(2, dtype=np.float32))
+    assert len(buffer.read(2, 2)) == 0
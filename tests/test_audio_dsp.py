@@ -0,0 +1,62 @@
+# tests/test_audio_dsp.py
+import numpy as np
+import pytest
+
+from modules_server.audio_dsp import DSPChain, loudness_gain
+
+
+def sine(n, samplerate=24000, freq=440.0, amp=0.1):
+    return (amp * np.sin(2 * np.pi * freq * np.arange(n) / samplerate)).astype(np.float32)
+
+
+def rms_db(data):
+    return 10 * np.log10(np.mean(data.astype(np.float64) ** 2))
+
+
+def test_loudness_gain_reaches_target_and_ignores_silence():
+    voiced = sine(24000, amp=0.05)
+    padded = np.concatenate([np.zeros(24000, dtype=np.float32), voiced])
+    gain = loudness_gain(voiced, 24000, target_db=-20.0)
+    assert rms_db(voiced * gain) == pytest.approx(-20.0, abs=0.2)
+    assert loudness_gain(padded, 24000, target_db=-20.0) == pytest.approx(gain, rel=1e-3)
+    assert loudness_gain(np.zeros(1000, dtype=np.float32), 24000) == 1.0
+    assert loudness_gain(sine(24000, amp=0.01), 24000, max_gain_db=12.0) == pytest.approx(10 ** (12 / 20))
+
+
+def test_passthrough_same_rate():
+    data = sine(1000)
+    out = DSPChain().process(data, 24000, 24000)
+    assert np.allclose(out, data)
+
+
+def test_resample_length_and_linear_interpolation():
+    data = np.arange(100, dtype=np.float32) / 100
+    out = DSPChain().process(data, 24000, 48000)
+    assert len(out) == 200
+    assert out[1] == pytest.approx((data[0] + data[1]) / 2)
+
+
+def test_pitch_shortens_clip():
+    chain = DSPChain()
+    assert len(chain.process(sine(24000), 24000, 24000, pitch=12)) == 12000
+    # Pitch dibatasi ±12 semitone
+    assert len(chain.process(sine(24000), 24000, 24000, pitch=48)) == 12000
+
+
+def test_gain_and_soft_limiter():
+    chain = DSPChain(limiter_threshold=0.9)
+    out = chain.process(sine(24000, amp=0.5), 24000, 24000, gain=4.0)
+    assert np.max(np.abs(out)) <= 1.0
+    assert np.max(np.abs(out)) > 0.9
+    quiet = chain.process(sine(24000, amp=0.1), 24000, 24000, gain=2.0)
+    assert np.max(np.abs(quiet)) == pytest.approx(0.2, abs=1e-3)
+
+
+def test_buffer_reused_and_grows():
+    chain = DSPChain()
+    first = chain.process(sine(1000), 24000, 24000)
+    second = chain.process(sine(1000), 24000, 24000)
+    assert np.shares_memory(first, second)
+    long = chain.process(sine(50000), 24000, 24000)
+    assert len(long) == 50000 and chain.stats()["buffer_samples"] >= 50000
+    assert len(chain.process(np.zeros(0, dtype=np.float32), 24000, 48000)) == 0
@@ -0,0 +1,93 @@
+# tests/test_cache_manager.py
+import json
+import threading
+
+import pytest
+
+from modules_client.cache_manager import CacheManager
+from modules_client.intent_classifier import IntentClassifier
+
+CONTEXT = {"game": "ML", "lang": "id", "author": "budi"}
+
+
+@pytest.fixture
+def make_cache(tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        kwargs.setdefault("flush_interval", 60)
+        cache = CacheManager(cache_dir=str(tmp_path), intent_classifier=IntentClassifier(use_model=False),
+                             **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        cache._stop_event.set()
+        cache._flush_event.set()
+
+
+def cached(cache, message):
+    # Akses entry langsung: tanpa suffix acak _personalize_response
+    return cache.cache.get(cache._generate_key(message, "ML"), {}).get("response")
+
+
+def test_lru_eviction_keeps_recently_used(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.cache_response("pesan satu", "satu", CONTEXT)
+    cache.cache_response("pesan dua", "dua", CONTEXT)
+    assert cache.get_cached_response("pesan satu", CONTEXT).startswith("satu")
+    cache.cache_response("pesan tiga", "tiga", CONTEXT)
+    assert cached(cache, "pesan dua") is None
+    assert cached(cache, "pesan satu") == "satu"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_ttl_expiry(make_cache, monkeypatch):
+    cache = make_cache(cache_ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr("modules_client.cache_manager.time.time", lambda: now[0])
+    cache.cache_response("pesan lama", "lama", CONTEXT)
+    now[0] += 5
+    assert cached(cache, "pesan lama") == "lama"
+    now[0] += 10
+    assert cache.get_cached_response("pesan lama", CONTEXT) is None
+    assert cached(cache, "pesan lama") is None
+
+
+def test_snapshot_roundtrip(make_cache, tmp_path):
+    cache = make_cache()
+    cache.cache_response("pesan simpan", "tersimpan", CONTEXT)
+    cache.flush()
+    data = json.loads((tmp_path / "response_cache.json").read_text(encoding="utf-8"))
+    assert [entry["response"] for entry in data.values()] == ["tersimpan"]
+    assert cached(make_cache(), "pesan simpan") == "tersimpan"
+
+
+def test_concurrent_saves_do_not_interleave(make_cache, tmp_path, monkeypatch):
+    cache = make_cache()
+    real_replace = __import__("os").replace
+    first_paused = threading.Event()
+    second_done = threading.Event()
+
+    def slow_replace(src, dst):
+        if not first_paused.is_set():
+            # Penulis pertama berhenti di antara tulis .tmp dan replace
+            first_paused.set()
+            second_done.wait(0.3)
+        real_replace(src, dst)
+
+    monkeypatch.setattr("modules_client.cache_manager.os.replace", slow_replace)
+    cache.cache_response("pesan lama", "lama", CONTEXT)
+    first = threading.Thread(target=cache.flush)
+    first.start()
+    first_paused.wait(1)
+    cache.cache_response("pesan baru", "baru", CONTEXT)
+    cache.flush()
+    second_done.set()
+    first.join()
+
+    data = json.loads((tmp_path / "response_cache.json").read_text(encoding="utf-8"))
+    assert sorted(entry["response"] for entry in data.values()) == ["baru", "lama"]
+    assert not cache._dirty
+    assert not (tmp_path / "response_cache.json.tmp").exists()
@@ -0,0 +1,113 @@
+# tests/test_failover.py
+import time
+
+import pytest
+import requests
+
+from modules_client import failover
+from modules_client.failover import CircuitBreaker, EndpointBackoff, FailoverPool
+
+
+def make_response(status, retry_after=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = b'{"reply": "ok"}'
+    if retry_after is not None:
+        response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Server palsu: {base_url: status | (status, retry_after) | Exception | callable}."""
+    behaviour, hits = {}, []
+
+    def post(url, json=None, timeout=None):
+        base = url.rsplit("/", 1)[0]
+        hits.append(base)
+        action = behaviour[base]
+        if callable(action):
+            action = action()
+        if isinstance(action, Exception):
+            raise action
+        status, retry_after = action if isinstance(action, tuple) else (action, None)
+        return make_response(status, retry_after)
+
+    monkeypatch.setattr(failover.requests, "post", post)
+    return behaviour, hits
+
+
+def test_breaker_opens_half_opens_and_closes(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(failover.time, "time", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # Gagal saat half-open → langsung open lagi
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    now[0] += 10
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failover_to_next_endpoint_and_skip_open(server):
+    behaviour, hits = server
+    behaviour.update({"http://a": requests.exceptions.ConnectionError("down"), "http://b": 200})
+    pool = FailoverPool(["http://a", "http://b"], hedging=False, failure_threshold=1)
+    assert pool.post("ai_reply", {}).json() == {"reply": "ok"}
+    assert pool.active_url == "http://b"
+    assert pool.endpoints[0].breaker.state == CircuitBreaker.OPEN
+    hits.clear()
+    pool.post("ai_reply", {})
+    assert hits == ["http://b"]
+
+
+def test_client_errors_are_not_failures(server):
+    behaviour, _ = server
+    behaviour.update({"http://a": 404, "http://b": 200})
+    pool = FailoverPool(["http://a", "http://b"], hedging=False, failure_threshold=1)
+    with pytest.raises(requests.exceptions.HTTPError):
+        pool.post("ai_reply", {})
+    assert pool.endpoints[0].breaker.state == CircuitBreaker.CLOSED
+
+
+def test_retry_after_backs_off_without_tripping_breaker(server):
+    behaviour, hits = server
+    behaviour.update({"http://a": (503, 60), "http://b": 200})
+    pool = FailoverPool(["http://a", "http://b"], hedging=False, failure_threshold=1)
+    with pytest.raises(requests.exceptions.HTTPError):
+        pool.post("ai_reply", {})
+    endpoint = pool.endpoints[0]
+    assert endpoint.breaker.state == CircuitBreaker.CLOSED
+    assert endpoint.backoff_remaining() > 0
+    hits.clear()
+    pool.post("ai_reply", {})
+    assert hits == ["http://b"]
+
+    single = FailoverPool(["http://a"], hedging=False)
+    with pytest.raises(requests.exceptions.HTTPError):
+        single.post("ai_reply", {})
+    with pytest.raises(EndpointBackoff) as info:
+        single.post("ai_reply", {})
+    assert info.value.retry_after > 0
+
+
+def test_hedged_request_uses_first_answer(server):
+    behaviour, _ = server
+
+    def slow():
+        time.sleep(0.5)
+        return 200
+
+    behaviour.update({"http://a": slow, "http://b": 200})
+    pool = FailoverPool(["http://a", "http://b"], default_hedge_delay=0.05, min_hedge_delay=0.01)
+    start = time.time()
+    pool.post("ai_reply", {}, timeout=2)
+    assert time.time() - start < 0.4
+    assert pool.hedged_requests == 1
+    assert pool.active_url == "http://b"
@@ -0,0 +1,46 @@
+# tests/test_intent_classifier.py
+import pytest
+
+from modules_client.intent_classifier import GENERAL, IntentClassifier
+
+# Keyword tabel lama CacheManager._match_pattern → intent yang diharapkan
+OLD_CACHE_PATTERNS = {
+    "greeting": ["halo", "hello", "hi", "hai", "pagi", "siang", "sore", "malam"],
+    "game_question": ["main apa", "game apa", "lagi main", "apa yang dimain", "maen apa"],
+    "thanks": ["makasih", "terima kasih", "thank", "thanks", "tq"],
+    "rank": ["rank", "tier", "division", "medal"],
+}
+
+
+@pytest.fixture
+def classifier():
+    return IntentClassifier(use_model=False)
+
+
+@pytest.mark.parametrize("intent,phrase", [
+    (intent, phrase) for intent, phrases in OLD_CACHE_PATTERNS.items() for phrase in phrases
+])
+def test_old_cache_keywords_keep_their_intent(classifier, intent, phrase):
+    assert classifier.classify(f"bang {phrase}")[0] == intent
+
+
+@pytest.mark.parametrize("message", ["lagi main apa", "lagi main apa bang?", "Main apa hari ini", "game apa tuh"])
+def test_game_questions_are_confident(classifier, message):
+    assert classifier.is_confident(message) == ("game_question", True)
+
+
+def test_prefix_keywords_and_general(classifier):
+    assert classifier.classify("makanannya enak")[0] == "eating"
+    assert classifier.classify("udah ranked belum")[0] == "rank"
+    assert classifier.classify("cuaca cerah") == (GENERAL, 1.0)
+
+
+def test_competing_intents_lower_confidence(classifier):
+    _, alone = classifier.classify("terima kasih")
+    _, mixed = classifier.classify("terima kasih, lagi push rank ya")
+    assert mixed < alone
+
+
+def test_extra_rules_from_config():
+    classifier = IntentClassifier({"gaming_build": ["savage"]}, use_model=False)
+    assert classifier.classify("savage tadi keren")[0] == "gaming_build"
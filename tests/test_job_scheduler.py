@@ -0,0 +1,88 @@
+# tests/test_job_scheduler.py
+import asyncio
+import threading
+
+import pytest
+
+from modules_server.job_scheduler import FairScheduler, SchedulerRejected, TierResolver
+
+
+@pytest.fixture
+def billing_db(tmp_path, monkeypatch):
+    # Modul billing membuat billing_security.db di cwd saat diimport
+    monkeypatch.chdir(tmp_path)
+    from modules_server.billing_security import BillingSecurityDB
+    db = BillingSecurityDB(str(tmp_path / "billing.db"))
+    db.set_license_cache("pro@example.com", {"is_valid": True, "tier": "pro"})
+    db.start_session("pro@example.com", "cohost", "sess-pro")
+    db.start_session("free@example.com", "cohost", "sess-free")
+    return db
+
+
+def test_identity_comes_from_active_session(billing_db):
+    resolver = TierResolver(billing_db)
+    assert resolver.identify("sess-pro", "1.2.3.4") == ("pro@example.com", "pro")
+    assert resolver.identify("sess-free", "1.2.3.4") == ("free@example.com", "demo")
+
+
+def test_unknown_or_missing_session_is_anonymous_per_ip(billing_db):
+    resolver = TierResolver(billing_db)
+    assert resolver.identify(None, "1.2.3.4") == ("ip:1.2.3.4", "demo")
+    assert resolver.identify("pro@example.com", "5.6.7.8") == ("ip:5.6.7.8", "demo")
+    billing_db.end_session("sess-pro")
+    assert TierResolver(billing_db).identify("sess-pro", "1.2.3.4") == ("ip:1.2.3.4", "demo")
+
+
+def run_jobs(scheduler, jobs, gate):
+    """jobs: [(user, tier, label)]. Return label sesuai urutan mulai jalan."""
+    order = []
+
+    def work(label):
+        def fn():
+            order.append(label)
+            gate.wait(5)
+            return label
+        return fn
+
+    async def main():
+        blocker = asyncio.create_task(scheduler.submit("blocker", "demo", work("blocker")))
+        await asyncio.sleep(0.05)
+        tasks = [asyncio.create_task(scheduler.submit(user, tier, work(label))) for user, tier, label in jobs]
+        await asyncio.sleep(0.05)
+        gate.set()
+        return await asyncio.gather(blocker, *tasks, return_exceptions=True)
+
+    results = asyncio.run(main())
+    return order[1:], results[1:]
+
+
+def test_weighted_fair_order():
+    scheduler = FairScheduler(max_concurrency=1, user_queue_limit=10)
+    # Spammer antri duluan, user lain tetap kebagian giliran
+    jobs = [("spam", "demo", f"s{i}") for i in range(4)] + [("other", "demo", "o0")]
+    order, _ = run_jobs(scheduler, jobs, threading.Event())
+    assert order.index("o0") <= 1
+
+    scheduler = FairScheduler(max_concurrency=1)
+    jobs = [("a", "demo", "a0"), ("a", "demo", "a1"), ("b", "pro", "b0"), ("b", "pro", "b1")]
+    order, _ = run_jobs(scheduler, jobs, threading.Event())
+    assert order[:2] == ["b0", "b1"]
+
+
+def test_user_queue_limit_returns_429():
+    scheduler = FairScheduler(max_concurrency=1, user_queue_limit=2)
+    jobs = [("spam", "demo", f"s{i}") for i in range(3)]
+    _, results = run_jobs(scheduler, jobs, threading.Event())
+    rejected = [r for r in results if isinstance(r, SchedulerRejected)]
+    assert len(rejected) == 1 and rejected[0].status_code == 429
+    assert rejected[0].retry_after >= 1
+    assert scheduler.status()["queued"] == 0
+
+
+def test_queue_deadline_returns_503_and_releases_accounting():
+    scheduler = FairScheduler(max_concurrency=1, queue_deadline=0.01)
+    gate = threading.Event()
+    _, results = run_jobs(scheduler, [("u", "demo", "late")], gate)
+    assert isinstance(results[0], SchedulerRejected) and results[0].status_code == 503
+    status = scheduler.status()
+    assert status["queued"] == 0 and status["queued_users"] == 0 and status["expired"] == 1
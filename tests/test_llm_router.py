@@ -0,0 +1,42 @@
+# tests/test_llm_router.py
+import pytest
+
+pytest.importorskip("dotenv")
+
+from modules_server.llm_router import LLMProvider, LLMRouter
+
+
+def make_provider(name="p", **kwargs):
+    return LLMProvider(name=name, base_url="http://localhost", model="m", api_key="key", **kwargs)
+
+
+def test_new_provider_scores_optimistic():
+    assert make_provider().score() == 0.0
+
+
+def test_failed_only_provider_scores_like_timeout():
+    provider = make_provider(timeout=30)
+    provider.stats.record(0.1, ok=False)
+    # latency = timeout (belum pernah sukses) + penalti error 100% x timeout
+    assert provider.score() == pytest.approx(60.0)
+
+
+def test_errors_rank_below_slower_healthy_provider():
+    fast_flaky = make_provider("flaky", timeout=10)
+    slow_ok = make_provider("slow", timeout=10)
+    for i in range(10):
+        fast_flaky.stats.record(0.2, ok=i % 2 == 0)
+        slow_ok.stats.record(1.5, ok=True)
+    assert slow_ok.score() < fast_flaky.score()
+    router = LLMRouter([fast_flaky, slow_ok], explore_rate=0.0)
+    assert router._ranked()[0] is slow_ok
+
+
+def test_load_and_cost_raise_score():
+    provider = make_provider(max_concurrency=2, cost_per_1k_input=1.0, cost_per_1k_output=1.0)
+    provider.stats.record(1.0, ok=True)
+    idle = provider.score()
+    assert provider.try_acquire()
+    assert provider.score() == pytest.approx(idle * 1.5)
+    provider.release()
+    assert provider.score(cost_weight=0.5) == pytest.approx(idle + 1.0)
@@ -0,0 +1,142 @@
+# tests/test_reply_cache.py
+import asyncio
+import threading
+
+import pytest
+
+from modules_server.reply_cache import ReplyCache, make_key
+
+
+class Rejected(Exception):
+    pass
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_make_key_normalizes_prompt():
+    assert make_key("Halo  Semua", "sys", model="m") == make_key("halo semua", "SYS", model="m")
+    assert make_key("halo", model="a") != make_key("halo", model="b")
+
+
+def test_lru_and_ttl():
+    cache = ReplyCache(max_entries=2, ttl=300)
+    for key in ("a", "b", "c"):
+        cache.get_or_compute(key, lambda key=key: key.upper())
+    assert cache.get_or_compute("a", lambda: "A2") == ("A2", "miss")  # "a" sudah tergusur
+    assert cache.get_or_compute("c", lambda: "x") == ("C", "hit")
+
+    no_ttl = ReplyCache(ttl=0)
+    no_ttl.get_or_compute("a", lambda: "A")
+    assert no_ttl.get_or_compute("a", lambda: "B") == ("B", "miss")
+
+
+def test_sync_single_flight():
+    cache = ReplyCache()
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(3)]
+    threads[0].start()
+    while not cache._flights:
+        pass
+    for thread in threads[1:]:
+        thread.start()
+    while cache.coalesced < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 1
+    assert sorted(source for _, source in results) == ["coalesced", "coalesced", "miss"]
+
+
+async def _leader_and_waiters(cache, leader_compute, waiter_compute, retry_on=()):
+    started = asyncio.Event()
+
+    async def leader_wrapper():
+        started.set()
+        return await leader_compute()
+
+    leader = asyncio.create_task(cache.get_or_compute_async("k", leader_wrapper, retry_on=retry_on))
+    await started.wait()
+    waiters = [asyncio.create_task(cache.get_or_compute_async("k", waiter_compute, retry_on=retry_on))
+               for _ in range(2)]
+    await asyncio.sleep(0)
+    return leader, waiters
+
+
+def test_async_leader_cancel_does_not_cancel_waiters():
+    async def main():
+        cache = ReplyCache()
+        waiter_calls = []
+
+        async def slow():
+            await asyncio.sleep(10)
+
+        async def waiter_compute():
+            waiter_calls.append(1)
+            await asyncio.sleep(0.01)
+            return "waiter"
+
+        leader, waiters = await _leader_and_waiters(cache, slow, waiter_compute)
+        leader.cancel()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        assert leader.cancelled()
+        assert not any(w.cancelled() for w in waiters)
+        # Satu waiter jadi leader baru, waiter lain ikut flight-nya
+        assert sorted(results) == [("waiter", "coalesced"), ("waiter", "miss")]
+        assert len(waiter_calls) == 1
+        assert cache.stats()["in_flight"] == 0
+
+    run(main())
+
+
+def test_async_leader_error_reaches_waiters():
+    async def main():
+        cache = ReplyCache()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def never():
+            raise AssertionError("waiter tidak boleh compute sendiri")
+
+        leader, waiters = await _leader_and_waiters(cache, failing, never)
+        results = await asyncio.gather(leader, *waiters, return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert cache.upstream_errors == 1
+        assert cache.stats()["in_flight"] == 0
+
+    run(main())
+
+
+def test_async_retry_on_error_lets_waiters_compute():
+    async def main():
+        cache = ReplyCache()
+
+        async def rejected():
+            await asyncio.sleep(0.01)
+            raise Rejected()
+
+        async def waiter_compute():
+            await asyncio.sleep(0.01)
+            return "waiter"
+
+        leader, waiters = await _leader_and_waiters(cache, rejected, waiter_compute, retry_on=(Rejected,))
+        with pytest.raises(Rejected):
+            await leader
+        results = await asyncio.gather(*waiters)
+        assert sorted(results) == [("waiter", "coalesced"), ("waiter", "miss")]
+        assert cache.get_or_compute("k", lambda: "x") == ("waiter", "hit")
+
+    run(main())
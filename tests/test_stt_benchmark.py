@@ -0,0 +1,35 @@
+# tests/test_stt_benchmark.py
+from modules_client.stt_benchmark import normalize_text, recommend, wer, word_errors
+
+
+def test_normalize_strips_tags_and_punctuation():
+    assert normalize_text("[MUSIC] Halo, Semua!") == ["halo", "semua"]
+
+
+def test_word_errors_counts_edits():
+    assert word_errors("halo semua apa kabar", "halo semua apa kabar") == (0, 4)
+    assert word_errors("halo semua apa kabar", "halo apa kabar") == (1, 4)
+    assert word_errors("halo semua", "halo teman semua") == (1, 2)
+    assert word_errors("halo semua", "hai semuanya") == (2, 2)
+
+
+def test_wer_with_empty_reference():
+    assert wer("", "") == 0.0
+    assert wer("", "halo") == 1.0
+
+
+def row(name, lang, wer_value, p95, errors=0):
+    return {"backend": name, "lang": lang, "wer": wer_value, "latency_p95_ms": p95, "errors": errors}
+
+
+def test_recommend_picks_fastest_passing_model():
+    results = [
+        row("medium", "id", 0.05, 900),
+        row("small", "id", 0.12, 400),
+        row("tiny", "id", 0.40, 100),
+        row("base", "id", 0.10, 50, errors=2),
+        row("tiny", "en", 0.50, 100),
+    ]
+    picks = recommend(results, max_wer=0.2)
+    assert picks["id"]["backend"] == "small"
+    assert picks["en"] is None
@@ -0,0 +1,50 @@
+# tests/test_stt_stream.py
+import pytest
+
+try:
+    from modules_client.stt_stream import VADSegmenter
+except (ImportError, OSError):  # sounddevice / PortAudio tidak tersedia
+    pytest.skip("butuh sounddevice + PortAudio", allow_module_level=True)
+
+RATE = 1000  # 1 sample = 1 ms supaya posisi mudah dibaca
+
+
+def make_segmenter(**kwargs):
+    params = dict(samplerate=RATE, frame_ms=10, hangover_ms=50, min_speech_ms=30,
+                  max_segment_s=1.0, pad_ms=20)
+    params.update(kwargs)
+    return VADSegmenter(**params)
+
+
+def feed(segmenter, pattern, start=0):
+    """pattern: string '1'/'0' per frame. Return segmen yang tertutup."""
+    closed = []
+    for i, flag in enumerate(pattern):
+        segment = segmenter.feed(start + i * segmenter.frame, flag == "1")
+        if segment:
+            closed.append(segment)
+    return closed
+
+
+def test_segment_closes_after_hangover_with_padding():
+    segmenter = make_segmenter()
+    closed = feed(segmenter, "00" + "1" * 5 + "0" * 5)
+    assert closed == [(20 - 20, 70 + 20)]
+
+
+def test_short_noise_is_dropped():
+    segmenter = make_segmenter()
+    assert feed(segmenter, "0110000000") == []
+
+
+def test_long_speech_is_split_at_max_segment():
+    segmenter = make_segmenter(max_segment_s=0.1)
+    closed = feed(segmenter, "1" * 25)
+    assert closed == [(0, 100), (80, 200)]
+
+
+def test_flush_closes_open_segment():
+    segmenter = make_segmenter()
+    feed(segmenter, "0000" + "1" * 4)
+    assert segmenter.flush(200) == (20, 100)
+    assert segmenter.flush(200) is None
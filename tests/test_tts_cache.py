@@ -0,0 +1,66 @@
+# tests/test_tts_cache.py
+import os
+
+import numpy as np
+import pytest
+
+from modules_server.tts_cache import TTSAudioCache, tts_cache_key
+
+MB = 1024 * 1024
+
+
+def pcm(n, value=0.1):
+    return np.full(n, value, dtype=np.float32)
+
+
+def test_key_normalizes_text_and_separates_identity():
+    assert tts_cache_key("Halo  Semua", "v", "id-ID") == tts_cache_key("halo semua", "v", "id-ID")
+    assert tts_cache_key("halo", "v", "id-ID") != tts_cache_key("halo", "w", "id-ID")
+    assert tts_cache_key("halo", "v", "id-ID", "google") != tts_cache_key("halo", "v", "id-ID", "gtts")
+
+
+def test_memory_hit_and_readonly(tmp_path):
+    cache = TTSAudioCache(tmp_path)
+    cache.put("a", pcm(100), 24000)
+    data, samplerate = cache.get("a")
+    assert samplerate == 24000 and len(data) == 100
+    with pytest.raises(ValueError):
+        data[0] = 1.0
+    assert cache.get("missing") is None
+    assert cache.stats()["memory_hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_memory_lru_limit(tmp_path):
+    # 4 KB per entry, batas memori 10 KB → paling banyak 2 entry
+    cache = TTSAudioCache(tmp_path, memory_mb=10 * 1024 / MB)
+    for key in ("a", "b", "c"):
+        cache.put(key, pcm(1024), 16000)
+    assert list(cache._memory) == ["b", "c"]
+    # "a" masih ada di disk
+    assert cache.contains("a")
+    assert cache.get("a")[1] == 16000
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_disk_survives_restart(tmp_path):
+    TTSAudioCache(tmp_path).put("a", pcm(50, 0.5), 22050)
+    data, samplerate = TTSAudioCache(tmp_path).get("a")
+    assert samplerate == 22050 and np.allclose(data, 0.5)
+
+
+def test_disk_limit_evicts_oldest(tmp_path):
+    cache = TTSAudioCache(tmp_path, disk_mb=10 * 1024 / MB)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, pcm(1024), 16000)
+        os.utime(cache._disk_index[key], (1000 + i, 1000 + i))
+    cache.put("d", pcm(1024), 16000)
+    assert sorted(cache._disk_index) == ["c", "d"]
+    assert cache._disk_bytes <= cache.disk_limit
+
+
+def test_corrupt_file_is_dropped(tmp_path):
+    cache = TTSAudioCache(tmp_path)
+    (tmp_path / "bad.24000.npy").write_bytes(b"not numpy")
+    cache = TTSAudioCache(tmp_path)
+    assert cache.get("bad") is None
+    assert not (tmp_path / "bad.24000.npy").exists()
@@ -0,0 +1,33 @@
+# tests/test_tts_metrics.py
+import pytest
+
+from modules_server.tts_metrics import Histogram
+
+
+def test_empty_histogram_has_no_quantile():
+    assert Histogram((10, 20)).quantile(0.5) is None
+
+
+def test_quantile_interpolates_inside_bucket():
+    hist = Histogram((100, 200, 400))
+    for value in (150, 150, 150, 150):
+        hist.observe(value)
+    # Semua di bucket (100, 200]: p50 di tengah bucket
+    assert hist.quantile(0.5) == pytest.approx(150.0)
+    assert hist.quantile(1.0) == pytest.approx(200.0)
+
+
+def test_quantile_spans_buckets():
+    hist = Histogram((100, 200))
+    for value in (50, 50, 150, 150):
+        hist.observe(value)
+    assert hist.quantile(0.25) == pytest.approx(50.0)
+    assert hist.quantile(0.75) == pytest.approx(150.0)
+
+
+def test_overflow_bucket_uses_max():
+    hist = Histogram((100,))
+    hist.observe(50)
+    hist.observe(900)
+    assert hist.quantile(1.0) == pytest.approx(900.0)
+    assert hist.snapshot()["buckets"] == {"100": 1, "+Inf": 2}
@@ -0,0 +1,107 @@
+# tests/test_tts_queue.py
+import threading
+import time
+
+import pytest
+
+from modules_server.tts_queue import TTSQueue
+
+
+class Runner:
+    """Runner palsu: job pertama ditahan sampai release(), sisanya langsung selesai."""
+
+    def __init__(self):
+        self.played = []
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        self.stopped = []
+
+    def __call__(self, text, language_code, voice_name, output_device, should_stop):
+        self.played.append(text)
+        if text == "fail":
+            raise RuntimeError("synth error")
+        if len(self.played) == 1:
+            self.started.set()
+            while not self.gate.wait(0.01):
+                if should_stop():
+                    self.stopped.append(text)
+                    return
+
+
+@pytest.fixture
+def queue():
+    runner = Runner()
+    q = TTSQueue(runner)
+    q.runner = runner
+    yield q
+    runner.gate.set()
+
+
+def finished_calls():
+    calls = []
+    return calls, (lambda name: (lambda: calls.append(name)))
+
+
+def wait_idle(q, timeout=2.0):
+    deadline = time.time() + timeout
+    while not q.is_idle():
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+
+def test_priority_then_fifo(queue):
+    queue.submit("blocker")
+    queue.runner.started.wait(1)
+    for text, priority in [("r1", "reply"), ("p1", "preview"), ("d1", "donation"), ("r2", "reply")]:
+        queue.submit(text, priority=priority)
+    queue.runner.gate.set()
+    wait_idle(queue)
+    assert queue.runner.played == ["blocker", "d1", "r1", "r2", "p1"]
+
+
+def test_new_preview_replaces_queued_preview(queue):
+    calls, cb = finished_calls()
+    queue.submit("blocker")
+    queue.runner.started.wait(1)
+    old = queue.submit("p-old", priority="preview", on_finished=cb("old"))
+    queue.submit("p-new", priority="preview")
+    assert old.wait(1) and old.status == "cancelled" and calls == ["old"]
+    queue.runner.gate.set()
+    wait_idle(queue)
+    assert "p-old" not in queue.runner.played
+
+
+def test_cancel_queued_and_skip_playing(queue):
+    calls, cb = finished_calls()
+    playing = queue.submit("blocker", on_finished=cb("blocker"))
+    queue.runner.started.wait(1)
+    queued = queue.submit("queued", on_finished=cb("queued"))
+    assert queue.cancel(queued.id)
+    assert queue.cancel(playing.id)
+    assert playing.wait(1) and playing.status == "cancelled"
+    wait_idle(queue)
+    assert queue.runner.stopped == ["blocker"]
+    assert "queued" not in queue.runner.played
+    # on_finished tepat sekali per job
+    assert sorted(calls) == ["blocker", "queued"]
+    assert queue.stats()["cancelled"] == 2
+
+
+def test_failed_job_still_finishes(queue):
+    queue.runner.played.append("warm")  # runner tidak menahan job pertama
+    calls, cb = finished_calls()
+    job = queue.submit("fail", on_finished=cb("fail"))
+    assert job.wait(1) and job.status == "failed"
+    assert calls == ["fail"] and queue.stats()["failed"] == 1
+
+
+def test_barge_in_pauses_until_resume(queue):
+    queue.submit("blocker")
+    queue.runner.started.wait(1)
+    queue.barge_in()
+    nxt = queue.submit("after")
+    time.sleep(0.1)
+    assert nxt.status == "queued" and queue.stats()["paused"]
+    queue.resume()
+    assert nxt.wait(1) and nxt.status == "done"
+    assert queue.runner.stopped == ["blocker"]
@@ -37,6 +37,10 @@ except ImportError:
 
 # Import modules lainnya
 from modules_client.cache_manager import CacheManager
+from modules_client.intent_classifier import get_intent_classifier
+from modules_client.prompt_templates import basic_reply_messages, messages_tokens
+from modules_client.context_budget import PromptBudget, count_tokens
+from modules_client.reply_fast_path import ReplyFastPath
 from modules_client.spam_detector import SpamDetector
 from modules_client.viewer_memory import ViewerMemory
 from modules_client.subscription_checker import (
@@ -52,7 +56,12 @@ except ImportError:
     from modules_server.deepseek_ai import generate_reply
 
 # Import TTS dari server
-from modules_server.tts_engine import speak
+from modules_server.tts_engine import (
+    speak, tts_cache_stats, tts_queue_stats, prewarm_tts, tts_prewarm_stats, tts_local_stats,
+    tts_metrics_summary, export_tts_metrics
+)
+from modules_server.tts_queue import get_tts_queue
+from modules_server.tts_local import local_tts_available
 
 # PERBAIKAN 2: Paths yang benar
 YT_SCRIPT = ROOT / "listeners" / "chat_listener.py"
@@ -63,6 +72,31 @@ VOICES_PATH = ROOT / "config" / "voices.json"
 # Pastikan direktori temp ada
 Path(ROOT / "temp").mkdir(exist_ok=True)
 
+def fast_path_context(cfg, lang_out="Indonesia"):
+    """Info stream untuk template fast path (game, rank & bahasa output saat ini)."""
+    return {
+        "game": cfg.get("stream_game", "game"),
+        "rank": cfg.get("stream_rank", "Epic"),
+        "lang": "en" if lang_out == "English" else "id",
+    }
+
+
+# Balasan cadangan ReplyThread saat API gagal (ikut di-prewarm ke cache TTS)
+FALLBACK_REPLY_CONNECTION = "Hai {name} sorry koneksi lagi bermasalah"
+FALLBACK_REPLY_ERROR = "{name} hai sorry ada error teknis nih"
+
+
+# Intent classifier → kategori instruksi prompt di ReplyThread
+PROMPT_QUESTION_TYPES = {
+    "greeting": "greeting",
+    "eating": "eating",
+    "gaming_build": "gaming_build",
+    "game_question": "gaming_play",
+    "gaming_play": "gaming_play",
+    "rank": "gaming_play",
+    "khodam": "khodam",
+}
+
 
 # PERBAIKAN 3: FileMonitorThread yang berfungsi penuh
 class FileMonitorThread(QThread):
@@ -180,46 +214,34 @@ class TikTokListenerThread(QThread):
 # STTThread - untuk hold-to-talk recording
 class STTThread(QThread):
     result = pyqtSignal(str)
+    partial = pyqtSignal(str)
 
-    def __init__(self, mic_index, src_lang, use_google=False):
+    def __init__(self, mic_index, src_lang, use_google=False, streaming=True):
         super().__init__()
         self.mic_index = mic_index
         self.src_lang = src_lang
         self.use_google = use_google
+        self.streaming = streaming
         self.running = True
 
     def run(self):
-        """Rekam audio sampai running=False"""
-        wav_path = Path("temp/cohost_record.wav")
-        wav_path.parent.mkdir(exist_ok=True, parents=True)
-        record_buffer = []
-        
+        """Rekam audio sampai running=False; segmen ucapan ditranskrip selama hotkey ditahan"""
         try:
-            # Record audio
-            with sd.InputStream(
-                samplerate=16000, channels=1, device=self.mic_index,
-                callback=lambda indata, *_: record_buffer.extend(indata.copy())
-            ):
-                while self.running:
-                    time.sleep(0.05)
-            
-            # Save audio file
-            if record_buffer:
-                sf.write(str(wav_path), record_buffer, 16000)
-                time.sleep(0.1)
-        except Exception as e:
-            print(f"Error in recording: {e}")
+            from modules_client.translate_stt import transcribe_streaming
+        except ImportError:
+            print("STT module not available")
             self.result.emit("")
             return
 
-        # Use Whisper untuk Basic mode
+        # Use Whisper untuk Basic mode, PCM langsung di memori
         try:
-            from modules_client.translate_stt import transcribe
-            txt = transcribe(str(wav_path), self.src_lang, self.use_google) or ""
-            self.result.emit(txt.strip())
-        except ImportError:
-            print("STT module not available")
+            txt = transcribe_streaming(lambda: self.running, self.mic_index, self.src_lang, self.use_google,
+                                       on_partial=self.partial.emit, streaming=self.streaming) or ""
+        except Exception as e:
+            print(f"Error in recording: {e}")
             self.result.emit("")
+            return
+        self.result.emit(txt.strip())
 
 
 # ReplyThread - untuk generate dan TTS balasan AI
@@ -227,7 +249,8 @@ class ReplyThread(QThread):
     finished = pyqtSignal(str, str, str)
 
     def __init__(self, author: str, message: str, personality: str, 
-                 voice_model: str, language_code: str, lang_out: str, viewer_memory=None):
+                 voice_model: str, language_code: str, lang_out: str, viewer_memory=None,
+                 fast_path=None):
         super().__init__()
         self.author = author
         self.message = message
@@ -236,6 +259,7 @@ class ReplyThread(QThread):
         self.language_code = language_code
         self.lang_out = lang_out
         self.viewer_memory = viewer_memory
+        self.fast_path = fast_path
 
     def run(self):
         print(f"[DEBUG] ========== ReplyThread START ==========")
@@ -250,7 +274,8 @@ class ReplyThread(QThread):
             # Load configuration
             print(f"[DEBUG] Loading configuration...")
             cfg = ConfigManager("config/settings.json")
-            extra = cfg.get("custom_context", "").strip()
+            budget = PromptBudget.from_config(cfg)
+            extra, viewer_budget = budget.allocate(cfg.get("custom_context", "").strip(), self.message)
             lang_label = "Bahasa Indonesia" if self.lang_out == "Indonesia" else "English"
             
             print(f"[DEBUG] Custom context loaded: '{extra}'")
@@ -267,7 +292,7 @@ class ReplyThread(QThread):
                 viewer_info = self.viewer_memory.get_viewer_info(self.author)
                 if viewer_info:
                     viewer_status = viewer_info.get("status", "new")
-                    viewer_context = self.viewer_memory.get_recent_context(self.author, limit=3)
+                    viewer_context = self.viewer_memory.get_prompt_context(self.author, viewer_budget)
                     print(f"[DEBUG] Viewer status: {viewer_status}")
                     print(f"[DEBUG] Viewer context: {viewer_context}")
                 else:
@@ -281,19 +306,9 @@ class ReplyThread(QThread):
             print(f"[DEBUG] Message lowercase: '{message_lower}'")
             
             # Detect question category
-            question_type = "general"
-            if any(word in message_lower for word in ["kabar", "apa kabar", "gimana"]):
-                question_type = "greeting"
-            elif any(word in message_lower for word in ["makan", "udah makan", "belum makan"]):
-                question_type = "eating"
-            elif any(word in message_lower for word in ["build", "item", "gear", "equipment"]):
-                question_type = "gaming_build"
-            elif any(word in message_lower for word in ["main", "game", "mabar", "rank", "push"]):
-                question_type = "gaming_play"
-            elif any(word in message_lower for word in ["halo", "hai", "hello", "assalamualaikum"]):
-                question_type = "greeting"
-            elif any(word in message_lower for word in ["khodam", "cek", "apa khodam", "khodamku"]):
-                question_type = "khodam"
+            intent, confidence = get_intent_classifier(cfg).classify(self.message)
+            question_type = PROMPT_QUESTION_TYPES.get(intent, "general")
+            print(f"[DEBUG] Intent: {intent} (confidence {confidence:.2f})")
             
             print(f"[DEBUG] Question category detected: {question_type}")
 
@@ -312,75 +327,28 @@ class ReplyThread(QThread):
             
             print(f"[DEBUG] Base response: '{base_response}'")
 
-            # Build AI prompt
+            # Build AI prompt: prefix stabil (system) + komentar penonton (user)
             print(f"[DEBUG] Building AI prompt...")
-            prompt = (
-                f"Kamu adalah streamer yang sedang live streaming. "
-                f"Nama kamu dan informasi penting: {extra}. "
-                f"Penonton {self.author} bertanya: '{self.message}'. "
+            system_prompt, prompt = basic_reply_messages(
+                self.author, self.message, question_type, extra, lang_label, viewer_context
             )
-            
-            print(f"[DEBUG] Prompt base built")
-
-            # Add specific instructions based on question type
-            if question_type == "greeting":
-                prompt += (
-                    f"Sapa {self.author} dengan ramah. "
-                    f"Ceritakan sedikit tentang aktivitas streaming kamu saat ini. "
-                )
-            elif question_type == "eating":
-                prompt += (
-                    f"Jawab pertanyaan tentang makan dengan santai. "
-                    f"Bisa ceritakan makanan atau waktu makan. "
-                )
-            elif question_type == "gaming_build":
-                prompt += (
-                    f"Berikan saran build/item yang bagus. "
-                    f"Jelaskan dengan singkat dan berguna untuk gameplay. "
-                )
-            elif question_type == "gaming_play":
-                prompt += (
-                    f"Ceritakan tentang game yang sedang dimainkan. "
-                    f"Bisa tentang hero, strategy, atau kondisi match saat ini. "
-                )
-            elif question_type == "khodam":
-                prompt += (
-                    f"Jawab tentang khodam sesuai dengan informasi yang kamu miliki. "
-                    f"Berikan respons yang sesuai dengan karakter kamu. "
-                )
-            else:
-                prompt += (
-                    f"Jawab pertanyaan dengan informatif dan relevan. "
-                    f"Gunakan informasi tentang diri kamu untuk memberikan konteks. "
-                )
-
-            # Add response format instructions
-            prompt += (
-                f"Awali dengan menyebut nama {self.author}. "
-                f"Jawab dalam {lang_label} dengan maksimal 2 kalimat pendek. "
-                f"Gaya bicara santai seperti streamer Indonesia pada umumnya. "
-                f"Jangan gunakan emoji atau tanda baca berlebihan. "
-                f"Pastikan jawaban relevan dengan pertanyaan. "
-            )
-
-            # Add examples for guidance
-            if question_type == "greeting":
-                prompt += f"Contoh: '{self.author} hai juga! Lagi asik main Mobile Legends nih pake Gatot'"
-            elif question_type == "eating":
-                prompt += f"Contoh: '{self.author} udah makan tadi, sekarang lagi fokus push rank'"
-            elif question_type == "khodam":
-                prompt += f"Gunakan informasi khodam yang sudah kamu ketahui untuk menjawab"
+            prompt_tokens = messages_tokens([
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ])
 
             print(f"[DEBUG] Final prompt built:")
             print(f"[DEBUG] Prompt: '{prompt}'")
-            print(f"[DEBUG] Prompt length: {len(prompt)} characters")
+            print(f"[DEBUG] Prompt length: {len(system_prompt) + len(prompt)} characters "
+                  f"(~{prompt_tokens} tokens, prefix {count_tokens(system_prompt)})")
 
             # Generate AI reply
             print(f"[DEBUG] ========== CALLING AI API ==========")
             print(f"[DEBUG] Sending request to generate_reply()...")
             
             try:
-                reply = generate_reply(prompt)
+                reply = generate_reply(prompt, intent=intent, system=system_prompt)
+                api_ok = bool(reply) and not reply.startswith("Maaf, sistem AI")
                 print(f"[DEBUG] AI API call successful!")
                 print(f"[DEBUG] Raw AI response: '{reply}'")
                 print(f"[DEBUG] Response type: {type(reply)}")
@@ -398,7 +366,7 @@ class ReplyThread(QThread):
             
             if not reply:
                 print(f"[DEBUG] Reply is empty, using fallback")
-                reply = f"Hai {self.author} sorry koneksi lagi bermasalah"
+                reply = FALLBACK_REPLY_CONNECTION.format(name=self.author)
             else:
                 print(f"[DEBUG] Processing non-empty reply...")
                 
@@ -426,6 +394,11 @@ class ReplyThread(QThread):
                     reply = f"{self.author} {reply}"
                     print(f"[DEBUG] Added author name: '{reply}'")
 
+                # Balasan LLM sukses jadi variasi baru untuk fast path
+                if self.fast_path and api_ok:
+                    self.fast_path.record_llm_reply(self.author, self.message, reply,
+                                                    fast_path_context(cfg, self.lang_out))
+
             print(f"[DEBUG] ========== FINAL RESULT ==========")
             print(f"[DEBUG] Final reply: '{reply}'")
             print(f"[DEBUG] Final reply length: {len(reply)}")
@@ -442,7 +415,7 @@ class ReplyThread(QThread):
             print(f"[ERROR] Outer exception in ReplyThread: {outer_error}")
             import traceback
             traceback.print_exc()
-            reply = f"{self.author} hai sorry ada error teknis nih"
+            reply = FALLBACK_REPLY_ERROR.format(name=self.author)
 
         # Emit result
         print(f"[DEBUG] ========== EMITTING RESULT ==========")
@@ -489,7 +462,11 @@ class CohostTabBasic(QWidget):
 
         # Initialize components SETELAH direktori dibuat
         self.viewer_memory = ViewerMemory()
-        self.cache_manager = CacheManager()
+        self.cache_manager = CacheManager(
+            max_entries=self.cfg.get("reply_cache_size", 100),
+            cache_ttl=self.cfg.get("reply_cache_ttl", 1800)
+        )
+        self.fast_path = ReplyFastPath.from_config(self.cfg, self.cache_manager)
         self.spam_detector = SpamDetector()
         
         # Process management
@@ -866,6 +843,10 @@ class CohostTabBasic(QWidget):
             btn_memory_stats.clicked.connect(self.show_memory_stats)
             control_row.addWidget(btn_memory_stats)
 
+            btn_skip_tts = QPushButton("⏭️ Skip Suara")
+            btn_skip_tts.clicked.connect(self.skip_tts)
+            control_row.addWidget(btn_skip_tts)
+
             voice_layout.addLayout(control_row)
             content_layout.addWidget(voice_group)
 
@@ -1116,6 +1097,23 @@ class CohostTabBasic(QWidget):
         voice = self.voice_cb.currentData()
         self.cfg.set("cohost_voice_model", voice)
         self.log_user("Suara CoHost berhasil disimpan", "🔊")
+        self._prewarm_tts()
+
+    def _prewarm_tts(self):
+        """Pre-synthesis template fast path & fallback untuk suara yang dipakai"""
+        if not self.cfg.get("tts_prewarm", True):
+            return
+        try:
+            code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
+            voice_model = self.cfg.get("cohost_voice_model", None)
+            context = fast_path_context(self.cfg, self.out_lang.currentText())
+            templates = self.cache_manager.tts_templates(context)
+            templates += [FALLBACK_REPLY_CONNECTION, FALLBACK_REPLY_ERROR]
+            queued = prewarm_tts(templates, [(voice_model, code)],
+                                 phrases=self.cache_manager.suffixes(context["lang"]))
+            self.log_debug(f"TTS prewarm: {queued} segmen diantrikan")
+        except Exception as e:
+            self.log_error(f"TTS prewarm gagal: {e}", show_user=False)
 
     def update_cooldown(self, value):
         """Update cooldown duration"""
@@ -1153,10 +1151,15 @@ class CohostTabBasic(QWidget):
         code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
         self.log_user("Memutar preview suara...", "🔈")
         try:
-            speak("Ini preview suara CoHost!", language_code=code, voice_name=voice)
+            speak("Ini preview suara CoHost!", language_code=code, voice_name=voice, priority="preview")
         except Exception as e:
             self.log_error(f"Preview suara gagal: {e}")
 
+    def skip_tts(self):
+        """Hentikan suara yang sedang diputar (antrian lanjut ke item berikutnya)"""
+        if get_tts_queue().skip():
+            self.log_user("Suara dilewati", "⏭️")
+
     def save_hotkey(self):
         """Simpan hotkey hold-to-talk"""
         mods = [m for cb, m in [
@@ -1189,10 +1192,12 @@ class CohostTabBasic(QWidget):
             lang = self.out_lang.currentText() if hasattr(self, 'out_lang') else "Indonesia"
             
             # Basic mode menggunakan gTTS standard voices
-            if lang == "Indonesia":
-                voices = voices_data.get("gtts_standard", {}).get("id-ID", [])
-            else:  # English
-                voices = voices_data.get("gtts_standard", {}).get("en-US", [])
+            lang_code = "id-ID" if lang == "Indonesia" else "en-US"
+            voices = list(voices_data.get("gtts_standard", {}).get(lang_code, []))
+
+            # Suara offline (Coqui, CPU) kalau paket TTS terinstall
+            if local_tts_available():
+                voices = voices_data.get("coqui", {}).get(lang_code, []) + voices
             
             if not voices:
                 # Fallback voices jika file tidak ada
@@ -1645,15 +1650,44 @@ class CohostTabBasic(QWidget):
     def show_statistics(self):
         """Show cache dan spam statistics"""
         cache_stats = self.cache_manager.get_stats()
+        fast_stats = self.fast_path.get_stats()
+        tts_stats = tts_cache_stats()
+        queue_stats = tts_queue_stats()
+        prewarm_stats = tts_prewarm_stats()
+        local_stats = tts_local_stats()
+        latency_lines = "\n".join(tts_metrics_summary()) or "Belum ada data"
         spam_stats = self.spam_detector.get_overall_stats()
 
         stats_msg = textwrap.dedent(f"""
             [CACHE STATISTICS]
             Total Entries: {cache_stats['total_entries']}
+            Capacity: {cache_stats['capacity']}
             Total Hits: {cache_stats['total_hits']}
+            Misses: {cache_stats['misses']}
             Hit Rate: {cache_stats['hit_rate']:.1f}%
             Cache Size: {cache_stats['cache_size_kb']:.1f} KB
 
+            [FAST PATH]
+            Template/Cache Replies: {fast_stats['fast_replies']}
+            LLM Replies: {fast_stats['llm_replies']}
+            Fast Path Ratio: {fast_stats['fast_ratio']:.1f}%
+
+            [TTS AUDIO CACHE]
+            Memory Hits: {tts_stats['memory_hits']}
+            Disk Hits: {tts_stats['disk_hits']}
+            Misses: {tts_stats['misses']}
+            Hit Rate: {tts_stats['hit_rate']:.1f}%
+            Disk Size: {tts_stats['disk_mb']:.1f} MB
+            Prewarmed: {prewarm_stats['synthesized'] + prewarm_stats['already_cached']} (pending {prewarm_stats['pending']})
+
+            [TTS QUEUE]
+            Depth: {queue_stats['depth']} (max {queue_stats['max_depth']})
+            Donation/Reply/Preview: {queue_stats['depth_by_priority']['donation']}/{queue_stats['depth_by_priority']['reply']}/{queue_stats['depth_by_priority']['preview']}
+            Completed: {queue_stats['completed']}
+            Cancelled: {queue_stats['cancelled']}
+            Avg Wait: {queue_stats['avg_wait_ms']:.0f} ms
+            Local TTS: {local_stats['workers']} worker warm, p95 {(local_stats['p95_latency'] or 0) * 1000:.0f} ms
+
             [SPAM DETECTION]
             Total Users: {spam_stats['total_users']}
             Blocked Users: {spam_stats['blocked_users']}
@@ -1661,6 +1695,13 @@ class CohostTabBasic(QWidget):
             Active Blocks: {', '.join(spam_stats['active_blocks'])}
         """).strip()
 
+        # Latency per engine/voice, sekalian diekspor untuk dibandingkan antar sesi
+        stats_msg += f"\n\n[TTS LATENCY]\n{latency_lines}"
+        try:
+            stats_msg += f"\nExported: {export_tts_metrics()}"
+        except Exception as e:
+            self.log_error(f"Export metrik TTS gagal: {e}", show_user=False)
+
         self.log_view.append(stats_msg)
 
     def reset_filter_stats(self):
@@ -1706,19 +1747,25 @@ class CohostTabBasic(QWidget):
             if pressed and not prev:
                 prev = True
                 self.conversation_active = True
+                # Barge-in: hentikan suara CoHost selama streamer bicara
+                if self.cfg.get("tts_barge_in", True):
+                    get_tts_queue().barge_in()
                 self.log_view.append("🔴 Mulai merekam...")
 
                 self.stt_thread = STTThread(
                     self.cfg.get("selected_mic_index", 0),
                     self.cfg.get("cohost_input_lang", "ind_Latn"),
-                    False
+                    False,
+                    streaming=self.cfg.get("stt_streaming", True)
                 )
+                self.stt_thread.partial.connect(lambda text: self.log_user(f"Sementara: {text}", "📝"))
                 self.stt_thread.result.connect(self._handle_speech)
                 self.stt_thread.start()
 
             elif not pressed and prev:
                 prev = False
                 self.conversation_active = False
+                get_tts_queue().resume()
                 self.log_view.append("⏳ Memproses...")
                 
                 if self.stt_thread:
@@ -1749,9 +1796,7 @@ class CohostTabBasic(QWidget):
             
             code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
             voice_model = self.voice_cb.currentData()
-            speak(reply, language_code=code, voice_name=voice_model)
-            
-            self.ttsFinished.emit()
+            speak(reply, language_code=code, voice_name=voice_model, on_finished=self.ttsFinished.emit)
             
             self.log_user(f"Balasan: {reply}", "🤖")
         except Exception as e:
@@ -1818,6 +1863,9 @@ class CohostTabBasic(QWidget):
                 nick = "@" + nick
                 self.cfg.set("tiktok_nickname", nick)
 
+        # Template balasan disintesis di background selagi chat belum ramai
+        self._prewarm_tts()
+
         # 5. LOG CONFIGURATION
         self.log_user("=== StreamMate Basic Dimulai ===", "🚀")
         self.log_user(f"Platform: {plat}", "📺")
@@ -1987,6 +2035,18 @@ class CohostTabBasic(QWidget):
         self.reply_queue.clear()
         self.recent_messages.clear()
 
+        # Simpan snapshot reply cache (write-behind) sebelum idle
+        self.cache_manager.flush()
+
+        # Latih ulang model intent dari reply log di background
+        if self.cfg.get("intent_use_model", True):
+            classifier = get_intent_classifier(self.cfg)
+            threading.Thread(
+                target=classifier.train_from_logs,
+                args=([str(COHOST_LOG)],),
+                daemon=True
+            ).start()
+
         if CHAT_BUFFER.exists():
             try:
                 CHAT_BUFFER.unlink()
@@ -2094,6 +2154,15 @@ class CohostTabBasic(QWidget):
     def _create_reply_thread(self, author, message):
         """Create reply thread dengan konfigurasi yang tepat"""
         self.log_debug(f"Creating reply thread for: {author}")
+
+        # Fast path: intent yakin + template/cache → langsung TTS tanpa LLM
+        reply = self.fast_path.try_reply(author, message,
+                                         fast_path_context(self.cfg, self.out_lang.currentText()))
+        if reply:
+            self.log_debug(f"Fast path reply: {reply}")
+            self._on_reply(author, message, reply)
+            return
+        self.fast_path.note_llm_turn()
         
         lang_code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
         voice = self.voice_cb.currentData()
@@ -2107,7 +2176,8 @@ class CohostTabBasic(QWidget):
             voice_model=voice,
             language_code=lang_code,
             lang_out=self.out_lang.currentText(),
-            viewer_memory=self.viewer_memory
+            viewer_memory=self.viewer_memory,
+            fast_path=self.fast_path
         )
 
         rt.finished.connect(lambda a, m, r: self._on_reply(a, m, r))
@@ -2151,17 +2221,16 @@ class CohostTabBasic(QWidget):
         code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
         voice_model = self.cfg.get("cohost_voice_model", None)
 
-        safety_timeout = self._calculate_tts_duration(text) + 2.0
-
-        self.tts_safety_timer = QTimer(self)
-        self.tts_safety_timer.setSingleShot(True)
-        self.tts_safety_timer.timeout.connect(lambda: on_complete())
-        self.tts_safety_timer.start(int(safety_timeout * 1000))
+        # Tanpa safety timer: job bisa menunggu lama di antrian prioritas, dan
+        # antrian TTS sudah menjamin on_finished dipanggil (selesai/batal/gagal).
+        # Flag run-once menjaga on_complete tetap hanya sekali.
+        completed = threading.Event()
 
         def wrapped_callback():
+            if completed.is_set():
+                return
+            completed.set()
             try:
-                if hasattr(self, 'tts_safety_timer') and self.tts_safety_timer.isActive():
-                    self.tts_safety_timer.stop()
                 print(f"[DEBUG] TTS completed callback triggered")
                 on_complete()
             except Exception as e:
@@ -2172,6 +2241,7 @@ class CohostTabBasic(QWidget):
             speak(text, code, voice_model, on_finished=wrapped_callback)
         except Exception as e:
             print(f"[ERROR] TTS error: {e}")
+            wrapped_callback()
 
     def _handle_tts_complete(self):
         """Handle TTS complete with proper batch flow"""
@@ -2180,12 +2250,6 @@ class CohostTabBasic(QWidget):
         self.batch_timer.stop()
         self.batch_timer.start(self.reply_delay)
 
-    def _calculate_tts_duration(self, text):
-        """Estimasi durasi TTS"""
-        char_count = len(text)
-        chars_per_second = 12
-        return max(2.0, (char_count / chars_per_second) + 1.0)
-
     def _end_batch(self):
         """End batch processing - tanpa cooldown global, langsung cek queue."""
         self.processing_batch = False
@@ -2215,9 +2279,6 @@ class CohostTabBasic(QWidget):
         self.ttsFinished.emit()
         self.reply_busy = False
 
-        if hasattr(self, 'tts_safety_timer') and self.tts_safety_timer.isActive():
-            self.tts_safety_timer.stop()
-
         QTimer.singleShot(1000, self._process_next_in_batch)
 
     def _cleanup_spam_tracking(self):
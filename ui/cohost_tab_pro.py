@@ -27,6 +27,8 @@ from PyQt6.QtWidgets import (
 from datetime import datetime
 from modules_server.tts_google import speak_with_google_cloud
 from modules_client.subscription_checker import get_today_usage, add_usage, time_until_next_day
+from modules_client.prompt_templates import pro_reply_messages
+from modules_client.context_budget import PromptBudget
 from PyQt6.QtWidgets import QMessageBox
 
 # ─── fallback modules_client & modules_server ───────────────────────
@@ -34,17 +36,20 @@ from PyQt6.QtWidgets import QMessageBox
 try:
     from modules_client.config_manager import ConfigManager
     from modules_client.api import generate_reply
-    from modules_client.translate_stt import transcribe
+    from modules_client.translate_stt import transcribe, transcribe_streaming
     from modules_server.tts_engine import speak
     from modules_server.tts_google import speak_with_google_cloud
+    from modules_server.tts_queue import get_tts_queue
     USE_GOOGLE_TTS = True
 except ImportError:
     from modules_server.config_manager import ConfigManager
     from modules_server.deepseek_ai import generate_reply
     from modules_server.tts_engine import speak
+    from modules_server.tts_queue import get_tts_queue
     # STT hanya ada di client; jika tidak ada, stub error:
     def transcribe(*args, **kwargs):
         raise NotImplementedError("Fitur STT hanya tersedia di environment client")
+    transcribe_streaming = transcribe
     USE_GOOGLE_TTS = False
 
 print(f"[DEBUG] TTS Engine loaded: {'Google TTS' if USE_GOOGLE_TTS else 'Default TTS'}")
@@ -117,17 +122,14 @@ class ReplyThread(QThread):
         self.voice_model   = voice_model
 
     def run(self):
-        prompt = (
-            f"Kamu adalah AI Co-Host {self.cohost_name} dengan kepribadian {self.personality}, "
-            f"siaran bersama streamer {self.streamer_name}. "
-            f"Komentar penonton ({self.author}): \"{self.message}\". "
-            f"Balas {self.author} dalam bahasa {self.lang_out.lower()} "
-            "tanpa tanda baca, tanpa emoji, tanpa huruf tebal, sebut nama penanya."
+        # Persona & konteks di system prefix (stabil → kena prefix cache provider)
+        system_prompt, prompt = pro_reply_messages(
+            self.author, self.message, self.cohost_name, self.personality,
+            self.streamer_name, self.lang_out,
+            PromptBudget.from_config(ConfigManager("config/settings.json")).fit_custom_context(self.extra)
         )
-        if self.extra:
-            prompt += f" {self.extra}"
 
-        reply = generate_reply(prompt) or ""
+        reply = generate_reply(prompt, system=system_prompt) or ""
         # hapus semua punctuation kecuali tanda tanya
         reply = re.sub(r"[^\w\s\?]", "", reply)
 
@@ -142,30 +144,27 @@ class ReplyThread(QThread):
 
 class STTThread(QThread):
     result = pyqtSignal(str)
+    partial = pyqtSignal(str)
 
-    def __init__(self, mic_index: int, src_lang: str, use_google: bool):
+    def __init__(self, mic_index: int, src_lang: str, use_google: bool, streaming: bool = True):
         super().__init__()
         self.mic_index = mic_index
         self.src_lang = src_lang
         self.use_google = use_google
+        self.streaming = streaming
 
     def run(self):
-        wav_path = Path("temp/cohost_record.wav")
-        record_buffer = []
+        trigger = Path("temp/trigger.txt")
         try:
-            with sd.InputStream(
-                samplerate=16000, channels=1, device=self.mic_index,
-                callback=lambda indata, *_: record_buffer.extend(indata.copy())
-            ):
-                while Path("temp/trigger.txt").read_text() == "ON":
-                    time.sleep(0.05)
-            sf.write(str(wav_path), record_buffer, 16000)
+            # Rekam selama trigger ON; Google streaming mengirim hasil interim ke partial
+            txt = transcribe_streaming(lambda: trigger.read_text() == "ON", self.mic_index, self.src_lang,
+                                       self.use_google, on_partial=self.partial.emit,
+                                       streaming=self.streaming) or ""
         except Exception as e:
             print(f"Error in recording: {e}")
             self.result.emit("")
             return
 
-        txt = transcribe(str(wav_path), self.src_lang, self.use_google) or ""
         self.result.emit(txt.strip())
 
 
@@ -362,6 +361,11 @@ class CohostTab(QWidget):
         self.log_view.setReadOnly(True)
         layout.addWidget(self.log_view)
 
+        # Teks sementara STT selama hotkey ditahan
+        self.stt_partial = QLabel("")
+        self.stt_partial.setWordWrap(True)
+        layout.addWidget(self.stt_partial)
+
         # Hold-to-Talk Hotkey
         row = QHBoxLayout()
         row.addWidget(QLabel("Hold-to-Talk Hotkey:"))
@@ -442,7 +446,7 @@ class CohostTab(QWidget):
         voice = self.voice_cb.currentData()
         code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
         self.log_view.append(f"[Preview] {voice}")
-        speak("Ini preview suara CoHost!", language_code=code, voice_name=voice)
+        speak("Ini preview suara CoHost!", language_code=code, voice_name=voice, priority="preview")
 
     def save_cohost_voice(self):
         voice = self.voice_cb.currentData()
@@ -582,12 +586,17 @@ class CohostTab(QWidget):
                 prev = True
                 self.conversation_active = True   # mute auto-reply saat mic aktif
                 TRIGGER_FILE.write_text("ON")
+                # Barge-in: hentikan suara CoHost selama streamer bicara
+                if self.cfg.get("tts_barge_in", True):
+                    get_tts_queue().barge_in()
                 self.log_view.append("🔴 Mulai merekam...")
 
                 mic_index = self.cfg.get("selected_mic_index", 0)
                 src_lang = self.cfg.get("cohost_input_lang", "ind_Latn")
                 use_google = True  # karena ini Pro
-                self.stt_thread = STTThread(mic_index, src_lang, use_google)
+                self.stt_thread = STTThread(mic_index, src_lang, use_google,
+                                            streaming=self.cfg.get("stt_streaming", True))
+                self.stt_thread.partial.connect(lambda text: self.stt_partial.setText(f"📝 {text}…"))
                 self.stt_thread.result.connect(self._handle_speech)
                 self.stt_thread.start()
 
@@ -595,12 +604,14 @@ class CohostTab(QWidget):
                 prev = False
                 self.conversation_active = False  # unmute auto-reply
                 TRIGGER_FILE.write_text("OFF")
+                get_tts_queue().resume()
                 self.log_view.append("⏳ Memproses...")
 
     # — Handle hasil STT Hold-to-Talk —  
     def _handle_speech(self, txt: str):
         # release mute chat sehingga auto-reply jalan kembali
         self.conversation_active = False
+        self.stt_partial.setText("")
 
         txt = txt.strip()
         if not txt:
@@ -623,10 +634,9 @@ class CohostTab(QWidget):
 
         # TTS sesuai setting bahasa output
         code = "id-ID" if self.out_lang.currentText() == "Indonesia" else "en-US"
-        speak(reply, language_code=code, voice_name=self.cfg.get("cohost_voice_model"))
-
-        # Signal bahwa sudah selesai bicara
-        self.speakingStopped.emit()
+        # Signal bahwa sudah selesai bicara dikirim saat audio benar-benar selesai
+        speak(reply, language_code=code, voice_name=self.cfg.get("cohost_voice_model"),
+              on_finished=self.speakingStopped.emit)
 
         self.log_view.append(f"🤖 {reply}")
 
@@ -152,12 +152,12 @@ class TrakteerTab(QWidget):
             try:
                 voice_model   = self.cfg.get("cohost_voice_model") or self.cfg.get("voice_model")
                 language_code = self.cfg.get("voice_lang") or "id-ID"
-                speak(reply, language_code, voice_model)
+                # Donasi didahulukan dari balasan chat di antrian TTS;
+                # un‑mute setelah ucapan terima kasih selesai diputar
+                speak(reply, language_code, voice_model, on_finished=self.muteReleased.emit, priority="donation")
             except Exception as e:
                 print("❌ speak error:", e)
                 self.logUpdated.emit(f"❌ TTS error: {e}")
-
-            # un‑mute setelah 3 detik (di UI‑thread)
-            QTimer.singleShot(3000, self.muteReleased.emit)
+                self.muteReleased.emit()
 
         threading.Thread(target=_worker, daemon=True).start()
\ No newline at end of file
@@ -30,11 +30,13 @@ try:
 except ImportError:
     from modules_server.tts_engine import speak
 
+from modules_server.tts_queue import get_tts_queue
+
 # ─── STT Whisper ─────────────────────────────────────────────────
 try:
-    from modules_client.translate_stt import _whisper_transcribe
+    from modules_client.translate_stt import transcribe_streaming
 except ImportError:
-    def _whisper_transcribe(*args, **kwargs):
+    def transcribe_streaming(*args, **kwargs):
         raise NotImplementedError("STT hanya tersedia di lingkungan pengembangan lokal")
 
 # pastikan folder temp ada
@@ -44,12 +46,13 @@ temp_dir.mkdir(parents=True, exist_ok=True)
 class RecorderThread(QThread):
     """Hold-to-talk: record → STT → translate → emit(src, tgt, err)"""
     newTranscript = pyqtSignal(str, str, str)
+    partialTranscript = pyqtSignal(str)
 
-    def __init__(self, mic_idx: int, src_lang: str):
+    def __init__(self, mic_idx: int, src_lang: str, streaming: bool = True):
         super().__init__()
         self.mic_idx  = mic_idx
         self.src_lang = src_lang
-        self.buffer   = []
+        self.streaming = streaming
         self.running  = True
 
     def run(self):
@@ -77,39 +80,15 @@ class RecorderThread(QThread):
                 print(f"[DEBUG] Error reading demo status: {e}")
                 is_demo = False
         try:
-            with sd.InputStream(
-                samplerate=16000, channels=1, device=self.mic_idx,
-                callback=lambda indata, *_: self.buffer.extend(indata.copy())
-            ):
-                while self.running:
-                    time.sleep(0.05)
+            # STT Whisper: segmen ucapan ditranskrip selama hotkey ditahan,
+            # PCM dinormalisasi supaya volume cukup
+            src = transcribe_streaming(lambda: self.running, self.mic_idx, self.src_lang,
+                                       on_partial=self.partialTranscript.emit, normalize=True,
+                                       streaming=self.streaming) or ""
         except Exception as e:
             self.newTranscript.emit("", "", f"Mic error: {e}")
             return
 
-        # Check if we have audio data
-        if not self.buffer:
-            self.newTranscript.emit("", "", "Tidak ada audio terekam")
-            return
-
-        # Normalize and save wav
-        wav_path = temp_dir / "record.wav"
-        try:
-            import numpy as np
-            audio_data = np.array(self.buffer)
-
-            # Normalize untuk memastikan volume cukup
-            if np.max(np.abs(audio_data)) > 0:
-                audio_data = audio_data / np.max(np.abs(audio_data))
-
-            sf.write(str(wav_path), audio_data, 16000)
-            time.sleep(0.1)
-        except Exception as e:
-            self.newTranscript.emit("", "", f"Gagal simpan rekaman: {e}")
-            return
-
-        # STT Whisper
-        src = _whisper_transcribe(str(wav_path)) or ""
         clean_src = src.replace("[BLANK_AUDIO]", "").strip()
         if not clean_src:
             self.newTranscript.emit("", "", "STT kosong atau gagal")
@@ -298,7 +277,7 @@ class TranslateTab(QWidget):
 
     def _do_preview_voice(self, voice_name, lang_code):
         try:
-            speak("wow arul is very handsome and kind", lang_code, voice_name)
+            speak("wow arul is very handsome and kind", lang_code, voice_name, priority="preview")
             self.status.setText("Preview selesai")
         except Exception as e:
             self.log.append(f"[ERROR] Preview voice failed: {str(e)}")
@@ -354,14 +333,20 @@ class TranslateTab(QWidget):
             pressed = self._is_pressed(hot)
             if pressed and not prev:
                 prev = True
+                # Barge-in: hentikan TTS yang masih diputar selama streamer bicara
+                if self.cfg.get("tts_barge_in", True):
+                    get_tts_queue().barge_in()
                 self.status.setText("🔴 Recording…")
                 lang = self.lang_map[self.lang_combo.currentText()]
-                self.recorder = RecorderThread(self.mic.currentData(), lang)
+                self.recorder = RecorderThread(self.mic.currentData(), lang,
+                                               streaming=self.cfg.get("stt_streaming", True))
+                self.recorder.partialTranscript.connect(lambda text: self.txtbox.setText(f"📝 {text}…"))
                 self.recorder.newTranscript.connect(self.on_translate)
                 self.recorder.start()
                 register_activity("translate_basic")
             elif not pressed and prev:
                 prev = False
+                get_tts_queue().resume()
                 if self.recorder:
                     self.recorder.running = False
                 self.status.setText("⏳ Processing…")
@@ -384,10 +369,10 @@ class TranslateTab(QWidget):
         def _do_tts(text, lang_code, voice_name):
                 try:
                         print(f"[DEBUG] Speak → voice={voice_name}, lang={lang_code}, text={text}")
-                        speak(text, lang_code, voice_name)
+                        # ttsFinished dikirim antrian TTS setelah audio selesai diputar
+                        speak(text, lang_code, voice_name, on_finished=self.ttsFinished.emit)
                 except Exception as e:
                         print(f"❌ TTS Error: {e}")
-                finally:
                         self.ttsFinished.emit()
 
         # register activity ke server
@@ -46,12 +46,15 @@ try:
 except ImportError:
     from modules_server.tts_engine import speak
 
+from modules_server.tts_queue import get_tts_queue
+
 # ─── STT transcribe ──────────────────────────────────────────────
 try:
-    from modules_client.translate_stt import transcribe
+    from modules_client.translate_stt import transcribe, transcribe_streaming
 except ImportError:
     def transcribe(*args, **kwargs):
         raise NotImplementedError("STT hanya tersedia di environment client")
+    transcribe_streaming = transcribe
 
 # pastikan folder temp ada
 temp_dir = Path("temp")
@@ -60,37 +63,27 @@ temp_dir.mkdir(parents=True, exist_ok=True)
 class RecorderThread(QThread):
     """Hold-to-talk: record → STT → translate → emit(src, tgt, err)"""
     newTranscript = pyqtSignal(str, str, str)
+    partialTranscript = pyqtSignal(str)
 
-    def __init__(self, mic_idx: int, src_lang: str):
+    def __init__(self, mic_idx: int, src_lang: str, streaming: bool = True):
         super().__init__()
         self.mic_idx  = mic_idx
         self.src_lang = src_lang
-        self.buffer   = []
+        self.streaming = streaming
         self.running  = True
 
     def run(self):
         try:
-            with sd.InputStream(
-                samplerate=16000, channels=1, device=self.mic_idx,
-                callback=lambda indata, *_: self.buffer.extend(indata.copy())
-            ):
-                while self.running:
-                    time.sleep(0.05)
+            # STT (pakai Google untuk mode Pro): audio di-stream selama hotkey
+            # ditahan, hasil interim ke partialTranscript, final saat dilepas
+            use_google = True
+            src = transcribe_streaming(lambda: self.running, self.mic_idx, self.src_lang, use_google,
+                                       on_partial=self.partialTranscript.emit,
+                                       streaming=self.streaming) or ""
         except Exception as e:
             self.newTranscript.emit("", "", f"Mic error: {e}")
             return
 
-        wav_path = temp_dir / "record.wav"
-        try:
-            sf.write(str(wav_path), self.buffer, 16000)
-            time.sleep(0.1)
-        except Exception as e:
-            self.newTranscript.emit("", "", f"Gagal simpan rekaman: {e}")
-            return
-
-        # STT (pakai Google untuk mode Pro)
-        use_google = True
-        src = transcribe(str(wav_path), self.src_lang, use_google) or ""
         # filter out Whisper's blank-audio marker
         clean_src = src.replace("[BLANK_AUDIO]", "").strip()
         if not clean_src:
@@ -270,7 +263,7 @@ class TranslateTab(QWidget):
         cfg = self.voice_map[lbl]
         self.cfg.set("voice_model", cfg["voice_name"])
         self.log.append(f"[Preview] {lbl}")
-        speak("wow arul is very handsome", cfg["language_code"], cfg["voice_name"])  
+        speak("wow arul is very handsome", cfg["language_code"], cfg["voice_name"], priority="preview")
 
     def save_voice(self):
         lbl = self.voice_cb.currentText()
@@ -293,13 +286,19 @@ class TranslateTab(QWidget):
             pressed = self._is_pressed(hot)
             if pressed and not prev:
                 prev = True
+                # Barge-in: hentikan TTS yang masih diputar selama streamer bicara
+                if self.cfg.get("tts_barge_in", True):
+                    get_tts_queue().barge_in()
                 self.status.setText("🔴 Recording…")
                 lang = self.lang_map[self.lang_combo.currentText()]
-                self.recorder = RecorderThread(self.mic.currentData(), lang)
+                self.recorder = RecorderThread(self.mic.currentData(), lang,
+                                               streaming=self.cfg.get("stt_streaming", True))
+                self.recorder.partialTranscript.connect(lambda text: self.txtbox.setText(f"📝 {text}…"))
                 self.recorder.newTranscript.connect(self.on_translate)
                 self.recorder.start()
             elif not pressed and prev:
                 prev = False
+                get_tts_queue().resume()
                 if self.recorder:
                     self.recorder.running = False
                 self.status.setText("⏳ Processing…")
@@ -323,10 +322,10 @@ class TranslateTab(QWidget):
         def _do_tts(text, lang_code, voice_name):
                 try:
                         print(f"[DEBUG] Speak → voice={voice_name}, lang={lang_code}, text={text}")
-                        speak(text, lang_code, voice_name)
+                        # ttsFinished dikirim antrian TTS setelah audio selesai diputar
+                        speak(text, lang_code, voice_name, on_finished=self.ttsFinished.emit)
                 except Exception as e:
                         print(f"❌ TTS Error: {e}")
-                finally:
                         self.ttsFinished.emit()
 
 
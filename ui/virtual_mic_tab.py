@@ -233,7 +233,8 @@ class VirtualMicTab(QWidget):
                     target=lambda: speak(
                         "Ini adalah tes virtual microphone. Jika Anda mendengar suara ini di aplikasi streaming, berarti pengaturan berhasil.",
                         language_code="id-ID",
-                        output_device=device_index
+                        output_device=device_index,
+                        priority="preview"
                     )
                 )
                 thread.daemon = True